@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+"""
+===============
+bench_append.py
+===============
+
+Benchmarks ingestion of a large SAS log by PgeLogger.append(), comparing the
+original implementation (read the whole source, strip and split it, then
+parse and write each line individually) against the streaming, block-based
+bulk ingestion.
+
+The synthetic SAS log is generated by repeating the lines of
+src/opera/test/data/test_sas_log.txt. Both loggers spill to a temporary
+directory, so the resulting logs do not need to be held in memory.
+
+Example usage:
+
+    python benchmarks/bench_append.py --lines 5000000
+
+"""
+
+import argparse
+import itertools
+import os
+import tempfile
+import time
+from os.path import abspath, dirname, isfile, join
+
+from opera.util.logger import PgeLogger
+
+SAMPLE_SAS_LOG = join(dirname(abspath(__file__)), os.pardir, 'src', 'opera', 'test', 'data', 'test_sas_log.txt')
+
+SPILL_THRESHOLD = 64 * 2**20
+"""In-memory log size past which the benchmarked loggers spill to disk"""
+
+
+def legacy_append(logger, source):
+    """The original PgeLogger.append() implementation, for use as a baseline"""
+    if isfile(source):
+        with open(source, 'r', encoding='utf-8') as source_file_object:
+            source_contents = source_file_object.read().strip()
+    else:
+        source_contents = source.strip()
+
+    for log_line in source_contents.split('\n'):
+        logger.append_line(log_line)
+
+
+def create_synthetic_log(filename, num_lines):
+    """Writes a SAS log of num_lines lines, repeating the sample SAS log"""
+    with open(SAMPLE_SAS_LOG, 'r', encoding='utf-8') as infile:
+        sample_lines = infile.read().strip().split('\n')
+
+    with open(filename, 'w', encoding='utf-8') as outfile:
+        for line in itertools.islice(itertools.cycle(sample_lines), num_lines):
+            outfile.write(line + '\n')
+
+
+def time_append(append_function, source, spill_dir):
+    """Appends the source to a new spilling logger, returning the elapsed seconds"""
+    logger = PgeLogger()
+    logger.enable_spill(SPILL_THRESHOLD, spill_dir=spill_dir)
+
+    start_time = time.perf_counter()
+    append_function(logger, source)
+    elapsed_seconds = time.perf_counter() - start_time
+
+    logger.get_stream_object().close()
+
+    return elapsed_seconds
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=5000000,
+                        help='Number of lines in the synthetic SAS log.')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Number of timed repetitions per case, the best is reported.')
+
+    args = parser.parse_args()
+
+    cases = {
+        'legacy (per-line)': legacy_append,
+        'bulk (streaming)': PgeLogger.append,
+    }
+
+    with tempfile.TemporaryDirectory(prefix='bench_append_') as temp_dir:
+        source = join(temp_dir, 'synthetic_sas.log')
+        create_synthetic_log(source, args.lines)
+
+        print(f'Synthetic SAS log: {args.lines:,} lines, {os.path.getsize(source) / 2**20:,.1f} MB')
+        print(f"{'CASE':<20} {'SECONDS':>10} {'LINES/s':>12} {'SPEEDUP':>8}")
+
+        baseline = None
+
+        for case_name, append_function in cases.items():
+            elapsed_seconds = min(time_append(append_function, source, temp_dir)
+                                  for _ in range(args.repeat))
+            baseline = baseline or elapsed_seconds
+
+            print(f'{case_name:<20} {elapsed_seconds:>10.2f} {args.lines / elapsed_seconds:>12,.0f} '
+                  f'{baseline / elapsed_seconds:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
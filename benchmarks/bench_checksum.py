@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+"""
+=================
+bench_checksum.py
+=================
+
+Benchmarks checksum generation throughput for sets of output products of
+varying count and size, comparing the original sequential read()-based
+implementation against opera.util.run_utils.get_checksums() for a range of
+worker counts.
+
+Example usage:
+
+    python benchmarks/bench_checksum.py --file-counts 1 8 32 --file-sizes-mb 16 128 --workers 1 4 8
+
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+from os.path import join
+
+from opera.util.run_utils import DEFAULT_CHECKSUM_CHUNK_SIZE, get_checksums
+
+
+def legacy_get_checksum(file_name):
+    """The original get_checksum() implementation, for use as a baseline"""
+    hash_md5 = hashlib.md5()
+
+    with open(file_name, "rb") as infile:
+        for chunk in iter(lambda: infile.read(2 ** 20), b""):
+            hash_md5.update(chunk)
+
+    return hash_md5.hexdigest()
+
+
+def create_test_files(output_dir, file_count, file_size):
+    """Creates file_count files of random contents, each file_size bytes in size"""
+    file_names = []
+    block = os.urandom(min(file_size, 2 ** 24))
+
+    for index in range(file_count):
+        file_name = join(output_dir, f'product_{index:04d}.bin')
+
+        with open(file_name, 'wb') as outfile:
+            remaining = file_size
+
+            while remaining > 0:
+                remaining -= outfile.write(block[:remaining])
+
+        file_names.append(file_name)
+
+    return file_names
+
+
+def time_call(func, repeat):
+    """Returns the best wall-clock time in seconds of repeat calls to func"""
+    best = float('inf')
+
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start_time)
+
+    return best
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file-counts', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--file-sizes-mb', type=float, nargs='+', default=[4, 64])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHECKSUM_CHUNK_SIZE)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of timed repetitions per case, the best is reported.')
+    parser.add_argument('--dir', type=str, default=None,
+                        help='Directory to create test files in (defaults to the system temp dir).')
+
+    args = parser.parse_args()
+
+    print(f"{'FILES':>6} {'SIZE(MB)':>9} {'IMPL':>12} {'SECONDS':>9} {'MB/s':>9} {'SPEEDUP':>8}")
+
+    for file_size_mb in args.file_sizes_mb:
+        file_size = int(file_size_mb * 2 ** 20)
+
+        for file_count in args.file_counts:
+            with tempfile.TemporaryDirectory(prefix='bench_checksum_', dir=args.dir) as temp_dir:
+                file_names = create_test_files(temp_dir, file_count, file_size)
+                total_mb = file_count * file_size / 2 ** 20
+
+                # Warm the page cache so every case measures hashing rather than disk
+                [legacy_get_checksum(file_name) for file_name in file_names]  # pylint: disable=expression-not-assigned
+
+                baseline = time_call(
+                    lambda: [legacy_get_checksum(file_name) for file_name in file_names], args.repeat
+                )
+                print(f'{file_count:>6} {file_size_mb:>9g} {"legacy":>12} {baseline:>9.3f} '
+                      f'{total_mb / baseline:>9.1f} {1.0:>8.2f}')
+
+                for num_workers in args.workers:
+                    elapsed = time_call(
+                        lambda workers=num_workers: get_checksums(file_names, workers, args.chunk_size),
+                        args.repeat
+                    )
+                    print(f'{file_count:>6} {file_size_mb:>9g} {f"workers={num_workers}":>12} '
+                          f'{elapsed:>9.3f} {total_mb / elapsed:>9.1f} {baseline / elapsed:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+"""
+===============
+bench_logger.py
+===============
+
+Microbenchmark of PgeLogger message throughput, comparing the original
+inspect-based call-site capture against the cached sys._getframe() capture,
+and against logging with location capture disabled.
+
+Example usage:
+
+    python benchmarks/bench_logger.py --messages 200000
+
+"""
+
+import argparse
+import inspect
+import time
+
+from opera.util.error_codes import ErrorCode
+from opera.util.logger import PgeLogger, standardize_severity_string, write
+
+
+class LegacyPgeLogger(PgeLogger):
+    """PgeLogger using the original call-site capture, for use as a baseline"""
+
+    def write(self, severity, module, error_code_offset, description,
+              additional_back_frames=0):
+        """Reproduces the pre-change write(), which located its caller by walking inspect frames"""
+        severity = standardize_severity_string(severity)
+        self.increment_log_count_by_severity(severity)
+
+        caller = inspect.currentframe().f_back
+
+        for _ in range(additional_back_frames):
+            caller = caller.f_back
+
+        location = caller.f_code.co_filename + ':' + str(caller.f_lineno)
+
+        write(self.log_stream, severity, self.workflow, module,
+              self.error_code_base + error_code_offset,
+              location, description)
+
+
+def log_messages(logger, num_messages):
+    """Logs num_messages info messages and metrics, returning messages per second"""
+    start_time = time.perf_counter()
+
+    for index in range(num_messages // 2):
+        logger.info('bench_logger', ErrorCode.LOG_FILE_INIT_COMPLETE, 'Benchmark message')
+        logger.log_one_metric('bench_logger', 'bench.metric', index)
+
+    return num_messages / (time.perf_counter() - start_time)
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=200000,
+                        help='Number of messages to log per case (half info messages, half metrics).')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of timed repetitions per case, the best is reported.')
+
+    args = parser.parse_args()
+
+    def _no_metric_locations():
+        logger = PgeLogger()
+        logger.disable_location_capture(ErrorCode.SUMMARY_STATS_MESSAGE)
+        return logger
+
+    cases = {
+        'legacy (inspect)': LegacyPgeLogger,
+        'cached _getframe': PgeLogger,
+        'metrics unlocated': _no_metric_locations,
+    }
+
+    baseline = None
+
+    print(f"{'CASE':<20} {'MSGS/s':>12} {'SPEEDUP':>8}")
+
+    for case_name, make_logger in cases.items():
+        rate = max(log_messages(make_logger(), args.messages) for _ in range(args.repeat))
+        baseline = baseline or rate
+
+        print(f'{case_name:<20} {rate:>12,.0f} {rate / baseline:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
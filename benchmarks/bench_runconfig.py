@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+"""
+==================
+bench_runconfig.py
+==================
+
+Benchmarks loading and validation of a large DSWx-HLS RunConfig, containing
+a configurable number of input file paths, comparing the original pipeline
+(the file parsed twice with the pure-Python YAML loader, then read a third time
+and validated against freshly compiled schemas) against the single-parse
+pipeline of opera.pge.base.runconfig.RunConfig.
+
+Example usage:
+
+    python benchmarks/bench_runconfig.py --inputs 100 1000 10000
+
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from os.path import join
+
+from pkg_resources import resource_filename
+
+import yamale
+
+import yaml
+
+from opera.pge.base.runconfig import BASE_PGE_SCHEMA, RunConfig
+from opera.util.schema_cache import clear_schema_cache
+
+
+def create_test_runconfig(output_dir, input_count):
+    """Writes a DSWx-HLS RunConfig listing input_count input file paths"""
+    template = resource_filename('opera.test', join('data', 'test_dswx_hls_config.yaml'))
+
+    with open(template, 'r', encoding='utf-8') as infile:
+        runconfig_dict = yaml.safe_load(infile)
+
+    input_paths = [f'/data/input/HLS.S30.T22VEQ.2021248T143156.v2.0.B{index:06d}.tif'
+                   for index in range(input_count)]
+
+    runconfig_dict['RunConfig']['Groups']['PGE']['InputFilesGroup']['InputFilePaths'] = input_paths
+    runconfig_dict['RunConfig']['Groups']['SAS']['runconfig']['groups']['input_file_group']['input_file_path'] = \
+        input_paths
+
+    runconfig_filename = join(output_dir, f'dswx_hls_{input_count}_inputs.yaml')
+
+    with open(runconfig_filename, 'w', encoding='utf-8') as outfile:
+        yaml.safe_dump(runconfig_dict, outfile, sort_keys=False)
+
+    return runconfig_filename
+
+
+def legacy_load_and_validate(runconfig_filename):
+    """The original load and validation pipeline, for use as a baseline"""
+    # Parsed once by pge_main, and again by the PGE itself
+    for _ in range(2):
+        with open(runconfig_filename, 'r', encoding='utf-8') as stream:
+            runconfig_dict = yaml.safe_load(stream)['RunConfig']
+
+    sas_schema_file = resource_filename(
+        'opera', runconfig_dict['Groups']['PGE']['PrimaryExecutable']['SchemaPath']
+    )
+
+    pge_schema = yamale.make_schema(BASE_PGE_SCHEMA)
+    sas_schema = yamale.make_schema(sas_schema_file)
+    pge_schema.includes['sas_configuration'] = sas_schema
+
+    yamale.validate(pge_schema, yamale.make_data(runconfig_filename), strict=True)
+
+
+def load_and_validate(runconfig_filename):
+    """The single-parse load and validation pipeline"""
+    RunConfig(runconfig_filename).validate()
+
+
+def time_call(func, repeat):
+    """Returns the best wall-clock time in seconds of repeat calls to func"""
+    best = float('inf')
+
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start_time)
+
+    return best
+
+
+def main():
+    """Runs the benchmark and prints a table of results"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--inputs', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='Numbers of input file paths listed by the RunConfig.')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of timed repetitions per case, the best is reported.')
+    parser.add_argument('--dir', type=str, default=None,
+                        help='Directory to create test RunConfigs in (defaults to the system temp dir).')
+
+    args = parser.parse_args()
+
+    print(f"{'INPUTS':>7} {'SIZE(KB)':>9} {'IMPL':>12} {'SECONDS':>9} {'SPEEDUP':>8}")
+
+    for input_count in args.inputs:
+        with tempfile.TemporaryDirectory(prefix='bench_runconfig_', dir=args.dir) as temp_dir:
+            runconfig_filename = create_test_runconfig(temp_dir, input_count)
+            size_kb = os.path.getsize(runconfig_filename) / 1024
+
+            baseline = time_call(lambda: legacy_load_and_validate(runconfig_filename), args.repeat)
+            print(f'{input_count:>7} {size_kb:>9.1f} {"legacy":>12} {baseline:>9.4f} {1.0:>8.2f}')
+
+            # The first validation within a process compiles the schemas, later ones reuse them
+            clear_schema_cache()
+
+            cold = time_call(lambda: load_and_validate(runconfig_filename), 1)
+            print(f'{input_count:>7} {size_kb:>9.1f} {"cold-cache":>12} {cold:>9.4f} {baseline / cold:>8.2f}')
+
+            warm = time_call(lambda: load_and_validate(runconfig_filename), args.repeat)
+            print(f'{input_count:>7} {size_kb:>9.1f} {"single-parse":>12} {warm:>9.4f} {baseline / warm:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
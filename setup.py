@@ -57,4 +57,9 @@ setup(
     version=opera.__version__,
     zip_safe=False,
     extras_require={"dev": dev_requirements},
+    entry_points={
+        'console_scripts': [
+            'opera_log_analytics=opera.scripts.log_analytics:log_analytics_main'
+        ]
+    },
 )
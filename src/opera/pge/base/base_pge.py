@@ -10,10 +10,10 @@ Module defining the Base PGE interfaces from which all other PGEs are derived.
 """
 
 import os
+import threading
 from collections import OrderedDict
 from datetime import datetime
 from fnmatch import fnmatch
-from functools import lru_cache
 from os.path import abspath, basename, exists, join, splitext
 
 from yamale import YamaleError
@@ -21,16 +21,28 @@ from yamale import YamaleError
 import yaml
 
 import opera
+from opera.util.checksum_cache import ChecksumCache
 from opera.util.error_codes import ErrorCode
+from opera.util.inventory import ProductInventory
+from opera.util.log_streams import LOG_COMPRESSION_SUFFIXES
+from opera.util.logger import DeferredCriticalError
 from opera.util.logger import PgeLogger
 from opera.util.logger import default_log_file_name
 from opera.util.metfile import MetFile
+from opera.util.metrics import write_metrics_json
+from opera.util.metrics import write_metrics_prometheus
+from opera.util.pipeline import PipelineStep, run_pipeline
 from opera.util.run_utils import create_qa_command_line
 from opera.util.run_utils import create_sas_command_line
-from opera.util.run_utils import get_checksum
+from opera.util.run_utils import DEFAULT_CHECKSUM_ALGORITHM
+from opera.util.run_utils import get_checksums
+from opera.util.run_utils import move_file
 from opera.util.run_utils import time_and_execute
 from opera.util.time import get_catalog_metadata_datetime_str
 from opera.util.time import get_time_for_filename
+from opera.util.tracing import Tracer
+from opera.util.tracing import trace_methods
+from opera.util.usage_metrics import ProcessTreeSampler
 
 from .runconfig import RunConfig
 
@@ -72,8 +84,16 @@ class PreProcessorMixin:
     def _load_runconfig(self):
         """
         Loads the RunConfig file provided to the PGE into an in-memory
-        representation.
+        representation, unless an already loaded RunConfig was provided at
+        construction.
         """
+        if self._preloaded_runconfig is not None:
+            self.logger.info(self.name, ErrorCode.LOADING_RUN_CONFIG_FILE,
+                             f'Using RunConfig file {self.runconfig_path} loaded by pge_main')
+
+            self.runconfig = self._preloaded_runconfig
+            return
+
         self.logger.info(self.name, ErrorCode.LOADING_RUN_CONFIG_FILE,
                          f'Loading RunConfig file {self.runconfig_path}')
 
@@ -155,9 +175,44 @@ class PreProcessorMixin:
         # can access output_product_path from the parsed RunConfig
         self.logger.move(join(self.runconfig.output_product_path, default_log_file_name()))
 
+        # Write the PGE and QA logs to journals in the scratch directory as
+        # they are logged, so they survive the PGE being killed, or otherwise
+        # bound the memory used by the logs by spilling them to the scratch
+        # directory, if requested
+        if self.runconfig.log_async_writer_enabled:
+            for logger in (self.logger, self.qa_logger):
+                logger.enable_async_writer(flush_interval=self.runconfig.log_flush_interval,
+                                           flush_threshold=self.runconfig.log_flush_threshold,
+                                           journal_dir=self.runconfig.scratch_path)
+        elif self.runconfig.log_spill_threshold is not None:
+            for logger in (self.logger, self.qa_logger):
+                logger.enable_spill(self.runconfig.log_spill_threshold, spill_dir=self.runconfig.scratch_path)
+
+        # Write machine-readable sidecars alongside the PGE and QA logs, if requested
+        if self.runconfig.log_sidecar_enabled:
+            for logger in (self.logger, self.qa_logger):
+                logger.enable_sidecar(spool_dir=self.runconfig.scratch_path)
+
+        # Collapse repeated lines, and limit noisy lines, appended from the SAS and QA output
+        if self.runconfig.log_deduplication_enabled or self.runconfig.log_rate_limits:
+            for logger in (self.logger, self.qa_logger):
+                logger.enable_line_filter(rate_limits=self.runconfig.log_rate_limits,
+                                          collapse_runs=self.runconfig.log_deduplication_enabled)
+
+        # Skip the call-site lookup for high-volume messages, such as metrics
+        location_capture_disabled = [ErrorCode[name] for name in self.runconfig.log_location_capture_disabled]
+
+        for logger in (self.logger, self.qa_logger):
+            logger.disable_location_capture(*location_capture_disabled)
+
         self.logger.info(self.name, ErrorCode.LOG_FILE_INIT_COMPLETE,
                          'Log file configuration complete')
 
+        # Record the PGE and SAS versions, so logs may be grouped by version
+        # when analyzed in bulk
+        self.logger.log_one_metric(self.name, 'pge.version', self.PGE_VERSION)
+        self.logger.log_one_metric(self.name, 'sas.version', self.SAS_VERSION)
+
     def run_preprocessor(self, **kwargs):  # pylint: disable=unused-argument
         """
         Executes the pre-processing steps for PGE initialization.
@@ -199,6 +254,31 @@ class PostProcessorMixin:
 
     _post_mixin_name = "PostProcessorMixin"
 
+    def _get_product_inventory(self):
+        """
+        Returns the inventory of the output products within the output location
+        defined by the RunConfig, creating it on first use. The contents of the
+        scratch location are excluded, and products are classified by the
+        patterns of the renaming map for the PGE.
+
+        Post-processing steps which write, rename or modify output products
+        must record the change with the inventory, so that later steps see it.
+
+        """
+        if self.product_inventory is None:
+            self.product_inventory = ProductInventory(
+                self.runconfig.output_product_path,
+                exclude_paths=[self.runconfig.scratch_path],
+                patterns=self.rename_by_pattern_map.keys()
+            )
+
+        return self.product_inventory
+
+    def _invalidate_product_inventory(self):
+        """Ensures the output location is rescanned, after an executable may have written to it"""
+        if self.product_inventory is not None:
+            self.product_inventory.invalidate()
+
     def _run_sas_qa_executable(self):
         """
         Executes an optional Quality Assurance (QA) application which may be bundled
@@ -225,68 +305,263 @@ class PostProcessorMixin:
             self.qa_logger.info(self.name, ErrorCode.QA_SAS_PROGRAM_STARTING,
                                 'Starting SAS QA executable')
 
-            elapsed_time = time_and_execute(
-                command_line, self.qa_logger, self.runconfig.execute_via_shell
-            )
+            with self.tracer.span('sas.qa.subprocess', category='sas'):
+                elapsed_time = time_and_execute(
+                    command_line, self.qa_logger, self.runconfig.execute_via_shell,
+                    stream_output=self.runconfig.qa_stream_output,
+                    timeout=self.runconfig.qa_timeout,
+                    inactivity_timeout=self.runconfig.qa_inactivity_timeout,
+                    kill_grace_period=self.runconfig.qa_kill_grace_period,
+                    resource_sampler=self._create_resource_sampler('sas.qa')
+                )
 
             self.qa_logger.info(self.name, ErrorCode.QA_SAS_PROGRAM_COMPLETED,
                                 'SAS QA executable complete')
 
             self.qa_logger.log_one_metric(self.name, 'sas.qa.elapsed_seconds', elapsed_time)
+            self._log_resource_metrics(self.qa_logger, 'sas.qa')
+
+            self._invalidate_product_inventory()
         else:
             self.logger.info(self.name, ErrorCode.QA_SAS_PROGRAM_DISABLED,
                              'SAS QA is disabled, skipping')
 
+    def _create_resource_sampler(self, metric_prefix):
+        """
+        Creates the sampler used to monitor the resource usage of a SAS or QA
+        executable, if resource sampling is enabled by the RunConfig.
+
+        Parameters
+        ----------
+        metric_prefix : str
+            Prefix of the metrics collected by the sampler (such as "sas").
+            Also used to identify the sampler for later reporting.
+
+        Returns
+        -------
+        resource_sampler : ProcessTreeSampler or None
+            The created sampler, or None if resource sampling is disabled.
+
+        """
+        sampling_interval = self.runconfig.resource_sampling_interval
+
+        if not sampling_interval:
+            return None
+
+        resource_sampler = ProcessTreeSampler(interval=sampling_interval)
+        self.resource_samplers[metric_prefix] = resource_sampler
+
+        return resource_sampler
+
+    def _log_resource_metrics(self, logger, metric_prefix):
+        """
+        Logs the summary metrics (peak, 95th percentile and mean values) collected
+        by the resource sampler associated with the provided metric prefix, if any.
+
+        Parameters
+        ----------
+        logger : PgeLogger
+            The logger to write the metrics to.
+        metric_prefix : str
+            Prefix of the metrics to log, as provided to _create_resource_sampler().
+
+        """
+        resource_sampler = self.resource_samplers.get(metric_prefix)
+
+        if resource_sampler:
+            for metric_name, value in resource_sampler.get_summary_metrics().items():
+                logger.log_one_metric(self.name, f'{metric_prefix}.process_tree.{metric_name}', value)
+
+    def _write_resource_timelines(self):
+        """
+        Writes the resource usage timeline recorded for each monitored SAS/QA
+        executable to the output product location, if requested by the RunConfig.
+        """
+        timeline_format = self.runconfig.resource_timeline_format
+
+        if not timeline_format:
+            return
+
+        for metric_prefix, resource_sampler in self.resource_samplers.items():
+            timeline_filename = self._resource_timeline_filename(metric_prefix, timeline_format)
+            timeline_filepath = join(self.runconfig.output_product_path, timeline_filename)
+
+            self.logger.info(self.name, ErrorCode.CREATING_OUTPUT_FILE,
+                             f"Writing resource timeline to {timeline_filepath}")
+
+            try:
+                resource_sampler.write_timeline(timeline_filepath, timeline_format)
+            except OSError as err:
+                msg = f"Failed to write resource timeline {timeline_filepath}, reason: {str(err)}"
+                self.logger.critical(self.name, ErrorCode.LOG_FILE_CREATION_FAILED, msg)
+
+    def _write_metrics(self):
+        """
+        Exports the metrics recorded by the PGE and QA loggers to the output
+        product location, in each of the formats requested by the RunConfig.
+
+        This should be invoked once both logs are finalized, so the metrics
+        include those logged within the log summaries.
+
+        """
+        registries = {'pge': self.logger.metrics}
+
+        if self.runconfig.qa_enabled:
+            registries['qa'] = self.qa_logger.metrics
+
+        labels = {'pge': self.name, 'pge_version': self.PGE_VERSION}
+
+        exporters = {'json': write_metrics_json, 'prometheus': write_metrics_prometheus}
+
+        for metrics_format in self.runconfig.metrics_exporters:
+            metrics_filepath = join(self.runconfig.output_product_path,
+                                    self._metrics_filename(metrics_format))
+
+            try:
+                exporters[metrics_format](metrics_filepath, registries, labels)
+            except OSError as err:
+                # Logs are finalized by this point so raise an Exception instead
+                raise RuntimeError(f"Failed to write metrics to {metrics_filepath}, reason: {str(err)}")
+
+    def _log_trace_summary(self):
+        """
+        Logs a flat summary of the time spent within each traced stage of the
+        PGE completed so far, if tracing is enabled by the RunConfig.
+
+        Stages still in progress (such as post-processing itself) are only
+        included within the exported trace.
+
+        """
+        if not self.runconfig.trace_enabled:
+            return
+
+        for span_name, span_summary in self.tracer.summary().items():
+            self.logger.log_one_metric(self.name, f'trace.{span_name}.calls', span_summary['calls'])
+            self.logger.log_one_metric(self.name, f'trace.{span_name}.total_seconds',
+                                       span_summary['total_seconds'])
+            self.logger.log_one_metric(self.name, f'trace.{span_name}.self_seconds',
+                                       span_summary['self_seconds'])
+
+    def _write_trace(self):
+        """
+        Exports the traced stages of the PGE to the output product location in
+        the Chrome trace event format, if tracing is enabled by the RunConfig.
+
+        This should be invoked once the job is complete, so the trace includes
+        every stage of the PGE.
+
+        """
+        if not self.runconfig.trace_enabled:
+            return
+
+        trace_filepath = join(self.runconfig.output_product_path, self._trace_filename())
+
+        try:
+            self.tracer.write_chrome_trace(trace_filepath)
+        except OSError as err:
+            # Logs are finalized by this point so raise an Exception instead
+            raise RuntimeError(f"Failed to write trace to {trace_filepath}, reason: {str(err)}")
+
     def _checksum_output_products(self):
         """
         Generates a dictionary mapping output product file names to the
-        corresponding MD5 checksum digest of the file's contents.
+        corresponding checksum digest(s) of the file's contents.
 
         The output products to generate checksums for is determined by scanning
         the output product location specified by the RunConfig. Any files
         within the directory that have the expected file extensions for output
-        products are then picked up for checksum generation.
+        products are then picked up for checksum generation. Products which
+        were copied across file systems during staging reuse the checksums
+        computed during the copy.
 
         Returns
         -------
         checksums : dict
             Mapping of output product file names to MD5 checksums of said
-            products.
+            products. If the RunConfig requests a specific set of checksum
+            algorithms, each file name instead maps to a dictionary of
+            algorithm name to checksum, with all digests computed in a
+            single pass over each product.
 
         """
-        output_products = self.runconfig.get_output_product_filenames()
+        output_products = self._get_product_inventory().entries()
 
         # Filter out any files that were not renamed by the PGE
-        filtered_output_products = filter(
-            lambda product: basename(product) in self.renamed_files.values(),
-            output_products
-        )
+        renamed_files = set(self.renamed_files.values())
+        filtered_output_products = [product for product in output_products if product.name in renamed_files]
+
+        # Reuse any checksums computed while the products were staged, provided
+        # the products have not been modified since
+        algorithms = self.runconfig.checksum_algorithms
+        staged_checksums = {}
+
+        for output_product in filtered_output_products:
+            if output_product.path in self.staged_checksums:
+                staged_size, staged_mtime_ns, digests = self.staged_checksums[output_product.path]
+
+                if (output_product.size, output_product.mtime_ns) == (staged_size, staged_mtime_ns):
+                    staged_checksums[output_product.path] = (
+                        digests[DEFAULT_CHECKSUM_ALGORITHM] if algorithms is None else digests
+                    )
+
+        filtered_output_products = [product.path for product in filtered_output_products]
+
+        # Consult the persistent checksum cache (if configured), so products
+        # unchanged since a previous run are not read again
+        checksum_cache = None
+
+        if self.runconfig.checksum_cache_file:
+            checksum_cache = ChecksumCache(self.runconfig.checksum_cache_file)
+
+        # Generate checksums on the remainder of the filtered product list
+        try:
+            checksums = get_checksums(
+                [product for product in filtered_output_products if product not in staged_checksums],
+                num_workers=self.runconfig.checksum_num_workers,
+                chunk_size=self.runconfig.checksum_chunk_size,
+                algorithms=algorithms,
+                cache=checksum_cache
+            )
+        finally:
+            if checksum_cache is not None:
+                self.logger.info(self.name, ErrorCode.CREATING_CATALOG_METADATA,
+                                 f'Checksum cache {checksum_cache.cache_path}: '
+                                 f'{checksum_cache.hits} hit(s), {checksum_cache.misses} miss(es)')
+                checksum_cache.close()
+
+        checksums.update(staged_checksums)
 
-        # Generate checksums on the filtered product list
         checksums = {
-            basename(output_product): get_checksum(output_product)
+            basename(output_product): checksums[output_product]
             for output_product in filtered_output_products
         }
 
         return checksums
 
-    @lru_cache
     def _create_catalog_metadata(self):
         """
         Returns the catalog metadata as a MetFile instance. Once generated, the
         catalog metadata is cached for the life of the PGE instance.
-        """
-        catalog_metadata = {
-            'PGE_Name': self.runconfig.pge_name,
-            'PGE_Version': self.PGE_VERSION,
-            'SAS_Version': self.SAS_VERSION,
-            'Input_Files': self.runconfig.get_input_filenames(),
-            'Ancillary_Files': self.runconfig.get_ancillary_filenames(),
-            'Production_DateTime': get_catalog_metadata_datetime_str(self.production_datetime),
-            'Output_Product_Checksums': self._checksum_output_products()
-        }
 
-        return MetFile(catalog_metadata)
+        Generation is guarded by a lock, so concurrent post-processing steps
+        which need the catalog metadata share a single generation (and thus a
+        single round of output product checksumming).
+        """
+        with self._catalog_metadata_lock:
+            if self._catalog_metadata is None:
+                catalog_metadata = {
+                    'PGE_Name': self.runconfig.pge_name,
+                    'PGE_Version': self.PGE_VERSION,
+                    'SAS_Version': self.SAS_VERSION,
+                    'Input_Files': self.runconfig.get_input_filenames(),
+                    'Ancillary_Files': self.runconfig.get_ancillary_filenames(),
+                    'Production_DateTime': get_catalog_metadata_datetime_str(self.production_datetime),
+                    'Output_Product_Checksums': self._checksum_output_products()
+                }
+
+                self._catalog_metadata = MetFile(catalog_metadata)
+
+            return self._catalog_metadata
 
     def _create_iso_metadata(self):  # pylint: disable=no-self-use
         """
@@ -314,7 +589,21 @@ class PostProcessorMixin:
         """
         logger.info(self.name, ErrorCode.CLOSING_LOG_FILE,
                     f"Closing log file {logger.get_file_name()}")
-        logger.close_log_stream()
+
+        # Any requested compression of the log runs in the background, so
+        # callers must also invoke logger.wait_for_compression()
+        logger.close_log_stream(compression=self.runconfig.log_compression, background=True)
+
+    def _log_compression_suffix(self):
+        """
+        Returns the file name suffix (such as ".gz") for the compression format
+        applied to the PGE and QA logs, as configured by the RunConfig, or an
+        empty string if the logs are not compressed.
+        """
+        if self.runconfig.log_compression is None:
+            return ''
+
+        return LOG_COMPRESSION_SUFFIXES[self.runconfig.log_compression]
 
     def _core_filename(self, inter_filename=None):  # pylint: disable=unused-argument
         """
@@ -416,9 +705,10 @@ class PostProcessorMixin:
 
         The log file name for the Base PGE consists of:
 
-            <Core filename>.log
+            <Core filename>.log[<Compression suffix>]
 
         Where <Core filename> is returned by PostProcessorMixin._core_filename()
+        and <Compression suffix> by PostProcessorMixin._log_compression_suffix()
 
         Returns
         -------
@@ -426,7 +716,7 @@ class PostProcessorMixin:
             The file name to assign to the PGE/SAS log created by this PGE.
 
         """
-        return self._core_filename() + ".log"
+        return self._core_filename() + ".log" + self._log_compression_suffix()
 
     def _qa_log_filename(self):
         """
@@ -435,9 +725,10 @@ class PostProcessorMixin:
 
         The log file name for the Base PGE consists of:
 
-            <Core filename>.qa.log
+            <Core filename>.qa.log[<Compression suffix>]
 
         Where <Core filename> is returned by PostProcessorMixin._core_filename()
+        and <Compression suffix> by PostProcessorMixin._log_compression_suffix()
 
         Returns
         -------
@@ -445,7 +736,81 @@ class PostProcessorMixin:
             The file name to assign to the QA log created by this PGE.
 
         """
-        return self._core_filename() + ".qa.log"
+        return self._core_filename() + ".qa.log" + self._log_compression_suffix()
+
+    def _resource_timeline_filename(self, metric_prefix, timeline_format):
+        """
+        Returns the file name to use for a resource usage timeline produced
+        by the Base PGE.
+
+        The resource timeline file name for the Base PGE consists of:
+
+            <Core filename>.<Metric prefix>_resources.<Timeline format>
+
+        Where <Core filename> is returned by PostProcessorMixin._core_filename(),
+        and any periods within <Metric prefix> are replaced with underscores.
+
+        Parameters
+        ----------
+        metric_prefix : str
+            Prefix of the metrics associated to the timeline, such as "sas".
+        timeline_format : str
+            Format of the timeline file, used as the file extension.
+
+        Returns
+        -------
+        timeline_filename : str
+            The file name to assign to the resource timeline.
+
+        """
+        return self._core_filename() + f".{metric_prefix.replace('.', '_')}_resources.{timeline_format}"
+
+    def _metrics_filename(self, metrics_format):
+        """
+        Returns the file name to use for the job metrics exported by the Base PGE.
+
+        The metrics file name for the Base PGE consists of:
+
+            <Core filename>.metrics.json
+
+        for JSON metrics, or, for Prometheus textfile collector metrics:
+
+            <Core filename>.metrics.prom
+
+        Where <Core filename> is returned by PostProcessorMixin._core_filename().
+
+        Parameters
+        ----------
+        metrics_format : str
+            Format of the exported metrics, either "json" or "prometheus".
+
+        Returns
+        -------
+        metrics_filename : str
+            The file name to assign to the exported metrics.
+
+        """
+        extension = {'json': 'json', 'prometheus': 'prom'}[metrics_format]
+
+        return self._core_filename() + f".metrics.{extension}"
+
+    def _trace_filename(self):
+        """
+        Returns the file name to use for the stage trace exported by the Base PGE.
+
+        The trace file name for the Base PGE consists of:
+
+            <Core filename>.trace.json
+
+        Where <Core filename> is returned by PostProcessorMixin._core_filename().
+
+        Returns
+        -------
+        trace_filename : str
+            The file name to assign to the exported trace.
+
+        """
+        return self._core_filename() + ".trace.json"
 
     def _assign_filename(self, input_filepath, output_dir):
         """
@@ -486,40 +851,33 @@ class PostProcessorMixin:
         self.logger.info(self.name, ErrorCode.MOVING_LOG_FILE,
                          f"Renaming output file {input_filepath} to {final_filepath}")
 
+        # Moves across file systems copy the product, so the checksums are
+        # computed during the copy rather than reading the product back later
         try:
-            os.rename(input_filepath, final_filepath)
+            digests = move_file(input_filepath, final_filepath,
+                                algorithms=self.runconfig.checksum_algorithms,
+                                chunk_size=self.runconfig.checksum_chunk_size)
         except OSError as err:
             msg = f"Failed to rename output file {basename(input_filepath)}, reason: {str(err)}"
             self.logger.critical(self.name, ErrorCode.FILE_MOVE_FAILED, msg)
 
-    def _stage_output_files(self):
-        """
-        Ensures that all output products produced by both the SAS and this PGE
-        are staged to the output location defined by the RunConfig. This includes
-        reassignment of file names to meet the file-naming conventions required
-        by the PGE.
-
-        In addition to staging of the output products created by the SAS, this
-        function is also responsible for ensuring the catalog metadata, ISO
-        metadata, and combined PGE/SAS log are also written to the expected
-        output product location with the appropriate file names.
+        final_product = self._get_product_inventory().rename(input_filepath, final_filepath)
 
-        """
-        # Gather the list of output files produced by the SAS
-        output_products = self.runconfig.get_output_product_filenames()
+        if digests is not None and final_product is not None:
+            self.staged_checksums[final_product.path] = (final_product.size, final_product.mtime_ns, digests)
 
-        # For each output file name, assign the final file name matching the
-        # expected conventions
-        for output_product in output_products:
-            self._assign_filename(output_product, self.runconfig.output_product_path)
-
-        # Write the catalog metadata to disk with the appropriate filename
+    def _validate_catalog_metadata(self):
+        """Validates the catalog metadata against its schema"""
         catalog_metadata = self._create_catalog_metadata()
 
         if not catalog_metadata.validate(catalog_metadata.get_schema_file_path()):
             msg = f"Failed to create valid catalog metadata, reason(s):\n {catalog_metadata.get_error_msg()}"
             self.logger.critical(self.name, ErrorCode.INVALID_CATALOG_METADATA, msg)
 
+    def _write_catalog_metadata(self):
+        """Writes the catalog metadata to disk with the appropriate filename"""
+        catalog_metadata = self._create_catalog_metadata()
+
         cat_meta_filename = self._catalog_metadata_filename()
         cat_meta_filepath = join(self.runconfig.output_product_path, cat_meta_filename)
 
@@ -532,7 +890,8 @@ class PostProcessorMixin:
             msg = f"Failed to write catalog metadata file {cat_meta_filepath}, reason: {str(err)}"
             self.logger.critical(self.name, ErrorCode.CATALOG_METADATA_CREATION_FAILED, msg)
 
-        # Generate the ISO metadata for use with product submission to DAAC(s)
+    def _write_iso_metadata(self):
+        """Generates the ISO metadata for use with product submission to DAAC(s), and writes it to disk"""
         iso_metadata = self._create_iso_metadata()
 
         iso_meta_filename = self._iso_metadata_filename()
@@ -544,6 +903,81 @@ class PostProcessorMixin:
             with open(iso_meta_filepath, 'w', encoding='utf-8') as outfile:
                 outfile.write(iso_metadata)
 
+    def _postprocessing_steps(self):
+        """
+        Returns the post-processing steps run by _stage_output_files() once
+        the output products have been staged, along with their dependencies.
+
+        Steps without a dependency between them are run concurrently. The ISO
+        metadata step does not explicitly depend on the catalog metadata,
+        since reading the output product metadata can overlap with generation
+        of the checksums. If the ISO metadata needs the catalog metadata, it
+        waits on the shared generation within _create_catalog_metadata().
+
+        Inheritors of PostProcessorMixin may override this method to add, or
+        reorder, post-processing steps.
+
+        Returns
+        -------
+        steps : list[PipelineStep]
+            The post-processing steps to run.
+
+        """
+        return [
+            PipelineStep('catalog_metadata', self._create_catalog_metadata),
+            PipelineStep('validate_catalog_metadata', self._validate_catalog_metadata,
+                         depends_on=['catalog_metadata']),
+            PipelineStep('write_catalog_metadata', self._write_catalog_metadata,
+                         depends_on=['validate_catalog_metadata']),
+            PipelineStep('iso_metadata', self._write_iso_metadata),
+            PipelineStep('resource_timelines', self._write_resource_timelines)
+        ]
+
+    def _stage_output_files(self):
+        """
+        Ensures that all output products produced by both the SAS and this PGE
+        are staged to the output location defined by the RunConfig. This includes
+        reassignment of file names to meet the file-naming conventions required
+        by the PGE.
+
+        In addition to staging of the output products created by the SAS, this
+        function is also responsible for ensuring the catalog metadata, ISO
+        metadata, and combined PGE/SAS log are also written to the expected
+        output product location with the appropriate file names.
+
+        Once the output products are staged, the steps returned by
+        _postprocessing_steps() are run as a dependency-aware pipeline, with
+        the time taken by each step logged as a metric. Critical messages
+        raised by a step are logged once all running steps have finished. The QA log is always
+        finalized after all steps complete, and the main log is always
+        finalized last.
+
+        """
+        # Gather the list of output files produced by the SAS
+        output_products = self._get_product_inventory().filenames()
+
+        # For each output file name, assign the final file name matching the
+        # expected conventions
+        for output_product in output_products:
+            self._assign_filename(output_product, self.runconfig.output_product_path)
+
+        # Generate the catalog/ISO metadata and any other ancillary outputs,
+        # running the steps which are independent of one another concurrently.
+        # A failing step raises rather than finalizing the log, so any steps
+        # still running can keep logging, and the failure is logged once they
+        # have all finished.
+        try:
+            with self.logger.defer_critical():
+                step_timings = run_pipeline(self._postprocessing_steps())
+        except DeferredCriticalError as err:
+            self.logger.critical(err.module, err.error_code_offset, err.description)
+
+        for step_name, elapsed_seconds in step_timings.items():
+            self.logger.log_one_metric(self.name, f'postprocessing.{step_name}.elapsed_seconds',
+                                       elapsed_seconds)
+
+        self._log_trace_summary()
+
         # Write the QA application log to disk with the appropriate filename,
         # if necessary
         if self.runconfig.qa_enabled:
@@ -564,12 +998,22 @@ class PostProcessorMixin:
 
         try:
             self._finalize_log(self.logger)
+            self.logger.wait_for_compression()
         except OSError as err:
             msg = f"Failed to write log file to {log_filepath}, reason: {str(err)}"
 
             # Log stream might be closed by this point so raise an Exception instead
             raise RuntimeError(msg)
 
+        # Compression of the QA log runs alongside finalizing the combined log
+        try:
+            self.qa_logger.wait_for_compression()
+        except OSError as err:
+            raise RuntimeError(f"Failed to write QA log file to {self.qa_logger.get_file_name()}, "
+                               f"reason: {str(err)}")
+
+        self._write_metrics()
+
     def run_postprocessor(self, **kwargs):  # pylint: disable=unused-argument
         """
         Executes the post-processing steps for PGE job completion.
@@ -622,6 +1066,19 @@ class PgeExecutor(PreProcessorMixin, PostProcessorMixin):
     SAS_VERSION = "0.1"
     """Version of the SAS wrapped by this PGE (dummy value)"""
 
+    TRACED_STEPS = [
+        'run_preprocessor', '_initialize_logger', '_load_runconfig', '_validate_runconfig',
+        '_setup_directories', '_configure_logger', 'run_sas_executable', '_isolate_sas_runconfig',
+        'run_postprocessor', '_run_sas_qa_executable', '_stage_output_files', '_assign_filename',
+        '_checksum_output_products', '_create_catalog_metadata', '_validate_catalog_metadata',
+        '_write_catalog_metadata', '_create_iso_metadata', '_write_iso_metadata',
+        '_write_resource_timelines', '_finalize_log'
+    ]
+    """
+    Names of the pre- and post-processing steps recorded as spans of the stage
+    trace. Inheritors may extend this list with any steps of their own.
+    """
+
     def __init__(self, pge_name, runconfig_path, **kwargs):
         """
         Creates a new instance of PgeExecutor
@@ -637,12 +1094,16 @@ class PgeExecutor(PreProcessorMixin, PostProcessorMixin):
             Supported kwargs include:
                 - logger : An existing instance of PgeLogger for this PgeExecutor
                            to use, rather than creating its own.
+                - runconfig : An already loaded RunConfig instance for the file
+                              at runconfig_path, used rather than parsing the
+                              file again.
 
         """
         self.name = self.NAME
         self.pge_name = pge_name
         self.runconfig_path = runconfig_path
         self.runconfig = None
+        self._preloaded_runconfig = kwargs.get('runconfig')
         self.logger = kwargs.get('logger')
         self.qa_logger = PgeLogger(
             workflow="qa_logger", error_code_base=PgeLogger.QA_LOGGER_CODE_BASE
@@ -660,6 +1121,27 @@ class PgeExecutor(PreProcessorMixin, PostProcessorMixin):
         # Keeps track of the files that were renamed by the PGE
         self.renamed_files = OrderedDict()
 
+        # Inventory of the output products, created on first use by the
+        # post-processing steps
+        self.product_inventory = None
+
+        # Resource samplers used to monitor SAS/QA execution, keyed by metric prefix
+        self.resource_samplers = OrderedDict()
+
+        # Checksums computed while staging output products across file systems,
+        # keyed by final product path, along with the size and modification
+        # time of the product they are valid for
+        self.staged_checksums = OrderedDict()
+
+        # Catalog metadata, generated once on first request
+        self._catalog_metadata = None
+        self._catalog_metadata_lock = threading.Lock()
+
+        # Records the time spent within each step of the PGE, including any
+        # overrides of the steps by inheritors
+        self.tracer = Tracer()
+        trace_methods(self, self.tracer, self.TRACED_STEPS)
+
     def _isolate_sas_runconfig(self):
         """
         Isolates the SAS-specific portion of the RunConfig into its own
@@ -719,14 +1201,23 @@ class PgeExecutor(PreProcessorMixin, PostProcessorMixin):
         self.logger.info(self.name, ErrorCode.SAS_PROGRAM_STARTING,
                          'Starting SAS executable')
 
-        elapsed_time = time_and_execute(
-            command_line, self.logger, self.runconfig.execute_via_shell
-        )
+        with self.tracer.span('sas.subprocess', category='sas'):
+            elapsed_time = time_and_execute(
+                command_line, self.logger, self.runconfig.execute_via_shell,
+                stream_output=self.runconfig.sas_stream_output,
+                timeout=self.runconfig.sas_timeout,
+                inactivity_timeout=self.runconfig.sas_inactivity_timeout,
+                kill_grace_period=self.runconfig.sas_kill_grace_period,
+                resource_sampler=self._create_resource_sampler('sas')
+            )
 
         self.logger.info(self.name, ErrorCode.SAS_PROGRAM_COMPLETED,
                          'SAS executable complete')
 
         self.logger.log_one_metric(self.name, 'sas.elapsed_seconds', elapsed_time)
+        self._log_resource_metrics(self.logger, 'sas')
+
+        self._invalidate_product_inventory()
 
     def run(self, **kwargs):
         """
@@ -734,12 +1225,16 @@ class PgeExecutor(PreProcessorMixin, PostProcessorMixin):
 
         The pre-processor stage is run to initialize the PGE, followed by
         SAS execution, then completed with the post-processing steps to complete
-        the job.
+        the job. Once complete, the trace of all stages is exported, if
+        requested by the RunConfig.
 
         """
-        self.run_preprocessor(**kwargs)
+        with self.tracer.span('run'):
+            self.run_preprocessor(**kwargs)
+
+            print(f'Starting SAS execution for {self.__class__.__name__}')
+            self.run_sas_executable(**kwargs)
 
-        print(f'Starting SAS execution for {self.__class__.__name__}')
-        self.run_sas_executable(**kwargs)
+            self.run_postprocessor(**kwargs)
 
-        self.run_postprocessor(**kwargs)
+        self._write_trace()
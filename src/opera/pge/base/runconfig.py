@@ -13,8 +13,8 @@ Original Author: David White
 Adapted By: Scott Collins
 
 """
-import os
-from os.path import abspath, basename, isabs, isdir, isfile, join
+from os.path import abspath, isabs, isfile
+from typing import Optional
 
 from pkg_resources import resource_filename
 
@@ -22,10 +22,347 @@ import yamale
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader
+
+from opera.util.error_codes import ErrorCode
+from opera.util.inventory import InputInventory, ProductInventory
+from opera.util.log_streams import DEFAULT_FLUSH_INTERVAL, DEFAULT_FLUSH_THRESHOLD
+from opera.util.log_streams import validate_log_compression
+from opera.util.run_utils import DEFAULT_CHECKSUM_CHUNK_SIZE
+from opera.util.run_utils import validate_checksum_algorithms
+from opera.util.schema_cache import get_schema
+from opera.util.schema_cache import link_schema_includes
+
 
 BASE_PGE_SCHEMA = resource_filename('opera', 'pge/base/schema/base_pge_schema.yaml')
 """Path to the Yamale schema applicable to the PGE portion of each RunConfig"""
 
+REQUIRED = object()
+"""Sentinel default for RunConfig fields which have no default value"""
+
+
+def _resolve_package_path(path):
+    """Resolves a path relative to the opera package, leaving absolute paths (and non-paths) untouched"""
+    if not isinstance(path, str) or isabs(path):
+        return path
+
+    return resource_filename('opera', path)
+
+
+def _as_list(value):
+    """Returns a new list of the items of a list (or tuple) field, leaving any other value untouched"""
+    return list(value) if isinstance(value, (list, tuple)) else value
+
+
+class RunConfigGroup:
+    """
+    Immutable, typed view of a single group of a parsed RunConfig.
+
+    Inheritors define the key of the group within the PGE section of the
+    RunConfig, along with the fields of the group. Each field is described
+    by the name of the attribute it is assigned to, its key within the group,
+    its default value (REQUIRED if it has none), and an optional function used
+    to convert the parsed value.
+
+    Field values are resolved once, when the view is created. Required fields
+    missing from the RunConfig are left unassigned, and raise a RuntimeError
+    naming the missing field only if they are accessed.
+
+    """
+
+    GROUP_KEY = None
+    """Key of the group within the PGE section of the RunConfig, or None for the top-level RunConfig section"""
+
+    FIELDS = ()
+    """Tuples of (attribute name, key, default value, converter) for each field of the group"""
+
+    __slots__ = ('_filename', '_group_present')
+
+    def __init__(self, section, filename):
+        """
+        Creates a new view of a RunConfig group.
+
+        Parameters
+        ----------
+        section : dict
+            The parsed RunConfig section containing the group.
+        filename : str
+            Path to the RunConfig file, used when reporting missing fields.
+
+        """
+        group = section.get(self.GROUP_KEY) if self.GROUP_KEY else section
+        group_present = isinstance(group, dict)
+
+        object.__setattr__(self, '_filename', filename)
+        object.__setattr__(self, '_group_present', group_present)
+
+        for attribute, key, default, converter in self.FIELDS:
+            value = group.get(key, default) if group_present else default
+
+            if value is REQUIRED:
+                continue
+
+            if converter is not None:
+                value = converter(value)
+
+            object.__setattr__(self, attribute, value)
+
+    def __getattr__(self, item):
+        """Raises an error naming the RunConfig field corresponding to an unassigned (missing) attribute"""
+        for attribute, key, _, _ in self.FIELDS:
+            if attribute == item:
+                missing_key = key if self._group_present else self.GROUP_KEY
+
+                # TODO: create exceptions package with more intuitive exception class names
+                raise RuntimeError(
+                    f"Expected field '{missing_key}' is missing from RunConfig "
+                    f"{abspath(self._filename)}"
+                )
+
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{item}'")
+
+    def __setattr__(self, key, value):
+        """Prevents assignment to the fields of the view, which is immutable"""
+        raise AttributeError(f"'{type(self).__name__}' object is immutable")
+
+    def __delattr__(self, item):
+        """Prevents deletion of the fields of the view, which is immutable"""
+        raise AttributeError(f"'{type(self).__name__}' object is immutable")
+
+
+class PgeNameGroup(RunConfigGroup):
+    """Typed view of the PGENameGroup of a RunConfig"""
+
+    GROUP_KEY = 'PGENameGroup'
+    """Key of the group naming the PGE"""
+
+    FIELDS = (
+        ('pge_name', 'PGEName', REQUIRED, None),
+    )
+    """Fields of the PGENameGroup, the name of the PGE"""
+
+    __slots__ = tuple(field[0] for field in FIELDS)
+
+
+class InputFilesGroup(RunConfigGroup):
+    """Typed view of the InputFilesGroup of a RunConfig"""
+
+    GROUP_KEY = 'InputFilesGroup'
+    """Key of the group listing the input files"""
+
+    FIELDS = (
+        ('input_file_paths', 'InputFilePaths', REQUIRED, None),
+        ('recursive', 'Recursive', False, bool),
+        ('include_patterns', 'IncludePatterns', (), _as_list),
+        ('exclude_patterns', 'ExcludePatterns', (), _as_list),
+    )
+    """Fields of the InputFilesGroup, the input file paths and how input directories are scanned"""
+
+    __slots__ = tuple(field[0] for field in FIELDS)
+
+
+class DynamicAncillaryFilesGroup(RunConfigGroup):
+    """Typed view of the DynamicAncillaryFilesGroup of a RunConfig"""
+
+    GROUP_KEY = 'DynamicAncillaryFilesGroup'
+    """Key of the group listing the dynamic ancillary files"""
+
+    FIELDS = (
+        ('ancillary_file_map', 'AncillaryFileMap', REQUIRED, None),
+    )
+    """Fields of the DynamicAncillaryFilesGroup, the map of ancillary file types to paths"""
+
+    __slots__ = tuple(field[0] for field in FIELDS)
+
+
+class ProductPathGroup(RunConfigGroup):
+    """Typed view of the ProductPathGroup of a RunConfig"""
+
+    GROUP_KEY = 'ProductPathGroup'
+    """Key of the group locating the output products"""
+
+    FIELDS = (
+        ('output_product_path', 'OutputProductPath', REQUIRED, None),
+        ('scratch_path', 'ScratchPath', REQUIRED, None),
+    )
+    """Fields of the ProductPathGroup, the output product and scratch locations"""
+
+    __slots__ = tuple(field[0] for field in FIELDS)
+
+
+class PrimaryExecutableGroup(RunConfigGroup):
+    """Typed view of the PrimaryExecutable group of a RunConfig"""
+
+    GROUP_KEY = 'PrimaryExecutable'
+    """Key of the group configuring the SAS executable"""
+
+    FIELDS = (
+        ('product_identifier', 'ProductIdentifier', REQUIRED, None),
+        ('product_version', 'ProductVersion', REQUIRED, None),
+        ('composite_release_id', 'CompositeReleaseID', REQUIRED, None),
+        ('program_path', 'ProgramPath', REQUIRED, None),
+        ('program_options', 'ProgramOptions', REQUIRED, None),
+        ('error_code_base', 'ErrorCodeBase', REQUIRED, None),
+        ('schema_path', 'SchemaPath', REQUIRED, _resolve_package_path),
+        ('iso_template_path', 'IsoTemplatePath', REQUIRED, _resolve_package_path),
+        ('stream_output', 'StreamOutput', False, bool),
+        ('timeout', 'TimeoutSeconds', None, None),
+        ('inactivity_timeout', 'InactivityTimeoutSeconds', None, None),
+        ('kill_grace_period', 'KillGracePeriodSeconds', None, None),
+    )
+    """Fields of the PrimaryExecutable group, describing the SAS program, its products and its timeouts"""
+
+    __slots__ = tuple(field[0] for field in FIELDS)
+
+
+class QAExecutableGroup(RunConfigGroup):
+    """Typed view of the QAExecutable group of a RunConfig"""
+
+    GROUP_KEY = 'QAExecutable'
+    """Key of the group configuring the (optional) QA executable"""
+
+    FIELDS = (
+        ('enabled', 'Enabled', REQUIRED, bool),
+        ('program_path', 'ProgramPath', REQUIRED, None),
+        ('program_options', 'ProgramOptions', REQUIRED, None),
+        ('stream_output', 'StreamOutput', False, bool),
+        ('timeout', 'TimeoutSeconds', None, None),
+        ('inactivity_timeout', 'InactivityTimeoutSeconds', None, None),
+        ('kill_grace_period', 'KillGracePeriodSeconds', None, None),
+    )
+    """Fields of the QAExecutable group, describing the QA program and its timeouts"""
+
+    __slots__ = tuple(field[0] for field in FIELDS)
+
+
+class DebugLevelGroup(RunConfigGroup):
+    """Typed view of the DebugLevelGroup of a RunConfig"""
+
+    GROUP_KEY = 'DebugLevelGroup'
+    """Key of the group of debugging options"""
+
+    FIELDS = (
+        ('debug_switch', 'DebugSwitch', REQUIRED, bool),
+        ('execute_via_shell', 'ExecuteViaShell', False, bool),
+    )
+    """Fields of the DebugLevelGroup, the debug switch and whether programs run through a shell"""
+
+    __slots__ = tuple(field[0] for field in FIELDS)
+
+
+class MetricsGroup(RunConfigGroup):
+    """Typed view of the (optional) MetricsGroup of a RunConfig"""
+
+    GROUP_KEY = 'MetricsGroup'
+    """Key of the group configuring metrics collection"""
+
+    FIELDS = (
+        ('resource_sampling_interval', 'ResourceSamplingInterval', None, None),
+        ('resource_timeline_format', 'ResourceTimelineFormat', None, None),
+        ('exporters', 'Exporters', (), _as_list),
+        ('trace', 'Trace', False, None),
+    )
+    """Fields of the MetricsGroup, configuring resource sampling, metrics exporters and tracing"""
+
+    __slots__ = tuple(field[0] for field in FIELDS)
+
+
+class ChecksumGroup(RunConfigGroup):
+    """Typed view of the (optional) ChecksumGroup of a RunConfig"""
+
+    GROUP_KEY = 'ChecksumGroup'
+    """Key of the group configuring output product checksums"""
+
+    FIELDS = (
+        ('num_workers', 'NumWorkers', None, None),
+        ('chunk_size', 'ChunkSizeBytes', DEFAULT_CHECKSUM_CHUNK_SIZE, None),
+        ('algorithms', 'Algorithms', None, None),
+        ('cache_file', 'CacheFile', None, None),
+    )
+    """Fields of the ChecksumGroup, configuring how output product checksums are computed and cached"""
+
+    __slots__ = tuple(field[0] for field in FIELDS)
+
+
+class LoggingGroup(RunConfigGroup):
+    """Typed view of the (optional) LoggingGroup of a RunConfig"""
+
+    GROUP_KEY = 'LoggingGroup'
+    """Key of the group configuring the PGE log"""
+
+    FIELDS = (
+        ('spill_threshold', 'SpillThresholdBytes', None, None),
+        ('disable_location_capture', 'DisableLocationCapture', (), _as_list),
+        ('json_lines_sidecar', 'JsonLinesSidecar', False, None),
+        ('async_writer', 'AsyncWriter', False, None),
+        ('flush_interval', 'FlushIntervalSeconds', DEFAULT_FLUSH_INTERVAL, None),
+        ('flush_threshold', 'FlushThresholdBytes', DEFAULT_FLUSH_THRESHOLD, None),
+        ('compression', 'Compression', None, None),
+        ('deduplicate_appended_lines', 'DeduplicateAppendedLines', False, None),
+        ('appended_line_rate_limits', 'AppendedLineRateLimits', (), _as_list),
+    )
+    """Fields of the LoggingGroup, configuring how the PGE log is buffered, written and compressed"""
+
+    __slots__ = tuple(field[0] for field in FIELDS)
+
+
+class RunConfigView(RunConfigGroup):
+    """
+    Immutable, typed view of a parsed RunConfig, compiled once when the
+    RunConfig is loaded.
+
+    Each group of the PGE section is available as a RunConfigGroup, while the
+    SAS section, whose layout is defined by the schema of each SAS, remains
+    in its parsed dictionary form.
+
+    """
+
+    FIELDS = (
+        ('name', 'Name', REQUIRED, None),
+    )
+    """Fields of the top-level RunConfig section, the name of the RunConfig"""
+
+    GROUP_CLASSES = (
+        ('pge_name_group', PgeNameGroup),
+        ('input_files_group', InputFilesGroup),
+        ('dynamic_ancillary_files_group', DynamicAncillaryFilesGroup),
+        ('product_path_group', ProductPathGroup),
+        ('primary_executable', PrimaryExecutableGroup),
+        ('qa_executable', QAExecutableGroup),
+        ('debug_level_group', DebugLevelGroup),
+        ('metrics_group', MetricsGroup),
+        ('checksum_group', ChecksumGroup),
+        ('logging_group', LoggingGroup),
+    )
+    """Attribute names and view classes for each group of the PGE section"""
+
+    __slots__ = tuple(field[0] for field in FIELDS) + tuple(group[0] for group in GROUP_CLASSES) + ('sas',)
+
+    def __init__(self, run_config, filename):
+        """
+        Compiles the view of a parsed RunConfig.
+
+        Parameters
+        ----------
+        run_config : dict
+            The parsed RunConfig section of a RunConfig file.
+        filename : str
+            Path to the RunConfig file, used when reporting missing fields.
+
+        """
+        super().__init__(run_config, filename)
+
+        pge_config = run_config['Groups']['PGE']
+
+        for attribute, group_class in self.GROUP_CLASSES:
+            object.__setattr__(self, attribute, group_class(pge_config, filename))
+
+        # SAS section may not always be present, during testing for example
+        object.__setattr__(self, 'sas', run_config['Groups'].get('SAS'))
+
 
 class RunConfig:
     """
@@ -39,29 +376,34 @@ class RunConfig:
     ----------
     _filename : str
         Name of the file parsed to create the RunConfig
+    _document : dict
+        Parsed contents of the provided RunConfig file, as validated
     _run_config : dict
         Parsed contents of the provided RunConfig file
-    _pge_config : dict
-        Short-cut to the PGE-specific section of the parsed RunConfig
-    _sas_config : dict
-        Short-cut to the SAS-specific section of the parsed RunConfig
+    _view : RunConfigView
+        Typed view of the parsed RunConfig, used by the accessor properties
+    _input_inventory : InputInventory
+        Inventory of the input files, created on first use
 
     """
 
     def __init__(self, filename):
         self._filename = filename
 
-        self._run_config = self._parse_run_config_file(filename)
-        self._pge_config = self._run_config['Groups']['PGE']
+        # The RunConfig is parsed once, and the parsed document is reused for validation
+        self._document = self._parse_run_config_file(filename)
+        self._run_config = self._document['RunConfig']
+        self._view = RunConfigView(self._run_config, filename)
 
-        # SAS section may not always be present, during testing for example
-        self._sas_config = self._run_config['Groups'].get('SAS')
+        # Inventory of the input files, scanned once on first use
+        self._input_inventory = None
 
     @staticmethod
     def _parse_run_config_file(yaml_filename):
         """
-        Loads a run configuration YAML file.
-        Returns the loaded data as a Python object.
+        Loads a run configuration YAML file, using the libyaml-based loader
+        when available.
+        Returns the loaded document as a Python object.
 
         Parameters
         ----------
@@ -76,14 +418,14 @@ class RunConfig:
 
         """
         with open(yaml_filename, 'r', encoding='utf-8') as stream:
-            dictionary = yaml.safe_load(stream)
+            dictionary = yaml.load(stream, Loader=SafeLoader)
 
-        try:
-            return dictionary['RunConfig']
-        except KeyError as key_error:
+        if not isinstance(dictionary, dict) or 'RunConfig' not in dictionary:
             raise RuntimeError(
                 f'Unable to parse {yaml_filename}, expected top-level RunConfig entry'
-            ) from key_error
+            )
+
+        return dictionary
 
     def validate(self, pge_schema_file=BASE_PGE_SCHEMA, strict_mode=True):
         """
@@ -104,15 +446,19 @@ class RunConfig:
         Raises
         ------
         RuntimeError
-            If the SAS schema defined by the parsed RunConfig cannot be located.
+            If the SAS schema defined by the parsed RunConfig cannot be located,
+            or an unsupported checksum algorithm, log compression format or
+            unknown error code name is requested.
         YamaleError
             If the RunConfig does not validate against the combined PGE/SAS
             schema.
 
         """
         # Load the schema for the PGE portion of the RunConfig, which should
-        # be fixed across all PGE-SAS combinations
-        pge_schema = yamale.make_schema(pge_schema_file)
+        # be fixed across all PGE-SAS combinations. Compiled schemas are cached,
+        # so are only compiled once per process (or node, if an on-disk cache
+        # is configured).
+        pge_schema = get_schema(pge_schema_file)
 
         # If there was a SAS section included with the parsed config, pull
         # in its schema before validating. Otherwise, only the base PGE schema
@@ -122,176 +468,317 @@ class RunConfig:
             sas_schema_filepath = self.sas_schema_path
 
             if isfile(sas_schema_filepath):
-                sas_schema = yamale.make_schema(sas_schema_filepath)
+                sas_schema = get_schema(sas_schema_filepath)
 
-                # Link the SAS schema to the PGE as an "include"
+                # Link the SAS schema to (a copy of) the cached PGE schema as an "include"
                 # Note that the key name "sas_configuration" must match the include statement
                 # reference in the base PGE schema.
-                pge_schema.includes['sas_configuration'] = sas_schema
+                pge_schema = link_schema_includes(pge_schema, {'sas_configuration': sas_schema})
             else:
                 raise RuntimeError(
                     f'Can not validate RunConfig {self.name}, as the associated SAS '
                     f'schema ({sas_schema_filepath}) cannot be located.'
                 )
 
-        # Yamale expects its own formatting of the parsed config, hence the need
-        # to call "make_data()" here.
-        runconfig_data = yamale.make_data(self.filename)
+        # Yamale expects a list of (document, name) pairs, which is built from
+        # the already parsed RunConfig, rather than re-reading the file
+        runconfig_data = [(self._document, self.filename)]
 
         # Finally, validate the RunConfig against the combined PGE/SAS schema
         yamale.validate(pge_schema, runconfig_data, strict=strict_mode)
 
-    def __getattribute__(self, item):
-        """
-        Wrapper function for all attribute access attempts on instances of
-        RunConfig. Used to provide consistent error handling for when an
-        expected file is missing from a RunConfig.
-
-        Parameters
-        ----------
-        item : str
-            Name of the attribute to be accessed.
+        # Ensure any requested checksum algorithms and log compression format
+        # are available, since these depend on which optional libraries are
+        # installed
+        try:
+            validate_checksum_algorithms(self.checksum_algorithms or [])
 
-        Returns
-        -------
-        attribute : object
-            The accessed attribute.
+            if self.log_compression is not None:
+                validate_log_compression(self.log_compression)
+        except ValueError as err:
+            raise RuntimeError(f'Can not validate RunConfig {self.name}: {str(err)}') from err
 
-        Raises
-        ------
-        RuntimeError
-            If the attribute requests fails (from missing field in RunConfig).
+        unknown_error_codes = [name for name in self.log_location_capture_disabled
+                               if name not in ErrorCode.__members__]
 
-        """
-        try:
-            return object.__getattribute__(self, item)
-        except KeyError as error:
-            # TODO: create exceptions package with more intuitive exception class names
+        if unknown_error_codes:
             raise RuntimeError(
-                f'Expected field {str(error)} is missing from RunConfig '
-                f'{abspath(self.filename)}'
-            ) from error
+                f'Can not validate RunConfig {self.name}, unknown error code name(s) '
+                f'{unknown_error_codes} provided for DisableLocationCapture'
+            )
 
     @property
     def filename(self) -> str:
         """Returns the of the file parsed to create the RunConfig"""
         return self._filename
 
+    @property
+    def view(self) -> RunConfigView:
+        """Returns the typed view of the parsed RunConfig"""
+        return self._view
+
     @property
     def name(self) -> str:
         """Returns the name of the RunConfig file"""
-        return self._run_config['Name']
+        return self._view.name
 
     # PGENameGroup
     @property
     def pge_name(self) -> str:
         """Returns the PGE Name from the PGE Name Group"""
-        return self._pge_config['PGENameGroup']['PGEName']
+        return self._view.pge_name_group.pge_name
 
     # InputFilesGroup
     @property
     def input_files(self) -> list:
         """Returns the path from the Input Files Group"""
-        return self._pge_config['InputFilesGroup']['InputFilePaths']
+        return self._view.input_files_group.input_file_paths
+
+    @property
+    def input_recursive(self) -> bool:
+        """Returns True if files within subdirectories of input directories should be included"""
+        return self._view.input_files_group.recursive
+
+    @property
+    def input_include_patterns(self) -> list:
+        """Returns the file name patterns files within input directories must match to be included"""
+        return self._view.input_files_group.include_patterns
+
+    @property
+    def input_exclude_patterns(self) -> list:
+        """Returns the file name patterns excluding files within input directories"""
+        return self._view.input_files_group.exclude_patterns
+
+    @property
+    def input_inventory(self) -> InputInventory:
+        """Returns the inventory of the input files, shared by all steps which enumerate the inputs"""
+        if self._input_inventory is None:
+            self._input_inventory = InputInventory(
+                self.input_files,
+                recursive=self.input_recursive,
+                include_patterns=self.input_include_patterns,
+                exclude_patterns=self.input_exclude_patterns
+            )
+
+        return self._input_inventory
 
     # DynamicAncillaryFilesGroup
     @property
     def ancillary_file_map(self) -> dict:
         """Returns the Ancillary File Map from the Dynamic Ancillary Files Group"""
-        return self._pge_config['DynamicAncillaryFilesGroup']['AncillaryFileMap']
+        return self._view.dynamic_ancillary_files_group.ancillary_file_map
 
     # ProductPathGroup
     @property
     def output_product_path(self) -> str:
         """Returns the Output Product Path from the Product Path Group"""
-        return self._pge_config['ProductPathGroup']['OutputProductPath']
+        return self._view.product_path_group.output_product_path
 
     @property
     def scratch_path(self) -> str:
         """Returns the Scratch Path from the Product Path Group"""
-        return self._pge_config['ProductPathGroup']['ScratchPath']
+        return self._view.product_path_group.scratch_path
 
     # PrimaryExecutable
     @property
     def product_identifier(self) -> str:
         """Returns the Product Identifier from the Primary Executable Category"""
-        return self._pge_config['PrimaryExecutable']['ProductIdentifier']
+        return self._view.primary_executable.product_identifier
 
     @property
     def product_version(self) -> str:
         """Returns the Product Version from the Primary Executable Category"""
-        return self._pge_config['PrimaryExecutable']['ProductVersion']
+        return self._view.primary_executable.product_version
 
     @property
     def composite_release_id(self) -> str:
         """Returns the Composite Release ID (CRID) from the Primary Executable Category"""
-        return self._pge_config['PrimaryExecutable']['CompositeReleaseID']
+        return self._view.primary_executable.composite_release_id
 
     @property
     def sas_program_path(self) -> str:
         """Returns the Program Path from a Primary Executable Category"""
-        return self._pge_config['PrimaryExecutable']['ProgramPath']
+        return self._view.primary_executable.program_path
 
     @property
     def sas_program_options(self) -> str:
         """Returns the Program Options (arguments) to a Primary Executable"""
-        return self._pge_config['PrimaryExecutable']['ProgramOptions']
+        return self._view.primary_executable.program_options
 
     @property
     def error_code_base(self) -> int:
         """Returns the Error Code Base for a particular Primary Executable"""
-        return self._pge_config['PrimaryExecutable']['ErrorCodeBase']
+        return self._view.primary_executable.error_code_base
 
     @property
     def sas_schema_path(self) -> str:
         """Returns the path to the Schema file for a Primary Executable"""
-        sas_schema_path = self._pge_config['PrimaryExecutable']['SchemaPath']
-        return (
-            sas_schema_path
-            if isabs(sas_schema_path)
-            else resource_filename('opera', sas_schema_path)
-        )
+        return self._view.primary_executable.schema_path
 
     @property
     def iso_template_path(self) -> str:
         """Returns the ISO Template Path for a Primary Executable"""
-        iso_template_path = self._pge_config['PrimaryExecutable']['IsoTemplatePath']
-        return (
-            iso_template_path
-            if isabs(iso_template_path)
-            else resource_filename('opera', iso_template_path)
-        )
+        return self._view.primary_executable.iso_template_path
+
+    @property
+    def sas_stream_output(self) -> bool:
+        """Returns a boolean indicating if output from the Primary Executable should be streamed to the log"""
+        return self._view.primary_executable.stream_output
+
+    @property
+    def sas_timeout(self) -> Optional[float]:
+        """Returns the wall-clock limit, in seconds, for the Primary Executable, or None if not set"""
+        return self._view.primary_executable.timeout
+
+    @property
+    def sas_inactivity_timeout(self) -> Optional[float]:
+        """Returns the no-output limit, in seconds, for the Primary Executable, or None if not set"""
+        return self._view.primary_executable.inactivity_timeout
+
+    @property
+    def sas_kill_grace_period(self) -> Optional[float]:
+        """Returns the SIGTERM to SIGKILL grace period, in seconds, for the Primary Executable, or None if not set"""
+        return self._view.primary_executable.kill_grace_period
 
     # QAExecutable
     @property
     def qa_enabled(self) -> bool:
         """Returns a boolean indicating the state of QAExecutable: enabled/disabled"""
-        return bool(self._pge_config['QAExecutable']['Enabled'])
+        return self._view.qa_executable.enabled
 
     @property
     def qa_program_path(self) -> str:
         """Return the path to a QA Executable"""
-        return self._pge_config['QAExecutable']['ProgramPath']
+        return self._view.qa_executable.program_path
 
     @property
     def qa_program_options(self) -> str:
         """Return program options (arguments) for an executable command"""
-        return self._pge_config['QAExecutable']['ProgramOptions']
+        return self._view.qa_executable.program_options
+
+    @property
+    def qa_stream_output(self) -> bool:
+        """Returns a boolean indicating if output from the QA Executable should be streamed to the log"""
+        return self._view.qa_executable.stream_output
+
+    @property
+    def qa_timeout(self) -> Optional[float]:
+        """Returns the wall-clock limit, in seconds, for the QA Executable, or None if not set"""
+        return self._view.qa_executable.timeout
+
+    @property
+    def qa_inactivity_timeout(self) -> Optional[float]:
+        """Returns the no-output limit, in seconds, for the QA Executable, or None if not set"""
+        return self._view.qa_executable.inactivity_timeout
+
+    @property
+    def qa_kill_grace_period(self) -> Optional[float]:
+        """Returns the SIGTERM to SIGKILL grace period, in seconds, for the QA Executable, or None if not set"""
+        return self._view.qa_executable.kill_grace_period
 
     @property
     def debug_switch(self) -> bool:
         """Returns a boolean indicating the debugging state: enabled/disabled."""
-        return bool(self._pge_config['DebugLevelGroup']['DebugSwitch'])
+        return self._view.debug_level_group.debug_switch
 
     @property
     def execute_via_shell(self) -> bool:
         """Returns a boolean indicating the state of ExecuteViaShell: enabled/disabled"""
-        return bool(self._pge_config['DebugLevelGroup'].get('ExecuteViaShell', False))
+        return self._view.debug_level_group.execute_via_shell
+
+    # MetricsGroup
+    @property
+    def resource_sampling_interval(self) -> Optional[float]:
+        """Returns the SAS/QA process tree sampling interval in seconds, or None if sampling is disabled"""
+        return self._view.metrics_group.resource_sampling_interval
+
+    @property
+    def resource_timeline_format(self) -> Optional[str]:
+        """Returns the format (csv or json) to write resource timelines in, or None if not requested"""
+        return self._view.metrics_group.resource_timeline_format
+
+    @property
+    def metrics_exporters(self) -> list:
+        """Returns the formats (json and/or prometheus) to export job metrics in at job end"""
+        return self._view.metrics_group.exporters
+
+    @property
+    def trace_enabled(self) -> bool:
+        """Returns True if a trace of the PGE stages should be logged and exported at job end"""
+        return self._view.metrics_group.trace
+
+    # ChecksumGroup
+    @property
+    def checksum_num_workers(self) -> Optional[int]:
+        """Returns the number of output products to checksum concurrently, or None to use the default"""
+        return self._view.checksum_group.num_workers
+
+    @property
+    def checksum_chunk_size(self) -> int:
+        """Returns the number of bytes read per checksum digest update"""
+        return self._view.checksum_group.chunk_size
+
+    @property
+    def checksum_algorithms(self) -> Optional[list]:
+        """Returns the checksum algorithms to compute for each output product, or None for MD5 only"""
+        return self._view.checksum_group.algorithms
+
+    @property
+    def checksum_cache_file(self) -> Optional[str]:
+        """Returns the path to the persistent checksum cache, or None if caching is disabled"""
+        return self._view.checksum_group.cache_file
+
+    # LoggingGroup
+    @property
+    def log_spill_threshold(self) -> Optional[int]:
+        """Returns the in-memory log size past which logs are spilled to disk, or None to keep logs in memory"""
+        return self._view.logging_group.spill_threshold
+
+    @property
+    def log_location_capture_disabled(self) -> list:
+        """Returns the names of the error codes to log without call-site locations"""
+        return self._view.logging_group.disable_location_capture
+
+    @property
+    def log_sidecar_enabled(self) -> bool:
+        """Returns True if JSON-lines sidecars should be written alongside the PGE and QA logs"""
+        return self._view.logging_group.json_lines_sidecar
+
+    @property
+    def log_async_writer_enabled(self) -> bool:
+        """Returns True if the PGE and QA logs should be written to disk by background threads as they are logged"""
+        return self._view.logging_group.async_writer
+
+    @property
+    def log_flush_interval(self) -> float:
+        """Returns the maximum number of seconds between fsyncs of asynchronously written logs"""
+        return self._view.logging_group.flush_interval
+
+    @property
+    def log_flush_threshold(self) -> int:
+        """Returns the unsynced size past which asynchronously written logs are fsync'd"""
+        return self._view.logging_group.flush_threshold
+
+    @property
+    def log_compression(self) -> Optional[str]:
+        """Returns the format to compress the finalized PGE and QA logs with, or None to leave them uncompressed"""
+        return self._view.logging_group.compression
+
+    @property
+    def log_deduplication_enabled(self) -> bool:
+        """Returns True if runs of identical SAS/QA lines appended to the logs should be collapsed"""
+        return self._view.logging_group.deduplicate_appended_lines
+
+    @property
+    def log_rate_limits(self) -> list:
+        """Returns the (pattern, maximum lines) limits on the SAS/QA lines appended to the logs"""
+        return [(rate_limit['Pattern'], rate_limit['MaxLines'])
+                for rate_limit in self._view.logging_group.appended_line_rate_limits]
 
     @property
     def sas_config(self) -> dict:
         """Returns the short-cut to the SAS-specific section of the parsed RunConfig"""
-        return self._sas_config
+        return self._view.sas
 
     def asdict(self) -> dict:
         """Returns the entire parsed RunConfig in its dictonary representation"""
@@ -305,7 +792,11 @@ class RunConfig:
         Files in the list are immediately included in the returned list.
 
         Directories in the list will be examined and any files found will be
-        added to the list.
+        added to the list, subject to the recursion and file name patterns
+        configured by the Input Files Group.
+
+        The input locations are only scanned on the first call, via the
+        inventory returned by input_inventory.
 
         Returns
         -------
@@ -313,35 +804,8 @@ class RunConfig:
             The expanded list of input files determined from the RunConfig
             setting. The list is sorted prior to being returned.
 
-        Raises
-        ------
-        OSError
-            If anything that is not a file or directory is encountered while
-            traversing the set of input file locations.
-
         """
-        preliminary_file_list = self.input_files
-
-        input_files = []
-
-        def __is_input_file(filename):
-            """Helper function for filtering out directories and hidden files"""
-            return isfile(filename) and not basename(filename).startswith('.')
-
-        for item in preliminary_file_list:
-            if __is_input_file(item):
-                input_files.append(item)
-            elif isdir(item):
-                for dir_item in os.listdir(item):
-                    path = join(item, dir_item)
-
-                    # for now only look for files at first level
-                    if __is_input_file(path):
-                        input_files.append(path)
-
-        input_files.sort()
-
-        return input_files
+        return self.input_inventory.filenames()
 
     def get_ancillary_filenames(self):
         """
@@ -369,17 +833,10 @@ class RunConfig:
         within the designated "scratch" path (if it happens to be defined within
         the output product directory).
 
-        """
-        output_product_path = abspath(self.output_product_path)
-        scratch_path = abspath(self.scratch_path)
-
-        output_products = []
-
-        for dirpath, dirnames, filenames in os.walk(output_product_path, topdown=False):
-            for filename in filter(lambda name: not name.startswith('.'), filenames):
-                product_path = os.path.join(dirpath, filename)
+        Each call rescans the output location. PGEs should prefer their cached
+        ProductInventory of the output location.
 
-                if scratch_path not in product_path:
-                    output_products.append(product_path)
+        """
+        product_inventory = ProductInventory(self.output_product_path, exclude_paths=[self.scratch_path])
 
-        return sorted(output_products)
+        return product_inventory.filenames()
@@ -14,7 +14,7 @@ import json
 import os.path
 import re
 from datetime import datetime
-from os.path import exists, getsize, splitext
+from os.path import exists, splitext
 
 from opera.pge.base.base_pge import PgeExecutor
 from opera.pge.base.base_pge import PostProcessorMixin
@@ -86,8 +86,8 @@ class CslcS1PostProcessorMixin(PostProcessorMixin):
 
         output_products = list(
             filter(
-                lambda filename: burst_id in filename,
-                self.runconfig.get_output_product_filenames()
+                lambda product: burst_id in product.path,
+                self._get_product_inventory().entries()
             )
         )
 
@@ -97,8 +97,8 @@ class CslcS1PostProcessorMixin(PostProcessorMixin):
             self.logger.critical(self.name, ErrorCode.OUTPUT_NOT_FOUND, error_msg)
 
         for output_product in output_products:
-            if not getsize(output_product):
-                error_msg = f"SAS output file {output_product} was created, but is empty"
+            if not output_product.size:
+                error_msg = f"SAS output file {output_product.path} was created, but is empty"
 
                 self.logger.critical(self.name, ErrorCode.INVALID_OUTPUT, error_msg)
 
@@ -342,9 +342,10 @@ class CslcS1PostProcessorMixin(PostProcessorMixin):
 
         The log file name for the CSLC-S1 PGE consists of:
 
-            <Ancillary filename>.log
+            <Ancillary filename>.log[<Compression suffix>]
 
         Where <Ancillary filename> is returned by CslcS1PostProcessorMixin._ancillary_filename()
+        and <Compression suffix> by PostProcessorMixin._log_compression_suffix()
 
         Returns
         -------
@@ -352,7 +353,7 @@ class CslcS1PostProcessorMixin(PostProcessorMixin):
             The file name to assign to the PGE/SAS log created by this PGE.
 
         """
-        return self._ancillary_filename() + ".log"
+        return self._ancillary_filename() + ".log" + self._log_compression_suffix()
 
     def _qa_log_filename(self):
         """
@@ -361,9 +362,10 @@ class CslcS1PostProcessorMixin(PostProcessorMixin):
 
         The log file name for the CSLC-S1 PGE consists of:
 
-            <Ancillary filename>.qa.log
+            <Ancillary filename>.qa.log[<Compression suffix>]
 
         Where <Ancillary filename> is returned by CslcS1PostProcessorMixin._ancillary_filename()
+        and <Compression suffix> by PostProcessorMixin._log_compression_suffix()
 
         Returns
         -------
@@ -371,7 +373,7 @@ class CslcS1PostProcessorMixin(PostProcessorMixin):
             The file name to assign to the QA log created by this PGE.
 
         """
-        return self._ancillary_filename() + ".qa.log"
+        return self._ancillary_filename() + ".qa.log" + self._log_compression_suffix()
 
     def _collect_cslc_product_metadata(self):
         """
@@ -388,11 +390,11 @@ class CslcS1PostProcessorMixin(PostProcessorMixin):
         """
         # Gather the output products produced by the SAS to locate the JSON file
         # containing the product metadata
-        output_products = self.runconfig.get_output_product_filenames()
+        output_products = self._get_product_inventory().by_extension('.json')
         json_metadata_product = None
 
         for output_product in output_products:
-            if output_product.endswith('.json') and not output_product.endswith('.catalog.json'):
+            if not output_product.endswith('.catalog.json'):
                 json_metadata_product = output_product
                 break
         else:
@@ -540,6 +542,11 @@ class CslcS1Executor(CslcS1PreProcessorMixin, CslcS1PostProcessorMixin, PgeExecu
     SAS_VERSION = "0.1.2"  # https://github.com/opera-adt/COMPASS/releases/tag/v0.1.2
     """Version of the SAS wrapped by this PGE, should be updated as needed"""
 
+    TRACED_STEPS = PgeExecutor.TRACED_STEPS + [
+        '_validate_output', '_collect_cslc_product_metadata'
+    ]
+    """Names of the steps recorded as spans of the stage trace, including those specific to the CSLC-S1 PGE"""
+
     def __init__(self, pge_name, runconfig_path, **kwargs):
         super().__init__(pge_name, runconfig_path, **kwargs)
 
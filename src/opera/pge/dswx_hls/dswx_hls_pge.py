@@ -14,7 +14,7 @@ import glob
 import os.path
 import re
 from collections import OrderedDict
-from os.path import abspath, basename, exists, isdir, join, splitext
+from os.path import abspath, basename, join, splitext
 
 from opera.pge.base.base_pge import PgeExecutor
 from opera.pge.base.base_pge import PostProcessorMixin
@@ -54,15 +54,17 @@ class DSWxHLSPreProcessorMixin(PreProcessorMixin):
         at least one .tif file resides within the directory. For files,
         each file is checked for existence and that it has a .tif extension.
         """
+        input_inventory = self.runconfig.input_inventory
+
         for input_file in self.runconfig.input_files:
             input_file_path = abspath(input_file)
 
-            if not exists(input_file_path):
+            if not input_inventory.exists(input_file):
                 error_msg = f"Could not locate specified input file/directory {input_file_path}"
 
                 self.logger.critical(self.name, ErrorCode.INPUT_NOT_FOUND, error_msg)
-            elif isdir(input_file_path):
-                list_of_input_tifs = glob.glob(join(input_file_path, '*.tif*'))
+            elif input_inventory.isdir(input_file):
+                list_of_input_tifs = input_inventory.files_in(input_file, '*.tif*')
 
                 if len(list_of_input_tifs) <= 0:
                     error_msg = f"Input directory {input_file_path} does not contain any tif files"
@@ -88,14 +90,16 @@ class DSWxHLSPreProcessorMixin(PreProcessorMixin):
             'Scanning DSWx input datasets for invalid platforms.'
         )
 
-        # Get a list of input files to check for invalid platform metadata
+        # Get a list of input files to check for invalid platform metadata,
+        # reusing the scan of the input directories made by _validate_inputs()
+        input_inventory = self.runconfig.input_inventory
         list_of_input_tifs = []
+
         for input_file in self.runconfig.input_files:
-            input_file_path = abspath(input_file)
-            if isdir(input_file_path):
-                list_of_input_tifs = glob.glob(join(input_file_path, '*.tif*'))
+            if input_inventory.isdir(input_file):
+                list_of_input_tifs.extend(map(abspath, input_inventory.files_in(input_file, '*.tif*')))
             else:
-                list_of_input_tifs.append(input_file_path)
+                list_of_input_tifs.append(abspath(input_file))
 
         for input_tif in list_of_input_tifs:
 
@@ -164,8 +168,8 @@ class DSWxHLSPostProcessorMixin(PostProcessorMixin):
 
         output_products = list(
             filter(
-                lambda filename: product_id in filename,
-                self.runconfig.get_output_product_filenames()
+                lambda product: product_id in product.path,
+                self._get_product_inventory().entries()
             )
         )
 
@@ -176,8 +180,8 @@ class DSWxHLSPostProcessorMixin(PostProcessorMixin):
             self.logger.critical(self.name, ErrorCode.OUTPUT_NOT_FOUND, error_msg)
 
         for output_product in output_products:
-            if not os.path.getsize(output_product):
-                error_msg = f"SAS output file {output_product} was created, but is empty"
+            if not output_product.size:
+                error_msg = f"SAS output file {output_product.path} was created, but is empty"
 
                 self.logger.critical(self.name, ErrorCode.INVALID_OUTPUT, error_msg)
 
@@ -194,11 +198,9 @@ class DSWxHLSPostProcessorMixin(PostProcessorMixin):
             'Scanning DSWx output products for Landsat-9 metadata correction'
         )
 
-        # Get the list of output products and filter for the images
-        output_products = self.runconfig.get_output_product_filenames()
-
-        # Filter to only images (.tif or .tiff)
-        output_images = filter(lambda product: 'tif' in splitext(product)[-1], output_products)
+        # Get the list of output images (.tif or .tiff) from the output products
+        product_inventory = self._get_product_inventory()
+        output_images = product_inventory.by_extension('.tif', '.tiff')
 
         for output_image in output_images:
             sensor_product_id = get_geotiff_sensor_product_id(output_image)
@@ -219,6 +221,9 @@ class DSWxHLSPostProcessorMixin(PostProcessorMixin):
                     SPACECRAFT_NAME="Landsat-9"
                 )
 
+                # The product is rewritten in place, so record its new size and modification time
+                product_inventory.update(output_image)
+
     def _core_filename(self, inter_filename=None):
         """
         Returns the core file name component for products produced by the
@@ -386,12 +391,11 @@ class DSWxHLSPostProcessorMixin(PostProcessorMixin):
         """
         # Find a single representative output DSWx-HLS product, they should all
         # have identical sets of metadata
-        output_products = self.runconfig.get_output_product_filenames()
+        output_products = self._get_product_inventory().by_extension('.tiff')
         representative_product = None
 
         for output_product in output_products:
-            if (basename(output_product) in self.renamed_files.values() and
-                    basename(output_product).endswith("tiff")):
+            if basename(output_product) in self.renamed_files.values():
                 representative_product = output_product
                 break
         else:
@@ -571,6 +575,12 @@ class DSWxHLSExecutor(DSWxHLSPreProcessorMixin, DSWxHLSPostProcessorMixin, PgeEx
     SAS_VERSION = "0.5"  # CalVal release 3.1 https://github.com/nasa/PROTEUS/releases/tag/v0.5
     """Version of the SAS wrapped by this PGE, should be updated as needed with new SAS deliveries"""
 
+    TRACED_STEPS = PgeExecutor.TRACED_STEPS + [
+        '_validate_inputs', '_validate_expected_input_platforms', '_validate_output',
+        '_correct_landsat_9_products', '_collect_dswx_product_metadata'
+    ]
+    """Names of the steps recorded as spans of the stage trace, including those specific to the DSWx-HLS PGE"""
+
     def __init__(self, pge_name, runconfig_path, **kwargs):
         super().__init__(pge_name, runconfig_path, **kwargs)
 
@@ -305,9 +305,10 @@ class RtcS1PostProcessorMixin(PostProcessorMixin):
 
         The log file name for the RTC-S1 PGE consists of:
 
-            <Ancillary filename>.log
+            <Ancillary filename>.log[<Compression suffix>]
 
         Where <Ancillary filename> is returned by RtcS1PostProcessorMixin._ancillary_filename()
+        and <Compression suffix> by PostProcessorMixin._log_compression_suffix()
 
         Returns
         -------
@@ -315,7 +316,7 @@ class RtcS1PostProcessorMixin(PostProcessorMixin):
             The file name to assign to the PGE/SAS log created by this PGE.
 
         """
-        return self._ancillary_filename() + ".log"
+        return self._ancillary_filename() + ".log" + self._log_compression_suffix()
 
     def _qa_log_filename(self):
         """
@@ -324,9 +325,10 @@ class RtcS1PostProcessorMixin(PostProcessorMixin):
 
         The log file name for the RTC-S1 PGE consists of:
 
-            <Ancillary filename>.qa.log
+            <Ancillary filename>.qa.log[<Compression suffix>]
 
         Where <Ancillary filename> is returned by RtcS1PostProcessorMixin._ancillary_filename()
+        and <Compression suffix> by PostProcessorMixin._log_compression_suffix()
 
         Returns
         -------
@@ -334,7 +336,7 @@ class RtcS1PostProcessorMixin(PostProcessorMixin):
             The file name to assign to the QA log created by this PGE.
 
         """
-        return self._ancillary_filename() + ".qa.log"
+        return self._ancillary_filename() + ".qa.log" + self._log_compression_suffix()
 
     def _collect_rtc_product_metadata(self):
         """
@@ -349,15 +351,11 @@ class RtcS1PostProcessorMixin(PostProcessorMixin):
             use with the ISO metadata Jinja2 template.
 
         """
-        output_products = self.runconfig.get_output_product_filenames()
-
         # TODO: will need to support GeoTIFF/COG for later versions of SAS
-        nc_product = None
+        nc_products = self._get_product_inventory().by_extension('.nc')
 
-        for output_product in output_products:
-            if output_product.endswith('.nc'):
-                nc_product = output_product
-                break
+        if nc_products:
+            nc_product = nc_products[0]
         else:
             msg = (f"Could not find a NetCDF format RTC product to extract "
                    f"metadata from within {self.runconfig.output_product_path}")
@@ -504,6 +502,11 @@ class RtcS1Executor(RtcS1PreProcessorMixin, RtcS1PostProcessorMixin, PgeExecutor
 
     SOURCE = "S1"
 
+    TRACED_STEPS = PgeExecutor.TRACED_STEPS + [
+        '_validate_output', '_collect_rtc_product_metadata'
+    ]
+    """Names of the steps recorded as spans of the stage trace, including those specific to the RTC-S1 PGE"""
+
     def __init__(self, pge_name, runconfig_path, **kwargs):
         super().__init__(pge_name, runconfig_path, **kwargs)
 
@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+
+"""
+================
+log_analytics.py
+================
+
+Aggregates statistics over a fleet of OPERA PGE logs.
+
+Logs (and any JSON-lines sidecars written alongside them) are parsed in a pool
+of worker processes, and reduced to per-PGE statistics: percentiles of the
+logged metrics, counts of each logged error code, and failure rates by PGE and
+SAS version. A job is considered to have failed if its log contains any
+message of Critical severity.
+
+Log sources may be any combination of directories (searched recursively),
+glob patterns or explicit log paths. Compressed logs are read transparently.
+
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from os.path import isdir, isfile, join
+
+try:
+    import zstandard
+except (ImportError, ModuleNotFoundError):  # pragma: no cover
+    zstandard = None
+
+from opera.util.error_codes import ErrorCode
+from opera.util.log_sidecar import get_sidecar_filename
+from opera.util.log_sidecar import iter_sidecar_records
+from opera.util.log_streams import LOG_COMPRESSION_SUFFIXES
+from opera.util.log_streams import open_log_file
+from opera.util.logger import split_log_line
+
+LOG_FILE_SUFFIXES = ('.log',) + tuple(f'.log{suffix}' for suffix in LOG_COMPRESSION_SUFFIXES.values())
+"""File extensions recognized as logs when scanning directories"""
+
+DEFAULT_METRIC_PATTERNS = ('sas.elapsed_seconds', 'overall.os.max_rss_kb.*', 'overall.elapsed_seconds')
+"""Unix-style patterns of the names of the metrics to compute percentiles for by default"""
+
+DEFAULT_PERCENTILES = (50, 95, 99)
+"""Percentiles computed for each metric by default"""
+
+DEFAULT_CHUNK_SIZE = 32
+"""Number of logs handed to a worker process at a time"""
+
+UNKNOWN = 'unknown'
+"""Placeholder for a PGE name or version which could not be determined from a log"""
+
+_ERROR_CODE_OFFSET_MODULUS = 10000
+"""Logged error codes modulo this value give the ErrorCode offset, as with get_severity_from_error_code()"""
+
+_LOG_READ_ERRORS = (OSError, EOFError, ValueError, KeyError)
+"""Errors raised reading an unreadable (corrupt, truncated or non UTF-8) log, which are reported per log"""
+
+if zstandard is not None:
+    # Corrupt zstd-compressed logs raise ZstdError, which derives directly from Exception
+    _LOG_READ_ERRORS += (zstandard.ZstdError,)
+
+
+def collect_log_files(sources):
+    """
+    Expands the provided set of log sources into the list of logs to analyze.
+
+    Parameters
+    ----------
+    sources : Iterable[str]
+        The log sources to expand. Each source may be a directory (searched
+        recursively for files with any of the LOG_FILE_SUFFIXES), a glob
+        pattern, or a log file.
+
+    Returns
+    -------
+    log_files : list[str]
+        Paths to the logs to analyze, in the order they were provided, with
+        any duplicates removed. Hidden files (such as partially compressed
+        logs) are never included.
+
+    Raises
+    ------
+    FileNotFoundError
+        If a source does not refer to any existing file or directory.
+
+    """
+    log_files = []
+
+    for source in sources:
+        if isdir(source):
+            for dirpath, dirnames, filenames in os.walk(source):
+                dirnames.sort()
+
+                log_files.extend(
+                    join(dirpath, filename) for filename in sorted(filenames)
+                    if filename.endswith(LOG_FILE_SUFFIXES) and not filename.startswith('.')
+                )
+        elif isfile(source):
+            log_files.append(source)
+        elif glob.has_magic(source):
+            log_files.extend(sorted(glob.glob(source, recursive=True)))
+        else:
+            raise FileNotFoundError(f"Could not find log source: {source}")
+
+    # Remove any duplicates while maintaining order
+    return list(dict.fromkeys(log_files))
+
+
+def _sidecar_filename(log_filename):
+    """Returns the name of the sidecar written alongside a (possibly compressed) log"""
+    for suffix in LOG_COMPRESSION_SUFFIXES.values():
+        if log_filename.endswith(suffix):
+            log_filename = log_filename[:-len(suffix)]
+            break
+
+    return get_sidecar_filename(log_filename)
+
+
+def _iter_log_messages(log_filename):
+    """
+    Yields the severity, workflow, module, error code and description of each
+    formatted message within a log, skipping any lines which do not conform
+    to the OPERA log formatting style.
+    """
+    with open_log_file(log_filename) as infile:
+        for line in infile:
+            try:
+                _, severity, workflow, module, error_code, _, description = split_log_line(line)
+                error_code = int(error_code)
+            except ValueError:
+                continue
+
+            yield severity, workflow, module, error_code, description.strip('"')
+
+
+def _iter_sidecar_messages(sidecar_filename):
+    """
+    Yields the severity, workflow, module, error code and description of each
+    message record within a log sidecar.
+    """
+    for record in iter_sidecar_records(sidecar_filename):
+        if 'raw' not in record:
+            yield (record['severity'], record['workflow'], record['module'],
+                   record['error_code'], record['description'])
+
+
+def get_error_code_name(error_code):
+    """
+    Returns the name of the ErrorCode corresponding to a logged error code,
+    or the string form of the code if it does not correspond to one.
+    """
+    try:
+        return ErrorCode(error_code % _ERROR_CODE_OFFSET_MODULUS).name
+    except ValueError:
+        return str(error_code)
+
+
+def summarize_log(log_filename, use_sidecar=True):
+    """
+    Reduces a single log to the details needed for fleet-wide statistics.
+
+    Parameters
+    ----------
+    log_filename : str
+        Path to the log to summarize.
+    use_sidecar : bool, optional
+        If True (the default), and a JSON-lines sidecar was written alongside
+        the log, the pre-parsed messages of the sidecar are read instead of
+        the log itself.
+
+    Returns
+    -------
+    log_summary : dict
+        Summary of the log, with the name and versions of the PGE which wrote
+        it, whether the job failed, the numeric metrics logged (by name), and
+        the number of messages logged with each error code (by ErrorCode
+        name). If the log could not be read, only the "log_file" and "error"
+        entries are populated.
+
+    """
+    log_summary = {
+        'log_file': log_filename,
+        'pge': None,
+        'pge_version': UNKNOWN,
+        'sas_version': UNKNOWN,
+        'failed': False,
+        'metrics': {},
+        'error_codes': {},
+        'error': None
+    }
+
+    sidecar_filename = _sidecar_filename(log_filename)
+
+    if use_sidecar and isfile(sidecar_filename):
+        messages = _iter_sidecar_messages(sidecar_filename)
+    else:
+        messages = _iter_log_messages(log_filename)
+
+    metrics = log_summary['metrics']
+    error_codes = log_summary['error_codes']
+    first_workflow = None
+
+    try:
+        for severity, workflow, module, error_code, description in messages:
+            if first_workflow is None:
+                first_workflow = workflow
+
+            if severity == 'Critical':
+                log_summary['failed'] = True
+
+            error_code_name = get_error_code_name(error_code)
+            error_codes[error_code_name] = error_codes.get(error_code_name, 0) + 1
+
+            if error_code % _ERROR_CODE_OFFSET_MODULUS != ErrorCode.SUMMARY_STATS_MESSAGE:
+                continue
+
+            metric_name, _, metric_value = description.partition(': ')
+
+            if metric_name == 'pge.version':
+                log_summary['pge'] = module
+                log_summary['pge_version'] = metric_value
+            elif metric_name == 'sas.version':
+                log_summary['sas_version'] = metric_value
+            else:
+                try:
+                    metrics[metric_name] = float(metric_value)
+                except ValueError:
+                    pass
+    except _LOG_READ_ERRORS as err:
+        return {'log_file': log_filename, 'error': f'{err.__class__.__name__}: {str(err)}'}
+
+    # Logs which do not record the PGE version (QA logs, or those of jobs
+    # which failed early) are grouped by the workflow which wrote them
+    if log_summary['pge'] is None:
+        log_summary['pge'] = first_workflow.split('::')[0] if first_workflow else UNKNOWN
+
+    return log_summary
+
+
+def _summarize_log_with_sidecar(log_filename):
+    """Summarizes a log, reading its sidecar when present"""
+    return summarize_log(log_filename, use_sidecar=True)
+
+
+def _summarize_log_without_sidecar(log_filename):
+    """Summarizes a log, ignoring any sidecar"""
+    return summarize_log(log_filename, use_sidecar=False)
+
+
+def iter_log_summaries(log_files, max_workers=None, use_sidecar=True, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Summarizes each of the provided logs in a pool of worker processes.
+
+    Parameters
+    ----------
+    log_files : list[str]
+        Paths to the logs to summarize.
+    max_workers : int, optional
+        Maximum number of logs to summarize concurrently. Defaults to the
+        number of CPUs on the machine. With a single worker, logs are
+        summarized within the calling process.
+    use_sidecar : bool, optional
+        Whether to read the sidecar of each log in its place, when present.
+    chunk_size : int, optional
+        Number of logs handed to a worker process at a time.
+
+    Yields
+    ------
+    log_summary : dict
+        The summary of each log, as returned by summarize_log(), in the same
+        order as the provided logs.
+
+    """
+    summarize = _summarize_log_with_sidecar if use_sidecar else _summarize_log_without_sidecar
+
+    if max_workers == 1:
+        yield from map(summarize, log_files)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(summarize, log_files, chunksize=chunk_size)
+
+
+def percentile(sorted_values, percent):
+    """
+    Returns the requested percentile of a sorted sequence of values, linearly
+    interpolating between the closest ranks.
+
+    Parameters
+    ----------
+    sorted_values : Sequence[float]
+        The values, in ascending order.
+    percent : float
+        The percentile to compute, between 0 and 100.
+
+    Returns
+    -------
+    value : float
+        The requested percentile.
+
+    Raises
+    ------
+    ValueError
+        If no values are provided.
+
+    """
+    if not sorted_values:
+        raise ValueError('Cannot compute the percentile of an empty sequence')
+
+    rank = (len(sorted_values) - 1) * percent / 100
+    lower = math.floor(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def aggregate_log_summaries(log_summaries, metric_patterns=DEFAULT_METRIC_PATTERNS,
+                            percentiles=DEFAULT_PERCENTILES):
+    """
+    Reduces a stream of log summaries to statistics grouped by PGE.
+
+    Parameters
+    ----------
+    log_summaries : Iterable[dict]
+        The log summaries to aggregate, as returned by summarize_log().
+    metric_patterns : Iterable[str], optional
+        Unix-style patterns of the names of the metrics to compute
+        percentiles for.
+    percentiles : Iterable[float], optional
+        The percentiles to compute for each metric.
+
+    Returns
+    -------
+    report : dict
+        The aggregated statistics, with the total number of logs analyzed,
+        the logs which could not be read (along with the reason), and, for
+        each PGE, the number of logs and failures, the failure rate by PGE
+        and SAS version, the requested percentiles (along with the count,
+        minimum, maximum and mean) of each matching metric, and the number of
+        messages logged with each error code, from most to least frequent.
+
+    """
+    log_count = 0
+    unreadable = []
+    groups = {}
+
+    for log_summary in log_summaries:
+        log_count += 1
+
+        if log_summary['error'] is not None:
+            unreadable.append({'log_file': log_summary['log_file'], 'error': log_summary['error']})
+            continue
+
+        group = groups.setdefault(log_summary['pge'], {'versions': {}, 'metrics': {}, 'error_codes': {}})
+
+        version_key = (log_summary['pge_version'], log_summary['sas_version'])
+        version_counts = group['versions'].setdefault(version_key, [0, 0])
+        version_counts[0] += 1
+        version_counts[1] += int(log_summary['failed'])
+
+        for metric_name, metric_value in log_summary['metrics'].items():
+            if any(fnmatch(metric_name, pattern) for pattern in metric_patterns):
+                group['metrics'].setdefault(metric_name, array('d')).append(metric_value)
+
+        for error_code_name, count in log_summary['error_codes'].items():
+            group['error_codes'][error_code_name] = group['error_codes'].get(error_code_name, 0) + count
+
+    report = {'log_count': log_count, 'unreadable': unreadable, 'pges': {}}
+
+    for pge_name in sorted(groups):
+        group = groups[pge_name]
+
+        versions = []
+
+        for (pge_version, sas_version), (version_log_count, failed_count) in sorted(group['versions'].items()):
+            versions.append({
+                'pge_version': pge_version,
+                'sas_version': sas_version,
+                'log_count': version_log_count,
+                'failed_count': failed_count,
+                'failure_rate': failed_count / version_log_count
+            })
+
+        metrics = {}
+
+        for metric_name in sorted(group['metrics']):
+            values = sorted(group['metrics'][metric_name])
+
+            metrics[metric_name] = {
+                'count': len(values),
+                'min': values[0],
+                'max': values[-1],
+                'mean': math.fsum(values) / len(values)
+            }
+
+            for percent in percentiles:
+                metrics[metric_name][f'p{percent:g}'] = percentile(values, percent)
+
+        pge_log_count = sum(version['log_count'] for version in versions)
+        pge_failed_count = sum(version['failed_count'] for version in versions)
+
+        report['pges'][pge_name] = {
+            'log_count': pge_log_count,
+            'failed_count': pge_failed_count,
+            'failure_rate': pge_failed_count / pge_log_count,
+            'versions': versions,
+            'metrics': metrics,
+            'error_codes': dict(sorted(group['error_codes'].items(), key=lambda item: (-item[1], item[0])))
+        }
+
+    return report
+
+
+def format_report_table(report, percentiles=DEFAULT_PERCENTILES):
+    """
+    Formats aggregated log statistics into human-readable tables.
+
+    Parameters
+    ----------
+    report : dict
+        The statistics returned by aggregate_log_summaries().
+    percentiles : Iterable[float], optional
+        The percentiles computed for each metric.
+
+    Returns
+    -------
+    table : str
+        The formatted tables of failure rates by version, metric percentiles
+        and error code counts.
+
+    """
+    percentile_keys = [f'p{percent:g}' for percent in percentiles]
+
+    lines = [f"Logs analyzed: {report['log_count']} (unreadable: {len(report['unreadable'])})", '']
+
+    lines.append(f"{'PGE':<16}  {'PGE_VERSION':<20}  {'SAS_VERSION':<12}  {'LOGS':>8}  {'FAILED':>8}  "
+                 f"{'FAILURE_RATE':>12}")
+
+    for pge_name, pge_report in report['pges'].items():
+        for version in pge_report['versions']:
+            lines.append(f"{pge_name:<16}  {version['pge_version']:<20}  {version['sas_version']:<12}  "
+                         f"{version['log_count']:>8}  {version['failed_count']:>8}  "
+                         f"{version['failure_rate']:>12.2%}")
+
+    lines.append('')
+    lines.append(f"{'PGE':<16}  {'METRIC':<40}  {'COUNT':>8}  "
+                 + '  '.join(f'{key.upper():>12}' for key in percentile_keys + ['max']))
+
+    for pge_name, pge_report in report['pges'].items():
+        for metric_name, metric_stats in pge_report['metrics'].items():
+            lines.append(f"{pge_name:<16}  {metric_name:<40}  {metric_stats['count']:>8}  "
+                         + '  '.join(f'{metric_stats[key]:>12.2f}' for key in percentile_keys + ['max']))
+
+    lines.append('')
+    lines.append(f"{'PGE':<16}  {'ERROR_CODE':<40}  {'COUNT':>8}")
+
+    for pge_name, pge_report in report['pges'].items():
+        for error_code_name, count in pge_report['error_codes'].items():
+            lines.append(f"{pge_name:<16}  {error_code_name:<40}  {count:>8}")
+
+    for log_status in report['unreadable']:
+        lines.append(f"Unreadable log {log_status['log_file']}: {log_status['error']}")
+
+    return '\n'.join(lines)
+
+
+def log_analytics_main(argv=None):
+    """
+    The main entry point for analysis of a fleet of OPERA PGE logs.
+
+    Parameters
+    ----------
+    argv : list[str], optional
+        Command-line arguments to parse. Defaults to those provided to the
+        current process.
+
+    Returns
+    -------
+    exit_status : int
+        Zero once the report is written.
+
+    """
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('sources', nargs='+', type=str,
+                        help='Log files, directories or glob patterns.')
+    parser.add_argument('-j', '--max-workers', type=int, default=None,
+                        help='Maximum number of logs to parse concurrently. Defaults to the number of CPUs.')
+    parser.add_argument('-m', '--metric', dest='metric_patterns', action='append', default=None,
+                        help='Unix-style pattern of the names of metrics to compute percentiles for. '
+                             'May be given multiple times. Defaults to '
+                             f'{", ".join(DEFAULT_METRIC_PATTERNS)}.')
+    parser.add_argument('-f', '--format', choices=('table', 'json'), default='table',
+                        help='Format of the report. Defaults to table.')
+    parser.add_argument('-o', '--output', type=str, default=None,
+                        help='Optional path to write the report to, rather than standard out.')
+    parser.add_argument('--no-sidecar', action='store_true',
+                        help='Always parse the logs themselves, even where a JSON-lines sidecar is present.')
+
+    args = parser.parse_args(argv)
+
+    if args.max_workers is not None and args.max_workers < 1:
+        parser.error('--max-workers must be at least 1')
+
+    log_files = collect_log_files(args.sources)
+
+    report = aggregate_log_summaries(
+        iter_log_summaries(log_files, max_workers=args.max_workers, use_sidecar=not args.no_sidecar),
+        metric_patterns=args.metric_patterns or DEFAULT_METRIC_PATTERNS
+    )
+
+    if args.format == 'json':
+        output = json.dumps(report, indent=2)
+    else:
+        output = format_report_table(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as outfile:
+            outfile.write(output + '\n')
+    else:
+        print(output)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(log_analytics_main())
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+
+"""
+============
+pge_batch.py
+============
+
+Runs a batch of OPERA Product Generation Executable (PGE) jobs within a single
+invocation. Each job is defined by its own RunConfig, and jobs are executed in
+a bounded pool of worker processes, so the start-up cost of the PGE (Python
+interpreter, library imports, etc.) is paid once per worker rather than once
+per job.
+
+RunConfigs may be provided as any combination of directories (all .yaml/.yml
+files within are used), glob patterns, explicit RunConfig paths, or manifest
+files listing one RunConfig path per line.
+
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from os.path import abspath, basename, dirname, isdir, isfile, join, splitext
+
+from opera.pge.base.runconfig import RunConfig
+from opera.scripts.pge_main import open_log_file, pge_start
+from opera.util.logger import default_log_file_name
+
+RUN_CONFIG_EXTENSIONS = ('.yaml', '.yml')
+"""File extensions recognized as RunConfigs when scanning directories"""
+
+JOB_SUCCEEDED = 'succeeded'
+"""Status assigned to jobs which ran to completion"""
+
+JOB_FAILED = 'failed'
+"""Status assigned to jobs which raised an exception"""
+
+JOB_SKIPPED = 'skipped'
+"""Status assigned to jobs which were not run due to a conflict with another job"""
+
+
+def collect_run_config_files(sources):
+    """
+    Expands the provided set of RunConfig sources into the list of RunConfig
+    files to process.
+
+    Parameters
+    ----------
+    sources : Iterable[str]
+        The RunConfig sources to expand. Each source may be a directory,
+        a glob pattern, a RunConfig file, or a manifest file containing one
+        RunConfig path per line (blank lines and lines starting with "#" are
+        ignored, and relative paths are resolved against the manifest's
+        location).
+
+    Returns
+    -------
+    run_config_files : list[str]
+        Absolute paths to the RunConfig files to process, in the order they
+        were provided, with any duplicates removed.
+
+    Raises
+    ------
+    FileNotFoundError
+        If a source does not refer to any existing file or directory.
+
+    """
+    run_config_files = []
+
+    for source in sources:
+        if isdir(source):
+            run_config_files.extend(
+                sorted(join(source, filename) for filename in os.listdir(source)
+                       if splitext(filename)[-1] in RUN_CONFIG_EXTENSIONS)
+            )
+        elif isfile(source) and splitext(source)[-1] in RUN_CONFIG_EXTENSIONS:
+            run_config_files.append(source)
+        elif isfile(source):
+            with open(source, 'r', encoding='utf-8') as manifest:
+                for line in manifest:
+                    line = line.strip()
+
+                    if line and not line.startswith('#'):
+                        run_config_files.append(join(dirname(abspath(source)), line))
+        elif glob.has_magic(source):
+            run_config_files.extend(sorted(glob.glob(source)))
+        else:
+            raise FileNotFoundError(f"Could not find RunConfig source: {source}")
+
+    # Remove any duplicates while maintaining order
+    return list(dict.fromkeys(map(abspath, run_config_files)))
+
+
+def find_output_conflicts(run_config_files):
+    """
+    Determines which RunConfigs would share an output product or scratch
+    location with another RunConfig in the batch. Since the PGE scans these
+    locations to stage its products, jobs sharing them would interfere with one
+    another, so only the first job to claim a location may use it.
+
+    RunConfigs which cannot be parsed are not considered to conflict, as the
+    error will be reported by the job itself.
+
+    Parameters
+    ----------
+    run_config_files : Iterable[str]
+        The RunConfig files to check.
+
+    Returns
+    -------
+    conflicts : dict
+        Mapping of conflicting RunConfig file paths to a description of the
+        conflict.
+
+    """
+    claimed_paths = {}
+    conflicts = {}
+
+    for run_config_file in run_config_files:
+        try:
+            run_config = RunConfig(run_config_file)
+            job_paths = {abspath(run_config.output_product_path), abspath(run_config.scratch_path)}
+        except Exception:  # pylint: disable=broad-except
+            continue
+
+        for job_path in job_paths:
+            if job_path in claimed_paths:
+                conflicts[run_config_file] = (f'Output location {job_path} is already used by '
+                                              f'RunConfig {claimed_paths[job_path]}')
+                break
+        else:
+            claimed_paths.update({job_path: run_config_file for job_path in job_paths})
+
+    return conflicts
+
+
+def run_pge_job(run_config_filename, job_id):
+    """
+    Runs a single PGE job, capturing its outcome rather than raising.
+
+    Each job is given its own logger, with a job-specific initial log location,
+    so that concurrent jobs never write to the same log file.
+
+    Parameters
+    ----------
+    run_config_filename : str
+        Path to the RunConfig for the job.
+    job_id : int
+        Identifier for the job, unique within the batch.
+
+    Returns
+    -------
+    job_status : dict
+        Summary of the job outcome, including its status, elapsed time, final
+        log file location and, if the job failed, the error that occurred.
+
+    """
+    start_time = time.monotonic()
+
+    logger = open_log_file()
+
+    # Configure logger to write out to a job-specific location in the temp
+    # directory until the PGE can reassign it to the proper location
+    logger.move(join(tempfile.gettempdir(),
+                     f'{splitext(default_log_file_name())[0]}_{os.getpid()}_{job_id}.log'))
+
+    job_status = {
+        'job_id': job_id,
+        'run_config': run_config_filename,
+        'status': JOB_SUCCEEDED,
+        'error': None
+    }
+
+    try:
+        pge_start(run_config_filename, logger=logger)
+    except Exception as err:  # pylint: disable=broad-except
+        job_status['status'] = JOB_FAILED
+        job_status['error'] = f'{err.__class__.__name__}: {str(err)}'
+
+        # Make sure the log makes it to disk if the failure was not one that
+        # the PGE handled itself
+        logger.close_log_stream()
+
+    job_status['log_file'] = logger.get_file_name()
+    job_status['elapsed_seconds'] = time.monotonic() - start_time
+
+    return job_status
+
+
+def run_batch(run_config_files, max_workers=None):
+    """
+    Runs the PGE jobs defined by the provided RunConfigs in a bounded pool of
+    worker processes.
+
+    Parameters
+    ----------
+    run_config_files : list[str]
+        Paths to the RunConfigs defining each job.
+    max_workers : int, optional
+        Maximum number of jobs to run concurrently. Defaults to the number of
+        CPUs on the machine.
+
+    Returns
+    -------
+    job_statuses : list[dict]
+        Summary of the outcome of each job, in the same order as the provided
+        RunConfigs. See run_pge_job() for the contents of each summary.
+
+    """
+    conflicts = find_output_conflicts(run_config_files)
+
+    job_statuses = [None] * len(run_config_files)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+
+        for job_id, run_config_file in enumerate(run_config_files):
+            if run_config_file in conflicts:
+                job_statuses[job_id] = {
+                    'job_id': job_id,
+                    'run_config': run_config_file,
+                    'status': JOB_SKIPPED,
+                    'error': conflicts[run_config_file],
+                    'log_file': None,
+                    'elapsed_seconds': 0.0
+                }
+            else:
+                futures[job_id] = executor.submit(run_pge_job, run_config_file, job_id)
+
+        for job_id, future in futures.items():
+            try:
+                job_statuses[job_id] = future.result()
+            except Exception as err:  # pylint: disable=broad-except
+                # The worker process itself failed (killed by the OS, for example)
+                job_statuses[job_id] = {
+                    'job_id': job_id,
+                    'run_config': run_config_files[job_id],
+                    'status': JOB_FAILED,
+                    'error': f'{err.__class__.__name__}: {str(err)}',
+                    'log_file': None,
+                    'elapsed_seconds': None
+                }
+
+    return job_statuses
+
+
+def format_batch_summary(job_statuses):
+    """
+    Formats the outcome of a batch of jobs into a human-readable table.
+
+    Parameters
+    ----------
+    job_statuses : list[dict]
+        The job summaries returned by run_batch().
+
+    Returns
+    -------
+    summary : str
+        The formatted summary table, including a final line of totals by status.
+
+    """
+    lines = [f"{'JOB':>5}  {'STATUS':<9}  {'SECONDS':>9}  {'RUNCONFIG':<40}  LOG/ERROR"]
+
+    for job_status in job_statuses:
+        elapsed_seconds = job_status['elapsed_seconds']
+        elapsed_str = f'{elapsed_seconds:9.2f}' if elapsed_seconds is not None else f"{'-':>9}"
+        detail = job_status['error'] or job_status['log_file']
+
+        lines.append(f"{job_status['job_id']:>5}  {job_status['status']:<9}  {elapsed_str}  "
+                     f"{basename(job_status['run_config']):<40}  {detail}")
+
+    totals = ', '.join(
+        f"{status}: {sum(1 for job_status in job_statuses if job_status['status'] == status)}"
+        for status in (JOB_SUCCEEDED, JOB_FAILED, JOB_SKIPPED)
+    )
+
+    lines.append(f'Total jobs: {len(job_statuses)} ({totals})')
+
+    return '\n'.join(lines)
+
+
+def pge_batch_main(argv=None):
+    """
+    The main entry point for batch execution of OPERA PGEs.
+
+    Parameters
+    ----------
+    argv : list[str], optional
+        Command-line arguments to parse. Defaults to those provided to the
+        current process.
+
+    Returns
+    -------
+    exit_status : int
+        Zero if every job in the batch succeeded, one otherwise.
+
+    """
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('sources', nargs='+', type=str,
+                        help='RunConfig files, directories, glob patterns or manifest files.')
+    parser.add_argument('-j', '--max-workers', type=int, default=None,
+                        help='Maximum number of PGE jobs to run concurrently. '
+                             'Defaults to the number of CPUs.')
+    parser.add_argument('-s', '--summary-file', type=str, default=None,
+                        help='Optional path to write the per-job status summary to, in JSON format.')
+
+    args = parser.parse_args(argv)
+
+    if args.max_workers is not None and args.max_workers < 1:
+        parser.error('--max-workers must be at least 1')
+
+    run_config_files = collect_run_config_files(args.sources)
+
+    job_statuses = run_batch(run_config_files, max_workers=args.max_workers)
+
+    print(format_batch_summary(job_statuses))
+
+    if args.summary_file:
+        with open(args.summary_file, 'w', encoding='utf-8') as outfile:
+            json.dump(job_statuses, outfile, indent=2)
+
+    return int(any(job_status['status'] != JOB_SUCCEEDED for job_status in job_statuses))
+
+
+if __name__ == '__main__':
+    sys.exit(pge_batch_main())
@@ -126,7 +126,7 @@ def load_run_config_file(logger, run_config_filename):
     return run_config
 
 
-def pge_start(run_config_filename):
+def pge_start(run_config_filename, logger=None):
     """
     Opens a log file, loads the yaml run config file, then instantiates and runs
     the PGE.
@@ -135,13 +135,18 @@ def pge_start(run_config_filename):
     ----------
     run_config_filename : str
         Path and filename to run config yaml file.
+    logger : PgeLogger, optional
+        Logger to use with the PGE. If not provided, a new logger is opened,
+        configured to write out to /tmp until the PGE reassigns it to the
+        proper location.
 
     """
-    logger = open_log_file()
+    if logger is None:
+        logger = open_log_file()
 
-    # Configure logger to write out to /tmp until PGE can reassign to the proper
-    # location
-    logger.move(f'/tmp/{default_log_file_name()}')
+        # Configure logger to write out to /tmp until PGE can reassign to the proper
+        # location
+        logger.move(f'/tmp/{default_log_file_name()}')
 
     # Load the yaml run config file
     run_config = load_run_config_file(logger, run_config_filename)
@@ -151,7 +156,8 @@ def pge_start(run_config_filename):
 
     # Instantiate and run the pge.
     pge = pge_class(
-        pge_name=run_config.pge_name, runconfig_path=run_config_filename, logger=logger
+        pge_name=run_config.pge_name, runconfig_path=run_config_filename, logger=logger,
+        runconfig=run_config
     )
 
     pge.run()
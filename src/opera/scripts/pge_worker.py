@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+
+"""
+=============
+pge_worker.py
+=============
+
+Long-running worker for execution of OPERA Product Generation Executable (PGE)
+jobs submitted through a local spool directory.
+
+On start-up, the worker imports every PGE module (and by extension, the
+libraries they depend on) a single time. Each job is then run within a child
+process forked from the warm worker, so jobs start without paying any import
+cost, while remaining isolated from one another and from the worker itself.
+
+The spool directory is laid out as follows:
+
+    incoming/  RunConfigs waiting to be processed. Submitters should write a
+               RunConfig elsewhere on the same filesystem and rename it into
+               this directory, so the worker never observes a partial file.
+    running/   RunConfigs claimed by a worker and currently being processed.
+    done/      RunConfigs of jobs that completed successfully.
+    failed/    RunConfigs of jobs that failed.
+    status/    One <RunConfig file name>.json status file per processed job,
+               such as job_1.yaml.json.
+
+Multiple workers may safely share a spool directory, since jobs are claimed
+with an atomic rename.
+
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from importlib import import_module
+from os.path import abspath, basename, join, splitext
+
+from pkg_resources import resource_filename
+
+from opera.pge.base.runconfig import BASE_PGE_SCHEMA
+from opera.scripts.pge_batch import JOB_FAILED, JOB_SUCCEEDED, RUN_CONFIG_EXTENSIONS
+from opera.scripts.pge_batch import run_pge_job
+from opera.scripts.pge_main import PGE_NAME_MAP
+from opera.util.schema_cache import get_schema
+
+SPOOL_SUBDIRECTORIES = ('incoming', 'running', 'done', 'failed', 'status')
+"""Names of the subdirectories which make up a spool directory"""
+
+DEFAULT_POLL_INTERVAL = 1.0
+"""Default number of seconds between scans of the incoming spool directory"""
+
+
+def preload_pge_modules():
+    """
+    Imports every PGE module referenced by PGE_NAME_MAP, so any processes
+    later forked from the current process inherit the imported modules.
+
+    Returns
+    -------
+    import_errors : dict
+        Mapping of PGE names whose module could not be imported to the reason
+        the import failed. Jobs for these PGEs will still be attempted, and
+        will report the import error through their own logs.
+
+    """
+    import_errors = {}
+
+    for pge_name, (pge_module, _) in PGE_NAME_MAP.items():
+        try:
+            import_module(pge_module)
+        except ImportError as err:
+            import_errors[pge_name] = str(err)
+
+    return import_errors
+
+
+def preload_schemas():
+    """
+    Compiles the base PGE schema, and the SAS schema of each PGE packaged with
+    OPERA, into the schema cache, so any processes later forked from the
+    current process validate RunConfigs without recompiling them.
+
+    Returns
+    -------
+    schema_files : list[str]
+        Paths to the schema files which were compiled.
+
+    """
+    schema_files = [BASE_PGE_SCHEMA] + sorted(
+        glob.glob(join(resource_filename('opera', 'pge'), '*', 'schema', '*_sas_schema.yaml'))
+    )
+
+    for schema_file in schema_files:
+        get_schema(schema_file)
+
+    return schema_files
+
+
+def _write_json_atomic(output_path, contents):
+    """Writes the provided contents to a JSON file via a temporary file and rename."""
+    temp_path = f'{output_path}.tmp'
+
+    with open(temp_path, 'w', encoding='utf-8') as outfile:
+        json.dump(contents, outfile, indent=2)
+
+    os.replace(temp_path, output_path)
+
+
+def _run_spooled_job(run_config_path, status_path, job_id):
+    """
+    Entry point for the child process forked to run a single spooled job.
+
+    Parameters
+    ----------
+    run_config_path : str
+        Path to the claimed RunConfig within the running/ spool directory.
+    status_path : str
+        Path to write the job status file to.
+    job_id : int
+        Identifier for the job, unique within the life of the worker.
+
+    """
+    # Restore default signal handling within the job, the worker's shutdown
+    # handler should not be inherited
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    job_status = run_pge_job(run_config_path, job_id)
+    job_status['worker_pid'] = os.getppid()
+
+    _write_json_atomic(status_path, job_status)
+
+
+class PgeWorker:
+    """
+    Worker which processes PGE jobs submitted to a spool directory, forking a
+    child process from the warm worker for each job.
+    """
+
+    def __init__(self, spool_dir, max_jobs=1, poll_interval=DEFAULT_POLL_INTERVAL):
+        """
+        Creates a new PgeWorker, initializing the spool directory layout if
+        necessary.
+
+        Parameters
+        ----------
+        spool_dir : str
+            Path to the spool directory to process jobs from.
+        max_jobs : int, optional
+            Maximum number of jobs to run concurrently.
+        poll_interval : float, optional
+            Number of seconds between scans of the incoming spool directory.
+
+        """
+        self.spool_dir = abspath(spool_dir)
+        self.max_jobs = max_jobs
+        self.poll_interval = poll_interval
+
+        for subdirectory in SPOOL_SUBDIRECTORIES:
+            os.makedirs(join(self.spool_dir, subdirectory), exist_ok=True)
+
+        self._context = multiprocessing.get_context('fork')
+        self._active_jobs = {}
+        self._job_count = 0
+        self._shutdown_requested = False
+
+    def _spool_path(self, subdirectory, filename):
+        """Returns the path to the provided filename within a spool subdirectory"""
+        return join(self.spool_dir, subdirectory, filename)
+
+    def _status_path(self, run_config_filename):
+        """Returns the path to the status file for the provided RunConfig filename"""
+        return self._spool_path('status', f'{run_config_filename}.json')
+
+    def request_shutdown(self, *_):
+        """Requests the worker stop claiming new jobs, and exit once active jobs complete."""
+        self._shutdown_requested = True
+
+    def claim_jobs(self):
+        """
+        Claims RunConfigs from the incoming spool directory, up to the number
+        of free job slots, by moving them to the running spool directory.
+
+        Returns
+        -------
+        claimed : list[str]
+            File names of the claimed RunConfigs, in the order they were claimed.
+
+        """
+        claimed = []
+        free_slots = self.max_jobs - len(self._active_jobs)
+
+        if free_slots <= 0:
+            return claimed
+
+        incoming_dir = join(self.spool_dir, 'incoming')
+
+        # Process jobs in submission order (oldest first)
+        candidates = sorted(
+            (entry for entry in os.scandir(incoming_dir)
+             if entry.is_file() and splitext(entry.name)[-1] in RUN_CONFIG_EXTENSIONS),
+            key=lambda entry: (entry.stat().st_mtime_ns, entry.name)
+        )
+
+        for entry in candidates[:free_slots]:
+            try:
+                os.rename(entry.path, self._spool_path('running', entry.name))
+            except FileNotFoundError:
+                # Claimed by another worker sharing this spool directory
+                continue
+
+            claimed.append(entry.name)
+
+        return claimed
+
+    def start_job(self, run_config_filename):
+        """
+        Forks a child process to run the job for a claimed RunConfig.
+
+        Parameters
+        ----------
+        run_config_filename : str
+            File name of the RunConfig within the running spool directory.
+
+        """
+        process = self._context.Process(
+            target=_run_spooled_job,
+            args=(self._spool_path('running', run_config_filename),
+                  self._status_path(run_config_filename),
+                  self._job_count),
+            name=f'pge_job_{self._job_count}'
+        )
+        process.start()
+
+        self._active_jobs[run_config_filename] = process
+        self._job_count += 1
+
+    def reap_jobs(self):
+        """
+        Collects any completed jobs, moving their RunConfigs to the done or
+        failed spool directory according to their outcome.
+
+        Returns
+        -------
+        job_statuses : list[dict]
+            Status of each job reaped by this call.
+
+        """
+        job_statuses = []
+
+        for run_config_filename, process in list(self._active_jobs.items()):
+            if process.is_alive():
+                continue
+
+            process.join()
+            del self._active_jobs[run_config_filename]
+
+            status_path = self._status_path(run_config_filename)
+
+            try:
+                with open(status_path, 'r', encoding='utf-8') as infile:
+                    job_status = json.load(infile)
+            except (OSError, ValueError):
+                # The job process died before it could report a status
+                job_status = {
+                    'run_config': self._spool_path('running', run_config_filename),
+                    'status': JOB_FAILED,
+                    'error': f'Job process exited with code {process.exitcode} without reporting a status',
+                    'log_file': None,
+                    'elapsed_seconds': None
+                }
+
+            job_status['exit_code'] = process.exitcode
+
+            destination = 'done' if job_status['status'] == JOB_SUCCEEDED else 'failed'
+            destination_path = self._spool_path(destination, run_config_filename)
+
+            os.replace(self._spool_path('running', run_config_filename), destination_path)
+            job_status['run_config'] = destination_path
+
+            _write_json_atomic(status_path, job_status)
+
+            job_statuses.append(job_status)
+
+        return job_statuses
+
+    def run(self, run_once=False):
+        """
+        Main loop of the worker. Claims and runs jobs until shutdown is
+        requested, then waits for any active jobs to complete.
+
+        Parameters
+        ----------
+        run_once : bool, optional
+            If true, the worker exits once the incoming spool directory has
+            been drained and all jobs have completed.
+
+        Returns
+        -------
+        job_statuses : list[dict]
+            Status of each job processed by the worker.
+
+        """
+        job_statuses = []
+
+        while True:
+            job_statuses.extend(self.reap_jobs())
+
+            if not self._shutdown_requested:
+                for run_config_filename in self.claim_jobs():
+                    self.start_job(run_config_filename)
+
+                if run_once and not self._active_jobs:
+                    break
+            elif not self._active_jobs:
+                break
+
+            time.sleep(self.poll_interval)
+
+        return job_statuses
+
+
+def pge_worker_main(argv=None):
+    """
+    The main entry point for the OPERA PGE spool directory worker.
+
+    Parameters
+    ----------
+    argv : list[str], optional
+        Command-line arguments to parse. Defaults to those provided to the
+        current process.
+
+    """
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('spool_dir', type=str,
+                        help='Path to the spool directory to process jobs from.')
+    parser.add_argument('-j', '--max-jobs', type=int, default=1,
+                        help='Maximum number of PGE jobs to run concurrently.')
+    parser.add_argument('-p', '--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help='Number of seconds between scans for incoming RunConfigs.')
+    parser.add_argument('--once', action='store_true',
+                        help='Exit once all currently spooled RunConfigs have been processed.')
+
+    args = parser.parse_args(argv)
+
+    if args.max_jobs < 1:
+        parser.error('--max-jobs must be at least 1')
+
+    import_errors = preload_pge_modules()
+
+    for pge_name, reason in import_errors.items():
+        print(f'Warning: could not preload module for PGE {pge_name}: {reason}', file=sys.stderr)
+
+    preload_schemas()
+
+    worker = PgeWorker(args.spool_dir, max_jobs=args.max_jobs, poll_interval=args.poll_interval)
+
+    previous_handlers = {signum: signal.signal(signum, worker.request_shutdown)
+                         for signum in (signal.SIGTERM, signal.SIGINT)}
+
+    try:
+        job_statuses = worker.run(run_once=args.once)
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+
+    for job_status in job_statuses:
+        print(f"{job_status['status']}: {basename(job_status['run_config'])}")
+
+
+if __name__ == '__main__':
+    pge_worker_main()
@@ -7,13 +7,17 @@ test_base_pge.py
 
 Unit tests for the pge/base_pge.py module.
 """
+import errno
+import gzip
 import json
 import os
 import re
 import tempfile
+import threading
+import time
 import unittest
 from io import StringIO
-from os.path import abspath, join
+from os.path import abspath, exists, join
 from pathlib import Path
 from unittest.mock import patch
 
@@ -24,6 +28,14 @@ import yaml
 import opera
 from opera.pge import PgeExecutor, RunConfig
 from opera.util import PgeLogger
+from opera.util.error_codes import ErrorCode
+from opera.util.log_sidecar import get_sidecar_filename
+from opera.util.log_sidecar import iter_sidecar_records
+from opera.util.log_sidecar import read_sidecar_index
+from opera.util.log_streams import AsyncLogStream
+from opera.util.log_streams import SpillingLogStream
+from opera.util.logger import LOCATION_NOT_CAPTURED
+from opera.util.run_utils import get_checksum
 
 
 class BasePgeTestCase(unittest.TestCase):
@@ -118,6 +130,49 @@ class BasePgeTestCase(unittest.TestCase):
         # Make sure the run time metric was captured as well
         self.assertIn('sas.elapsed_seconds:', log_contents)
 
+        # Make sure each post-processing step reported its timing
+        for step_name in ('catalog_metadata', 'validate_catalog_metadata', 'write_catalog_metadata',
+                          'iso_metadata', 'resource_timelines'):
+            self.assertIn(f'postprocessing.{step_name}.elapsed_seconds:', log_contents)
+
+    def test_postprocessing_step_failure(self):
+        """
+        Test that a failing post-processing step does not finalize the log
+        while other steps are still running and logging.
+
+        """
+        runconfig_path = join(self.data_dir, 'test_base_pge_config.yaml')
+        iso_step_started = threading.Event()
+
+        def _write_catalog_metadata(pge):
+            iso_step_started.wait(timeout=10)
+            pge.logger.critical(pge.name, ErrorCode.CATALOG_METADATA_CREATION_FAILED,
+                                'Mock catalog metadata failure')
+
+        def _write_iso_metadata(pge):
+            iso_step_started.set()
+            time.sleep(0.2)
+            pge.logger.info(pge.name, ErrorCode.RENDERING_ISO_METADATA, 'ISO metadata step still logging')
+
+        pge = PgeExecutor(pge_name='PostProcessingFailureTest', runconfig_path=runconfig_path)
+
+        with patch.object(PgeExecutor, '_write_catalog_metadata', _write_catalog_metadata), \
+                patch.object(PgeExecutor, '_write_iso_metadata', _write_iso_metadata):
+            with self.assertRaisesRegex(RuntimeError, 'Mock catalog metadata failure'):
+                pge.run()
+
+        with open(pge.logger.get_file_name(), 'r', encoding='utf-8') as infile:
+            log_contents = infile.read()
+
+        # The critical message should be logged once the running ISO step has
+        # finished, followed by the log summary
+        self.assertIn('ISO metadata step still logging', log_contents)
+        self.assertEqual(log_contents.count('Mock catalog metadata failure'), 1)
+        self.assertLess(log_contents.index('ISO metadata step still logging'),
+                        log_contents.index('Mock catalog metadata failure'))
+        self.assertLess(log_contents.index('Mock catalog metadata failure'),
+                        log_contents.index('overall.elapsed_seconds'))
+
     def test_base_pge_w_invalid_runconfig(self):
         """
         Test execution of the PgeExecutor using a RunConfig that will fail
@@ -212,6 +267,428 @@ class BasePgeTestCase(unittest.TestCase):
         self.assertIn('hello from qa executable', qa_log_contents)
         self.assertIn('sas.qa.elapsed_seconds:', qa_log_contents)
 
+    def test_resource_sampling(self):
+        """
+        Test execution of the PgeExecutor class with resource sampling of the
+        SAS and QA executables enabled by the RunConfig.
+        """
+        runconfig_path = join(self.data_dir, 'test_sas_qa_config.yaml')
+
+        with open(runconfig_path, 'r', encoding='utf-8') as infile:
+            runconfig_dict = yaml.safe_load(infile)
+
+        runconfig_dict['RunConfig']['Groups']['PGE']['MetricsGroup'] = {
+            'ResourceSamplingInterval': 0.01,
+            'ResourceTimelineFormat': 'csv'
+        }
+
+        test_runconfig_path = 'test_resource_sampling_config.yaml'
+
+        with open(test_runconfig_path, 'w', encoding='utf-8') as outfile:
+            yaml.safe_dump(runconfig_dict, outfile, sort_keys=False)
+
+        pge = PgeExecutor(pge_name='PgeResourceSamplingTest', runconfig_path=test_runconfig_path)
+
+        pge.run()
+
+        self.assertListEqual(list(pge.resource_samplers.keys()), ['sas', 'sas.qa'])
+
+        with open(pge.logger.get_file_name(), 'r', encoding='utf-8') as infile:
+            log_contents = infile.read()
+
+        self.assertIn('sas.process_tree.rss_kb.peak:', log_contents)
+        self.assertIn('sas.process_tree.cpu_percent.p95:', log_contents)
+
+        with open(pge.qa_logger.get_file_name(), 'r', encoding='utf-8') as infile:
+            qa_log_contents = infile.read()
+
+        self.assertIn('sas.qa.process_tree.rss_kb.peak:', qa_log_contents)
+
+        # Check that a timeline was written for each executable
+        for metric_prefix in ('sas', 'sas.qa'):
+            expected_timeline_file = join(pge.runconfig.output_product_path,
+                                          pge._resource_timeline_filename(metric_prefix, 'csv'))
+            self.assertTrue(os.path.exists(expected_timeline_file))
+
+    def test_checksum_algorithms(self):
+        """
+        Test generation of the output product checksums for the set of
+        checksum algorithms requested by the RunConfig.
+        """
+        runconfig_path = join(self.data_dir, 'test_base_pge_config.yaml')
+
+        with open(runconfig_path, 'r', encoding='utf-8') as infile:
+            runconfig_dict = yaml.safe_load(infile)
+
+        runconfig_dict['RunConfig']['Groups']['PGE']['ChecksumGroup'] = {
+            'NumWorkers': 2,
+            'ChunkSizeBytes': 1024,
+            'Algorithms': ['md5', 'sha256', 'blake2b-64']
+        }
+
+        test_runconfig_path = 'test_checksum_algorithms_config.yaml'
+
+        with open(test_runconfig_path, 'w', encoding='utf-8') as outfile:
+            yaml.safe_dump(runconfig_dict, outfile, sort_keys=False)
+
+        pge = PgeExecutor(pge_name='PgeChecksumTest', runconfig_path=test_runconfig_path)
+
+        pge.run()
+
+        expected_metadata_file = join(pge.runconfig.output_product_path, pge._catalog_metadata_filename())
+
+        with open(expected_metadata_file, 'r', encoding='utf-8') as infile:
+            catalog_metadata = json.load(infile)
+
+        checksums = catalog_metadata['Output_Product_Checksums']
+
+        self.assertGreater(len(checksums), 0)
+
+        for output_product, digests in checksums.items():
+            self.assertSetEqual(set(digests.keys()), {'md5', 'sha256', 'blake2b-64'})
+            self.assertEqual(len(digests['sha256']), 64)
+            self.assertEqual(len(digests['blake2b-64']), 16)
+            self.assertEqual(
+                digests['md5'], get_checksum(join(pge.runconfig.output_product_path, output_product))
+            )
+
+        # With a checksum cache configured, regenerating the checksums of
+        # unchanged products should not read them again
+        runconfig_dict['RunConfig']['Groups']['PGE']['ChecksumGroup']['CacheFile'] = 'cache/checksums.db'
+
+        with open(test_runconfig_path, 'w', encoding='utf-8') as outfile:
+            yaml.safe_dump(runconfig_dict, outfile, sort_keys=False)
+
+        pge = PgeExecutor(pge_name='PgeChecksumTest', runconfig_path=test_runconfig_path)
+        pge.run()
+
+        self.assertTrue(os.path.exists('cache/checksums.db'))
+
+        # Log to a fresh logger, since the PGE's own log was finalized by run()
+        pge.logger = PgeLogger()
+
+        with patch('opera.util.run_utils.create_hasher') as mock_create_hasher:
+            cached_checksums = pge._checksum_output_products()
+            mock_create_hasher.assert_not_called()
+
+        self.assertGreater(len(cached_checksums), 0)
+        self.assertSetEqual(set(next(iter(cached_checksums.values())).keys()), {'md5', 'sha256', 'blake2b-64'})
+
+        # An unsupported algorithm should be rejected by RunConfig validation
+        runconfig_dict['RunConfig']['Groups']['PGE']['ChecksumGroup']['Algorithms'] = ['crc1024']
+
+        with open(test_runconfig_path, 'w', encoding='utf-8') as outfile:
+            yaml.safe_dump(runconfig_dict, outfile, sort_keys=False)
+
+        pge = PgeExecutor(pge_name='PgeChecksumTest', runconfig_path=test_runconfig_path)
+
+        with self.assertRaises(RuntimeError):
+            pge.run()
+
+    def test_cross_device_staging(self):
+        """
+        Test staging of output products across file systems, where the
+        checksums should be computed while the products are copied.
+        """
+        runconfig_path = join(self.data_dir, 'test_base_pge_config.yaml')
+
+        pge = PgeExecutor(pge_name='PgeStagingTest', runconfig_path=runconfig_path)
+
+        real_rename = os.rename
+
+        def _rename(source, destination):
+            # Only the product moves should appear to cross file systems
+            if source.endswith('.tif'):
+                raise OSError(errno.EXDEV, 'Invalid cross-device link', source, None, destination)
+
+            return real_rename(source, destination)
+
+        with patch.object(os, 'rename', _rename), \
+                patch('opera.pge.base.base_pge.get_checksums', wraps=opera.pge.base.base_pge.get_checksums) \
+                as mock_get_checksums:
+            pge.run()
+
+        self.assertEqual(len(pge.staged_checksums), 1)
+
+        # The staged product should not have been read again for checksumming
+        mock_get_checksums.assert_called_once()
+        self.assertListEqual(mock_get_checksums.call_args.args[0], [])
+
+        staged_product = next(iter(pge.staged_checksums))
+
+        expected_metadata_file = join(pge.runconfig.output_product_path, pge._catalog_metadata_filename())
+
+        with open(expected_metadata_file, 'r', encoding='utf-8') as infile:
+            catalog_metadata = json.load(infile)
+
+        self.assertDictEqual(catalog_metadata['Output_Product_Checksums'],
+                             {os.path.basename(staged_product): get_checksum(staged_product)})
+
+    def test_logging_group(self):
+        """
+        Test execution of the PgeExecutor with the log configured to spill to
+        the scratch directory, and without location capture for metrics.
+        """
+        runconfig_path = join(self.data_dir, 'test_sas_qa_config.yaml')
+
+        with open(runconfig_path, 'r', encoding='utf-8') as infile:
+            runconfig_dict = yaml.safe_load(infile)
+
+        runconfig_dict['RunConfig']['Groups']['PGE']['LoggingGroup'] = {
+            'SpillThresholdBytes': 0,
+            'DisableLocationCapture': ['SUMMARY_STATS_MESSAGE'],
+            'JsonLinesSidecar': True,
+            'DeduplicateAppendedLines': True,
+            'AppendedLineRateLimits': [{'Pattern': '*projection*', 'MaxLines': 10}]
+        }
+
+        test_runconfig_path = 'test_logging_group_config.yaml'
+
+        with open(test_runconfig_path, 'w', encoding='utf-8') as outfile:
+            yaml.safe_dump(runconfig_dict, outfile, sort_keys=False)
+
+        pge = PgeExecutor(pge_name='PgeLogSpillTest', runconfig_path=test_runconfig_path)
+
+        pge.run()
+
+        self.assertIsInstance(pge.logger.get_stream_object(), SpillingLogStream)
+        self.assertIsInstance(pge.qa_logger.get_stream_object(), SpillingLogStream)
+
+        for logger in (pge.logger, pge.qa_logger):
+            self.assertListEqual(logger.line_filter.rate_limits, [('*projection*', 10)])
+
+        # Spill files should have been renamed to the final log locations
+        self.assertListEqual(
+            [filename for filename in os.listdir(pge.runconfig.scratch_path)
+             if filename.endswith(SpillingLogStream.SPILL_FILE_SUFFIX)],
+            []
+        )
+
+        with open(pge.logger.get_file_name(), 'r', encoding='utf-8') as infile:
+            log_contents = infile.read()
+
+        self.assertIn('Log file configuration complete', log_contents)
+        self.assertIn('hello from primary executable', log_contents)
+        self.assertIn(f'{LOCATION_NOT_CAPTURED}, "overall.elapsed_seconds', log_contents)
+
+        self.assertTrue(os.path.exists(pge.qa_logger.get_file_name()))
+
+        # Metrics logged by the QA logger should also skip location capture
+        with open(pge.qa_logger.get_file_name(), 'r', encoding='utf-8') as infile:
+            qa_log_contents = infile.read()
+
+        self.assertIn(f'{LOCATION_NOT_CAPTURED}, "overall.elapsed_seconds', qa_log_contents)
+
+        # Sidecars should be written alongside both logs, with the SAS output
+        # captured by the main log
+        for logger in (pge.logger, pge.qa_logger):
+            self.assertTrue(os.path.exists(get_sidecar_filename(logger.get_file_name())))
+
+        sidecar_index = read_sidecar_index(get_sidecar_filename(pge.logger.get_file_name()))
+        self.assertEqual(len(sidecar_index['severity']['Info']),
+                         pge.logger.get_log_count_by_severity('Info'))
+
+        self.assertTrue(any('hello from primary executable' in record.get('description', record.get('raw'))
+                            for record in iter_sidecar_records(get_sidecar_filename(pge.logger.get_file_name()))))
+
+    def test_async_log_writer(self):
+        """
+        Test execution of the PgeExecutor with the logs written to journals
+        in the scratch directory by background threads.
+        """
+        runconfig_path = join(self.data_dir, 'test_sas_qa_config.yaml')
+
+        with open(runconfig_path, 'r', encoding='utf-8') as infile:
+            runconfig_dict = yaml.safe_load(infile)
+
+        runconfig_dict['RunConfig']['Groups']['PGE']['LoggingGroup'] = {
+            'AsyncWriter': True,
+            'FlushIntervalSeconds': 0.1,
+            'FlushThresholdBytes': 4096
+        }
+
+        test_runconfig_path = 'test_async_log_writer_config.yaml'
+
+        with open(test_runconfig_path, 'w', encoding='utf-8') as outfile:
+            yaml.safe_dump(runconfig_dict, outfile, sort_keys=False)
+
+        pge = PgeExecutor(pge_name='PgeAsyncLogTest', runconfig_path=test_runconfig_path)
+
+        pge.run()
+
+        self.assertEqual(pge.runconfig.log_flush_interval, 0.1)
+        self.assertEqual(pge.runconfig.log_flush_threshold, 4096)
+
+        for logger in (pge.logger, pge.qa_logger):
+            stream = logger.get_stream_object()
+
+            self.assertIsInstance(stream, AsyncLogStream)
+            self.assertEqual(stream.flush_interval, 0.1)
+            self.assertTrue(stream.closed)
+
+        # Journals should have been renamed to the final log locations
+        self.assertListEqual(
+            [filename for filename in os.listdir(pge.runconfig.scratch_path)
+             if filename.endswith(AsyncLogStream.JOURNAL_FILE_SUFFIX)],
+            []
+        )
+
+        with open(pge.logger.get_file_name(), 'r', encoding='utf-8') as infile:
+            log_contents = infile.read()
+
+        self.assertIn('Log file configuration complete', log_contents)
+        self.assertIn('hello from primary executable', log_contents)
+        self.assertIn('overall.elapsed_seconds', log_contents)
+
+        self.assertTrue(os.path.exists(pge.qa_logger.get_file_name()))
+
+    def test_log_compression(self):
+        """Test execution of the PgeExecutor with the finalized logs compressed"""
+        runconfig_path = join(self.data_dir, 'test_sas_qa_config.yaml')
+
+        with open(runconfig_path, 'r', encoding='utf-8') as infile:
+            runconfig_dict = yaml.safe_load(infile)
+
+        runconfig_dict['RunConfig']['Groups']['PGE']['LoggingGroup'] = {
+            'Compression': 'gzip',
+            'JsonLinesSidecar': True
+        }
+
+        test_runconfig_path = 'test_log_compression_config.yaml'
+
+        with open(test_runconfig_path, 'w', encoding='utf-8') as outfile:
+            yaml.safe_dump(runconfig_dict, outfile, sort_keys=False)
+
+        pge = PgeExecutor(pge_name='PgeLogCompressionTest', runconfig_path=test_runconfig_path)
+
+        pge.run()
+
+        self.assertTrue(pge._log_filename().endswith('.log.gz'))
+        self.assertTrue(pge._qa_log_filename().endswith('.qa.log.gz'))
+
+        self.assertEqual(pge.logger.get_file_name(),
+                         join(pge.runconfig.output_product_path, pge._log_filename()))
+
+        with gzip.open(pge.logger.get_file_name(), 'rt', encoding='utf-8') as infile:
+            log_contents = infile.read()
+
+        self.assertIn('hello from primary executable', log_contents)
+        self.assertIn('overall.elapsed_seconds', log_contents)
+
+        with gzip.open(pge.qa_logger.get_file_name(), 'rt', encoding='utf-8') as infile:
+            self.assertIn('overall.elapsed_seconds', infile.read())
+
+        # Sidecars should be named after the uncompressed logs
+        self.assertTrue(os.path.exists(pge.logger.get_file_name()[:-len('.gz')] + '.jsonl'))
+
+        # Unsupported compression formats should be caught by validation
+        runconfig_dict['RunConfig']['Groups']['PGE']['LoggingGroup']['Compression'] = 'bzip2'
+
+        with open(test_runconfig_path, 'w', encoding='utf-8') as outfile:
+            yaml.safe_dump(runconfig_dict, outfile, sort_keys=False)
+
+        pge = PgeExecutor(pge_name='PgeLogCompressionTest', runconfig_path=test_runconfig_path)
+
+        with self.assertRaises(RuntimeError):
+            pge.run()
+
+    def test_metrics_export(self):
+        """Test export of job metrics by the PgeExecutor"""
+        runconfig_path = join(self.data_dir, 'test_sas_qa_config.yaml')
+
+        with open(runconfig_path, 'r', encoding='utf-8') as infile:
+            runconfig_dict = yaml.safe_load(infile)
+
+        runconfig_dict['RunConfig']['Groups']['PGE']['MetricsGroup'] = {
+            'Exporters': ['json', 'prometheus']
+        }
+
+        test_runconfig_path = 'test_metrics_export_config.yaml'
+
+        with open(test_runconfig_path, 'w', encoding='utf-8') as outfile:
+            yaml.safe_dump(runconfig_dict, outfile, sort_keys=False)
+
+        pge = PgeExecutor(pge_name='PgeMetricsTest', runconfig_path=test_runconfig_path)
+
+        pge.run()
+
+        metrics_json = join(pge.runconfig.output_product_path, pge._metrics_filename('json'))
+        metrics_prom = join(pge.runconfig.output_product_path, pge._metrics_filename('prometheus'))
+
+        self.assertTrue(metrics_prom.endswith('.metrics.prom'))
+
+        with open(metrics_json, 'r', encoding='utf-8') as infile:
+            metrics = json.load(infile)
+
+        self.assertEqual(metrics['labels']['pge'], pge.name)
+        self.assertEqual(metrics['scopes']['pge']['timers']['sas.elapsed_seconds']['count'], 1)
+        self.assertEqual(metrics['scopes']['qa']['timers']['sas.qa.elapsed_seconds']['count'], 1)
+        self.assertIn('overall.os.max_rss_kb.main_process', metrics['scopes']['pge']['gauges'])
+
+        with open(metrics_prom, 'r', encoding='utf-8') as infile:
+            prometheus_lines = infile.read().splitlines()
+
+        self.assertIn('# TYPE opera_pge_sas_elapsed_seconds histogram', prometheus_lines)
+        self.assertTrue(any(line.startswith('opera_pge_overall_elapsed_seconds_count{')
+                            and 'scope="qa"' in line for line in prometheus_lines))
+
+    def test_trace_export(self):
+        """Test tracing of the PGE stages by the PgeExecutor"""
+        runconfig_path = join(self.data_dir, 'test_sas_qa_config.yaml')
+
+        with open(runconfig_path, 'r', encoding='utf-8') as infile:
+            runconfig_dict = yaml.safe_load(infile)
+
+        runconfig_dict['RunConfig']['Groups']['PGE']['MetricsGroup'] = {
+            'Trace': True
+        }
+
+        test_runconfig_path = 'test_trace_export_config.yaml'
+
+        with open(test_runconfig_path, 'w', encoding='utf-8') as outfile:
+            yaml.safe_dump(runconfig_dict, outfile, sort_keys=False)
+
+        pge = PgeExecutor(pge_name='PgeTraceTest', runconfig_path=test_runconfig_path)
+
+        pge.run()
+
+        trace_filepath = join(pge.runconfig.output_product_path, pge._trace_filename())
+
+        self.assertTrue(trace_filepath.endswith('.trace.json'))
+
+        with open(trace_filepath, 'r', encoding='utf-8') as infile:
+            trace = json.load(infile)
+
+        events = {event['name']: event for event in trace['traceEvents'] if event['ph'] == 'X'}
+
+        for span_name in ('run', 'run_preprocessor', 'run_sas_executable', 'sas.subprocess',
+                          'run_postprocessor', 'sas.qa.subprocess', '_stage_output_files', '_finalize_log'):
+            self.assertIn(span_name, events)
+
+        # The SAS subprocess should be nested within the step which runs it
+        sas_event = events['sas.subprocess']
+        step_event = events['run_sas_executable']
+
+        self.assertGreaterEqual(sas_event['ts'], step_event['ts'])
+        self.assertLessEqual(sas_event['ts'] + sas_event['dur'], step_event['ts'] + step_event['dur'])
+
+        # The flat summary of completed stages should be logged
+        with open(pge.logger.get_file_name(), 'r', encoding='utf-8') as infile:
+            log_contents = infile.read()
+
+        self.assertIn('trace.sas.subprocess.total_seconds', log_contents)
+        self.assertIn('trace.run_preprocessor.self_seconds', log_contents)
+        self.assertNotIn('trace.run.calls', log_contents)
+
+        # Without tracing enabled, neither should be produced
+        os.unlink(trace_filepath)
+
+        pge = PgeExecutor(pge_name='PgeTraceTest', runconfig_path=join(self.data_dir, 'test_sas_qa_config.yaml'))
+
+        pge.run()
+
+        self.assertFalse(exists(join(pge.runconfig.output_product_path, pge._trace_filename())))
+
     def test_input_files(self):
         """
         Test checking input files from the config.yaml file.
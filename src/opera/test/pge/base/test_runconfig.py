@@ -10,12 +10,16 @@ Unit tests for the pge/runconfig.py module.
 import os
 import tempfile
 import unittest
-from os.path import join
+from os.path import abspath, join
+from unittest.mock import patch
 
 from pkg_resources import resource_filename
 
+import yamale
 from yamale import YamaleError
 
+import yaml
+
 from opera.pge import RunConfig
 
 
@@ -122,6 +126,72 @@ class RunconfigTestCase(unittest.TestCase):
         except YamaleError as err:
             self.fail(str(err))
 
+    def test_single_parse_validation(self):
+        """
+        Test that validation uses the already parsed RunConfig, rather than
+        reading the file again
+        """
+        with patch.object(yaml, 'safe_load', side_effect=yaml.safe_load) as mock_safe_load:
+            runconfig = RunConfig(self.valid_config_full)
+
+        # The libyaml loader should be used when available
+        if yaml.__with_libyaml__:
+            mock_safe_load.assert_not_called()
+
+        with patch.object(yamale, 'make_data') as mock_make_data:
+            runconfig.validate()
+
+        mock_make_data.assert_not_called()
+
+    def test_typed_view(self):
+        """
+        Test the typed view of a parsed RunConfig, including the errors raised
+        for fields missing from the RunConfig
+        """
+        runconfig = RunConfig(self.valid_config_full)
+        view = runconfig.view
+
+        self.assertEqual(view.product_path_group.output_product_path, runconfig.output_product_path)
+        self.assertIs(view.sas, runconfig.sas_config)
+        self.assertListEqual(view.metrics_group.exporters, [])
+
+        # Views are immutable, and do not allow new attributes
+        with self.assertRaises(AttributeError):
+            view.product_path_group.scratch_path = '/tmp'
+
+        with self.assertRaises(AttributeError):
+            view.product_path_group.unknown_field = True
+
+        with self.assertRaises(AttributeError):
+            _ = view.product_path_group.unknown_field
+
+        # Remove a required field and a required group from the RunConfig
+        with open(self.valid_config_full, 'r', encoding='utf-8') as infile:
+            runconfig_dict = yaml.safe_load(infile)
+
+        del runconfig_dict['RunConfig']['Groups']['PGE']['ProductPathGroup']['ScratchPath']
+        del runconfig_dict['RunConfig']['Groups']['PGE']['QAExecutable']
+
+        with tempfile.NamedTemporaryFile(mode='w', prefix='runconfig_', suffix='.yaml') as outfile:
+            yaml.safe_dump(runconfig_dict, outfile, sort_keys=False)
+            outfile.flush()
+
+            runconfig = RunConfig(outfile.name)
+
+            # Fields which are present should still be accessible
+            self.assertEqual(runconfig.output_product_path, 'outputs/')
+
+            with self.assertRaises(RuntimeError) as context:
+                _ = runconfig.scratch_path
+
+            self.assertEqual(str(context.exception),
+                             f"Expected field 'ScratchPath' is missing from RunConfig {abspath(outfile.name)}")
+
+            with self.assertRaises(RuntimeError) as context:
+                _ = runconfig.qa_enabled
+
+            self.assertIn("Expected field 'QAExecutable' is missing", str(context.exception))
+
     def test_invalid_config_parse_and_validate(self):
         """
         Test validation of an invalid RunConfig to ensure common errors are
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+
+"""
+=====================
+test_log_analytics.py
+=====================
+
+Unit tests for the scripts/log_analytics.py module.
+"""
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from os.path import abspath, join
+from pathlib import Path
+
+from pkg_resources import resource_filename
+
+import yaml
+
+try:
+    import zstandard
+except (ImportError, ModuleNotFoundError):  # pragma: no cover
+    zstandard = None
+
+import opera
+from opera.pge import PgeExecutor
+from opera.scripts.log_analytics import aggregate_log_summaries
+from opera.scripts.log_analytics import collect_log_files
+from opera.scripts.log_analytics import iter_log_summaries
+from opera.scripts.log_analytics import log_analytics_main
+from opera.scripts.log_analytics import percentile
+from opera.scripts.log_analytics import summarize_log
+
+
+class LogAnalyticsTestCase(unittest.TestCase):
+    """Base test class using unittest"""
+
+    starting_dir = None
+    working_dir = None
+    test_dir = None
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Set up directories for testing"""
+        cls.starting_dir = abspath(os.curdir)
+        cls.test_dir = resource_filename(__name__, "")
+        cls.data_dir = join(cls.test_dir, os.pardir, "data")
+
+        os.chdir(cls.test_dir)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """At completion re-establish starting directory"""
+        os.chdir(cls.starting_dir)
+
+    def setUp(self) -> None:
+        """Use the temporary directory as the working directory"""
+        self.working_dir = tempfile.TemporaryDirectory(
+            prefix="test_log_analytics_", suffix='temp', dir=os.curdir
+        )
+        os.chdir(self.working_dir.name)
+
+        # Create dummy input files expected by test RunConfigs
+        os.mkdir('input')
+        Path('input/input_file01.h5').touch()
+        Path('input/input_file02.h5').touch()
+
+    def tearDown(self) -> None:
+        """Return to starting directory"""
+        os.chdir(self.test_dir)
+        self.working_dir.cleanup()
+
+    def _run_pge(self, name, source_runconfig='test_sas_qa_config.yaml', logging_group=None):
+        """
+        Runs the Base PGE with a copy of one of the test RunConfigs, with its
+        output/scratch locations relocated to a job-specific directory, and
+        returns the path to the resulting log.
+        """
+        with open(join(self.data_dir, source_runconfig), 'r', encoding='utf-8') as infile:
+            runconfig_dict = yaml.safe_load(infile)
+
+        pge_config = runconfig_dict['RunConfig']['Groups']['PGE']
+        pge_config['ProductPathGroup']['OutputProductPath'] = f'jobs/{name}/outputs/'
+        pge_config['ProductPathGroup']['ScratchPath'] = f'jobs/{name}/scratch/'
+
+        if logging_group:
+            pge_config['LoggingGroup'] = logging_group
+
+        runconfig_path = f'{name}.yaml'
+
+        with open(runconfig_path, 'w', encoding='utf-8') as outfile:
+            yaml.safe_dump(runconfig_dict, outfile, sort_keys=False)
+
+        pge = PgeExecutor(pge_name=name, runconfig_path=runconfig_path)
+
+        try:
+            pge.run()
+        except RuntimeError:
+            pass
+
+        return pge.logger.get_file_name()
+
+    def test_percentile(self):
+        """Test interpolation of percentiles"""
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+
+        self.assertEqual(percentile(values, 0), 1.0)
+        self.assertEqual(percentile(values, 50), 3.0)
+        self.assertEqual(percentile(values, 100), 5.0)
+        self.assertAlmostEqual(percentile(values, 95), 4.8)
+        self.assertEqual(percentile([7.0], 99), 7.0)
+
+        with self.assertRaises(ValueError):
+            percentile([], 50)
+
+    def test_summarize_log(self):
+        """Test reduction of PGE logs, with and without sidecars"""
+        log_file = self._run_pge('job_ok')
+        sidecar_log_file = self._run_pge('job_sidecar', logging_group={'JsonLinesSidecar': True,
+                                                                       'Compression': 'gzip'})
+        failed_log_file = self._run_pge('job_failed', source_runconfig='test_sas_error_config.yaml')
+
+        log_summary = summarize_log(log_file)
+
+        self.assertIsNone(log_summary['error'])
+        self.assertEqual(log_summary['pge'], 'BasePge')
+        self.assertEqual(log_summary['pge_version'], opera.__version__)
+        self.assertEqual(log_summary['sas_version'], PgeExecutor.SAS_VERSION)
+        self.assertFalse(log_summary['failed'])
+        self.assertIn('sas.elapsed_seconds', log_summary['metrics'])
+        self.assertIn('overall.elapsed_seconds', log_summary['metrics'])
+        self.assertEqual(log_summary['error_codes']['SAS_PROGRAM_COMPLETED'], 1)
+
+        # The sidecar should be read in place of the compressed log, with the same result
+        self.assertTrue(sidecar_log_file.endswith('.log.gz'))
+
+        with_sidecar = summarize_log(sidecar_log_file)
+        without_sidecar = summarize_log(sidecar_log_file, use_sidecar=False)
+
+        self.assertDictEqual(with_sidecar['error_codes'], without_sidecar['error_codes'])
+        self.assertDictEqual(with_sidecar['metrics'], without_sidecar['metrics'])
+        self.assertEqual(with_sidecar['pge_version'], opera.__version__)
+
+        failed_summary = summarize_log(failed_log_file)
+
+        self.assertTrue(failed_summary['failed'])
+        self.assertEqual(failed_summary['error_codes']['SAS_PROGRAM_FAILED'], 1)
+
+        # Logs which cannot be read are reported rather than raising
+        with open('corrupt.log.gz', 'wb') as outfile:
+            outfile.write(b'not a gzip file')
+
+        self.assertIsNotNone(summarize_log('corrupt.log.gz')['error'])
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed on the local instance")
+    def test_summarize_corrupt_zstd_log(self):
+        """Test that corrupt zstd-compressed logs are reported rather than raising"""
+        with open('corrupt.log.zst', 'wb') as outfile:
+            outfile.write(b'\x28\xb5\x2f\xfd' + b'not a zstd frame' * 4)
+
+        log_summary = summarize_log('corrupt.log.zst')
+
+        self.assertEqual(log_summary['log_file'], 'corrupt.log.zst')
+        self.assertTrue(log_summary['error'].startswith('ZstdError'))
+
+        # A corrupt log should not abort the summaries of the others
+        log_file = self._run_pge('job_ok')
+        log_summaries = list(iter_log_summaries(['corrupt.log.zst', log_file], max_workers=1))
+
+        self.assertIsNotNone(log_summaries[0]['error'])
+        self.assertIsNone(log_summaries[1]['error'])
+
+    def test_aggregate_log_summaries(self):
+        """Test aggregation of statistics over a set of PGE logs"""
+        for index in range(3):
+            self._run_pge(f'job_{index}')
+
+        self._run_pge('job_failed', source_runconfig='test_sas_error_config.yaml')
+
+        log_files = collect_log_files(['jobs'])
+
+        self.assertTrue(all(log_file.endswith('.log') for log_file in log_files))
+
+        report = aggregate_log_summaries(iter_log_summaries(log_files, max_workers=2))
+
+        self.assertEqual(report['log_count'], len(log_files))
+        self.assertListEqual(report['unreadable'], [])
+
+        pge_report = report['pges']['BasePge']
+
+        self.assertEqual(pge_report['log_count'], 4)
+        self.assertEqual(pge_report['failed_count'], 1)
+        self.assertAlmostEqual(pge_report['failure_rate'], 0.25)
+        self.assertListEqual(
+            [(version['pge_version'], version['sas_version']) for version in pge_report['versions']],
+            [(opera.__version__, PgeExecutor.SAS_VERSION)]
+        )
+
+        elapsed_stats = pge_report['metrics']['sas.elapsed_seconds']
+
+        self.assertEqual(elapsed_stats['count'], 3)
+        self.assertLessEqual(elapsed_stats['min'], elapsed_stats['p50'])
+        self.assertLessEqual(elapsed_stats['p50'], elapsed_stats['p95'])
+        self.assertLessEqual(elapsed_stats['p99'], elapsed_stats['max'])
+        self.assertTrue(any(metric_name.startswith('overall.os.max_rss_kb.') for metric_name in pge_report['metrics']))
+        self.assertNotIn('overall.log_messages.info', pge_report['metrics'])
+        self.assertEqual(pge_report['error_codes']['SAS_PROGRAM_STARTING'], 4)
+
+        # QA logs do not record the PGE version, so are grouped by their workflow
+        self.assertEqual(report['pges']['qa_logger']['log_count'], 3)
+
+    def test_log_analytics_main(self):
+        """Test the log analytics entry point"""
+        self._run_pge('job_ok')
+
+        self.assertEqual(log_analytics_main(['jobs', '-j', '1', '-f', 'json', '-o', 'report.json',
+                                             '-m', 'overall.log_messages.*']), 0)
+
+        with open('report.json', 'r', encoding='utf-8') as infile:
+            report = json.load(infile)
+
+        self.assertIn('overall.log_messages.info', report['pges']['BasePge']['metrics'])
+        self.assertNotIn('sas.elapsed_seconds', report['pges']['BasePge']['metrics'])
+
+        with redirect_stdout(StringIO()) as stdout:
+            log_analytics_main(['jobs/*/outputs/*.log', '-j', '1'])
+
+        table = stdout.getvalue()
+
+        self.assertIn('Logs analyzed: 2 (unreadable: 0)', table)
+        self.assertIn('sas.elapsed_seconds', table)
+        self.assertIn('SAS_PROGRAM_COMPLETED', table)
+
+
+if __name__ == "__main__":
+    unittest.main()
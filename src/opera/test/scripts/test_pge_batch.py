@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+"""
+=================
+test_pge_batch.py
+=================
+
+Unit tests for the scripts/pge_batch.py module.
+"""
+import json
+import os
+import tempfile
+import unittest
+from os.path import abspath, exists, join
+from pathlib import Path
+
+from pkg_resources import resource_filename
+
+import yaml
+
+from opera.scripts.pge_batch import JOB_FAILED, JOB_SKIPPED, JOB_SUCCEEDED
+from opera.scripts.pge_batch import collect_run_config_files
+from opera.scripts.pge_batch import find_output_conflicts
+from opera.scripts.pge_batch import pge_batch_main
+from opera.scripts.pge_batch import run_batch
+
+
+class PgeBatchTestCase(unittest.TestCase):
+    """Base test class using unittest"""
+
+    starting_dir = None
+    working_dir = None
+    test_dir = None
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Set up directories for testing"""
+        cls.starting_dir = abspath(os.curdir)
+        cls.test_dir = resource_filename(__name__, "")
+        cls.data_dir = join(cls.test_dir, os.pardir, "data")
+
+        os.chdir(cls.test_dir)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """At completion re-establish starting directory"""
+        os.chdir(cls.starting_dir)
+
+    def setUp(self) -> None:
+        """Use the temporary directory as the working directory"""
+        self.working_dir = tempfile.TemporaryDirectory(
+            prefix="test_pge_batch_", suffix='temp', dir=os.curdir
+        )
+        os.chdir(self.working_dir.name)
+
+        # Create dummy input files expected by test RunConfigs
+        os.mkdir('input')
+        Path('input/input_file01.h5').touch()
+        Path('input/input_file02.h5').touch()
+
+        os.mkdir('runconfigs')
+
+    def tearDown(self) -> None:
+        """Return to starting directory"""
+        os.chdir(self.test_dir)
+        self.working_dir.cleanup()
+
+    def _make_runconfig(self, name, output_dir, source_runconfig='test_base_pge_config.yaml'):
+        """
+        Creates a copy of one of the test RunConfigs within the runconfigs
+        directory, with its output/scratch locations relocated to the provided
+        output directory.
+        """
+        with open(join(self.data_dir, source_runconfig), 'r', encoding='utf-8') as infile:
+            runconfig_dict = yaml.safe_load(infile)
+
+        pge_config = runconfig_dict['RunConfig']['Groups']['PGE']
+        pge_config['ProductPathGroup']['OutputProductPath'] = f'{output_dir}/outputs/'
+        pge_config['ProductPathGroup']['ScratchPath'] = f'{output_dir}/scratch/'
+
+        if source_runconfig == 'test_base_pge_config.yaml':
+            pge_config['PrimaryExecutable']['ProgramOptions'] = [
+                f'hello world > {output_dir}/outputs/dswx_hls.tif;', '/bin/echo hello world'
+            ]
+
+        runconfig_path = join('runconfigs', f'{name}.yaml')
+
+        with open(runconfig_path, 'w', encoding='utf-8') as outfile:
+            yaml.safe_dump(runconfig_dict, outfile, sort_keys=False)
+
+        return abspath(runconfig_path)
+
+    def test_collect_run_config_files(self):
+        """Test expansion of the different RunConfig source types"""
+        runconfig_1 = self._make_runconfig('job_1', 'job_1')
+        runconfig_2 = self._make_runconfig('job_2', 'job_2')
+
+        # Directory source
+        self.assertListEqual(collect_run_config_files(['runconfigs']), [runconfig_1, runconfig_2])
+
+        # Glob source
+        self.assertListEqual(collect_run_config_files(['runconfigs/*_2.yaml']), [runconfig_2])
+
+        # Manifest source, including comments, blank lines and a duplicate entry
+        with open('manifest.txt', 'w', encoding='utf-8') as outfile:
+            outfile.write('# batch manifest\n\nrunconfigs/job_2.yaml\nrunconfigs/job_1.yaml\n')
+
+        self.assertListEqual(
+            collect_run_config_files(['manifest.txt', runconfig_2]), [runconfig_2, runconfig_1]
+        )
+
+        with self.assertRaises(FileNotFoundError):
+            collect_run_config_files(['does_not_exist.yaml'])
+
+    def test_find_output_conflicts(self):
+        """Test detection of RunConfigs sharing output locations"""
+        runconfig_1 = self._make_runconfig('job_1', 'job_1')
+        runconfig_2 = self._make_runconfig('job_2', 'job_2')
+        runconfig_3 = self._make_runconfig('job_3', 'job_1')
+
+        conflicts = find_output_conflicts([runconfig_1, runconfig_2, runconfig_3])
+
+        self.assertListEqual(list(conflicts.keys()), [runconfig_3])
+        self.assertIn(runconfig_1, conflicts[runconfig_3])
+
+    def test_run_batch(self):
+        """Test execution of a batch of PGE jobs"""
+        runconfigs = [self._make_runconfig(f'job_{index}', f'job_{index}') for index in range(3)]
+
+        # Add a job which fails, and one that conflicts with the first job
+        runconfigs.append(self._make_runconfig('job_failing', 'job_failing', 'test_sas_error_config.yaml'))
+        runconfigs.append(self._make_runconfig('job_conflict', 'job_0'))
+
+        job_statuses = run_batch(runconfigs, max_workers=2)
+
+        self.assertListEqual(
+            [job_status['status'] for job_status in job_statuses],
+            [JOB_SUCCEEDED, JOB_SUCCEEDED, JOB_SUCCEEDED, JOB_FAILED, JOB_SKIPPED]
+        )
+
+        # Each successful job should have its own log, within its own output location
+        for index, job_status in enumerate(job_statuses[:3]):
+            self.assertIsNone(job_status['error'])
+            self.assertTrue(exists(job_status['log_file']))
+            self.assertIn(abspath(f'job_{index}/outputs'), abspath(job_status['log_file']))
+
+            with open(job_status['log_file'], 'r', encoding='utf-8') as infile:
+                self.assertIn('hello world', infile.read())
+
+        self.assertIn('failed with exit code 123', job_statuses[3]['error'])
+        self.assertTrue(exists(job_statuses[3]['log_file']))
+
+    def test_pge_batch_main(self):
+        """Test the command-line entry point for batch execution"""
+        self._make_runconfig('job_1', 'job_1')
+        self._make_runconfig('job_2', 'job_2')
+
+        exit_status = pge_batch_main(['runconfigs', '-j', '2', '-s', 'summary.json'])
+
+        self.assertEqual(exit_status, 0)
+
+        with open('summary.json', 'r', encoding='utf-8') as infile:
+            summary = json.load(infile)
+
+        self.assertEqual(len(summary), 2)
+        self.assertTrue(all(job_status['status'] == JOB_SUCCEEDED for job_status in summary))
+
+        # A batch containing a failed job should return a non-zero status
+        self._make_runconfig('job_3', 'job_3', 'test_sas_error_config.yaml')
+
+        self.assertEqual(pge_batch_main(['runconfigs/job_3.yaml']), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
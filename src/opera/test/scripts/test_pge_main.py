@@ -13,6 +13,7 @@ import tempfile
 import unittest
 from os.path import abspath, join
 from pathlib import Path
+from unittest.mock import patch
 
 from pkg_resources import resource_filename
 
@@ -176,6 +177,14 @@ class PgeMainTestCase(unittest.TestCase):
         # Verify that a bad filename raises an error
         self.assertRaises(FileNotFoundError, pge_start, "abc")
 
+    def test_pge_start_single_parse(self):
+        """Verifies that the RunConfig loaded by pge_start() is reused by the PGE"""
+        with patch.object(RunConfig, '_parse_run_config_file',
+                          side_effect=RunConfig._parse_run_config_file) as mock_parse:
+            pge_start(self.config_file)
+
+        mock_parse.assert_called_once_with(self.config_file)
+
     def test_pge_main(self):
         """Verifies command line start up of pge_main"""
         cmd = [str(pge_main).split("'")[3], '-f', join(self.data_dir, 'test_base_pge_config.yaml')]
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+
+"""
+==================
+test_pge_worker.py
+==================
+
+Unit tests for the scripts/pge_worker.py module.
+"""
+import json
+import os
+import signal
+import tempfile
+import unittest
+from os.path import abspath, exists, join
+from pathlib import Path
+from unittest.mock import patch
+
+from pkg_resources import resource_filename
+
+import yaml
+
+from opera.scripts.pge_batch import JOB_FAILED, JOB_SUCCEEDED
+from opera.scripts.pge_worker import PgeWorker
+from opera.scripts.pge_worker import SPOOL_SUBDIRECTORIES
+from opera.scripts.pge_worker import _run_spooled_job
+from opera.scripts.pge_worker import pge_worker_main
+from opera.scripts.pge_worker import preload_pge_modules
+from opera.scripts.pge_worker import preload_schemas
+
+
+class PgeWorkerTestCase(unittest.TestCase):
+    """Base test class using unittest"""
+
+    starting_dir = None
+    working_dir = None
+    test_dir = None
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Set up directories for testing"""
+        cls.starting_dir = abspath(os.curdir)
+        cls.test_dir = resource_filename(__name__, "")
+        cls.data_dir = join(cls.test_dir, os.pardir, "data")
+
+        os.chdir(cls.test_dir)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """At completion re-establish starting directory"""
+        os.chdir(cls.starting_dir)
+
+    def setUp(self) -> None:
+        """Use the temporary directory as the working directory"""
+        self.working_dir = tempfile.TemporaryDirectory(
+            prefix="test_pge_worker_", suffix='temp', dir=os.curdir
+        )
+        os.chdir(self.working_dir.name)
+
+        # Create dummy input files expected by test RunConfigs
+        os.mkdir('input')
+        Path('input/input_file01.h5').touch()
+        Path('input/input_file02.h5').touch()
+
+    def tearDown(self) -> None:
+        """Return to starting directory"""
+        os.chdir(self.test_dir)
+        self.working_dir.cleanup()
+
+    def _submit_runconfig(self, name, output_dir, source_runconfig='test_base_pge_config.yaml', extension='.yaml'):
+        """
+        Submits a copy of one of the test RunConfigs to the incoming spool
+        directory, with its output/scratch locations relocated to the provided
+        output directory.
+        """
+        with open(join(self.data_dir, source_runconfig), 'r', encoding='utf-8') as infile:
+            runconfig_dict = yaml.safe_load(infile)
+
+        pge_config = runconfig_dict['RunConfig']['Groups']['PGE']
+        pge_config['ProductPathGroup']['OutputProductPath'] = f'{abspath(output_dir)}/outputs/'
+        pge_config['ProductPathGroup']['ScratchPath'] = f'{abspath(output_dir)}/scratch/'
+
+        if source_runconfig == 'test_base_pge_config.yaml':
+            pge_config['PrimaryExecutable']['ProgramOptions'] = [
+                f'hello world > {abspath(output_dir)}/outputs/dswx_hls.tif;', '/bin/echo hello world'
+            ]
+
+        # Write outside the spool and rename in, as a real submitter should
+        staging_path = f'{name}{extension}'
+
+        with open(staging_path, 'w', encoding='utf-8') as outfile:
+            yaml.safe_dump(runconfig_dict, outfile, sort_keys=False)
+
+        os.rename(staging_path, join('spool', 'incoming', f'{name}{extension}'))
+
+    def test_preload_pge_modules(self):
+        """Test preloading of the PGE modules"""
+        import_errors = preload_pge_modules()
+
+        # The base PGE has no optional dependencies, so it should always load
+        self.assertNotIn('BASE_PGE', import_errors)
+
+        schema_files = preload_schemas()
+
+        self.assertTrue(any(schema_file.endswith('dswx_hls_sas_schema.yaml') for schema_file in schema_files))
+
+    def test_pge_worker(self):
+        """Test processing of spooled jobs by the worker"""
+        worker = PgeWorker('spool', max_jobs=2, poll_interval=0.1)
+
+        for subdirectory in SPOOL_SUBDIRECTORIES:
+            self.assertTrue(exists(join('spool', subdirectory)))
+
+        self._submit_runconfig('job_1', 'job_1')
+        self._submit_runconfig('job_2', 'job_2')
+        self._submit_runconfig('job_failing', 'job_failing', 'test_sas_error_config.yaml')
+
+        # Non-RunConfig files should be left alone
+        Path('spool/incoming/notes.txt').touch()
+
+        job_statuses = worker.run(run_once=True)
+
+        self.assertEqual(len(job_statuses), 3)
+
+        self.assertListEqual(sorted(os.listdir('spool/incoming')), ['notes.txt'])
+        self.assertListEqual(os.listdir('spool/running'), [])
+        self.assertListEqual(sorted(os.listdir('spool/done')), ['job_1.yaml', 'job_2.yaml'])
+        self.assertListEqual(os.listdir('spool/failed'), ['job_failing.yaml'])
+
+        for job_name in ('job_1', 'job_2'):
+            with open(join('spool', 'status', f'{job_name}.yaml.json'), 'r', encoding='utf-8') as infile:
+                job_status = json.load(infile)
+
+            self.assertEqual(job_status['status'], JOB_SUCCEEDED)
+            self.assertEqual(job_status['exit_code'], 0)
+            self.assertEqual(job_status['worker_pid'], os.getpid())
+            self.assertEqual(job_status['run_config'], abspath(join('spool', 'done', f'{job_name}.yaml')))
+            self.assertIn(abspath(f'{job_name}/outputs'), job_status['log_file'])
+
+        with open(join('spool', 'status', 'job_failing.yaml.json'), 'r', encoding='utf-8') as infile:
+            job_status = json.load(infile)
+
+        self.assertEqual(job_status['status'], JOB_FAILED)
+        self.assertIn('failed with exit code 123', job_status['error'])
+
+        # A worker which has been asked to shut down should not claim new jobs
+        self._submit_runconfig('job_3', 'job_3')
+
+        worker.request_shutdown()
+
+        self.assertListEqual(worker.run(), [])
+        self.assertListEqual(sorted(os.listdir('spool/incoming')), ['job_3.yaml', 'notes.txt'])
+
+    def test_status_file_names(self):
+        """Test that RunConfigs differing only in extension get their own status files"""
+        worker = PgeWorker('spool', max_jobs=2, poll_interval=0.1)
+
+        self._submit_runconfig('job_1', 'job_1')
+        self._submit_runconfig('job_1', 'job_1_failing', 'test_sas_error_config.yaml', extension='.yml')
+
+        job_statuses = worker.run(run_once=True)
+
+        self.assertEqual(len(job_statuses), 2)
+        self.assertListEqual(sorted(os.listdir('spool/status')), ['job_1.yaml.json', 'job_1.yml.json'])
+
+        with open(join('spool', 'status', 'job_1.yaml.json'), 'r', encoding='utf-8') as infile:
+            self.assertEqual(json.load(infile)['status'], JOB_SUCCEEDED)
+
+        with open(join('spool', 'status', 'job_1.yml.json'), 'r', encoding='utf-8') as infile:
+            self.assertEqual(json.load(infile)['status'], JOB_FAILED)
+
+        self.assertListEqual(os.listdir('spool/done'), ['job_1.yaml'])
+        self.assertListEqual(os.listdir('spool/failed'), ['job_1.yml'])
+
+    def test_run_spooled_job_signal_handling(self):
+        """Test that jobs do not inherit the shutdown handler of the worker"""
+        worker = PgeWorker('spool')
+        job_handlers = {}
+
+        def _run_pge_job(run_config_path, job_id):
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                job_handlers[signum] = signal.getsignal(signum)
+
+            return {'status': JOB_SUCCEEDED, 'run_config': run_config_path, 'job_id': job_id}
+
+        previous_handlers = {signum: signal.signal(signum, worker.request_shutdown)
+                             for signum in (signal.SIGTERM, signal.SIGINT)}
+
+        try:
+            with patch('opera.scripts.pge_worker.run_pge_job', _run_pge_job):
+                _run_spooled_job('job_1.yaml', join('spool', 'status', 'job_1.yaml.json'), 1)
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+        self.assertEqual(job_handlers[signal.SIGTERM], signal.SIG_DFL)
+        self.assertEqual(job_handlers[signal.SIGINT], signal.default_int_handler)
+
+    def test_pge_worker_main(self):
+        """Test the command-line entry point for the worker"""
+        os.makedirs(join('spool', 'incoming'))
+        self._submit_runconfig('job_1', 'job_1')
+
+        pge_worker_main(['spool', '--once', '-p', '0.1'])
+
+        self.assertListEqual(os.listdir('spool/done'), ['job_1.yaml'])
+        self.assertTrue(exists(join('spool', 'status', 'job_1.yaml.json')))
+
+
+if __name__ == "__main__":
+    unittest.main()
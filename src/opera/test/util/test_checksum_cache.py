@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+"""
+======================
+test_checksum_cache.py
+======================
+
+Unit tests for the util/checksum_cache.py module.
+"""
+import hashlib
+import os
+import tempfile
+import unittest
+from os.path import abspath
+from unittest.mock import patch
+
+from pkg_resources import resource_filename
+
+from opera.util import run_utils
+from opera.util.checksum_cache import ChecksumCache
+from opera.util.run_utils import get_checksums
+from opera.util.run_utils import get_digests
+
+
+class ChecksumCacheTestCase(unittest.TestCase):
+    """Base test class using unittest"""
+
+    starting_dir = None
+    working_dir = None
+    test_dir = None
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Set up directories for testing"""
+        cls.starting_dir = abspath(os.curdir)
+        cls.test_dir = resource_filename(__name__, "")
+
+        os.chdir(cls.test_dir)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """At completion re-establish starting directory"""
+        os.chdir(cls.starting_dir)
+
+    def setUp(self) -> None:
+        """Use the temporary directory as the working directory"""
+        self.working_dir = tempfile.TemporaryDirectory(
+            prefix="test_checksum_cache_", suffix='temp', dir=os.curdir
+        )
+        os.chdir(self.working_dir.name)
+
+    def tearDown(self) -> None:
+        """Return to starting directory"""
+        os.chdir(self.test_dir)
+        self.working_dir.cleanup()
+
+    def test_checksum_cache(self):
+        """Tests for the ChecksumCache class"""
+        with open('product.bin', 'wb') as outfile:
+            outfile.write(b'hello world')
+
+        file_stat = os.stat('product.bin')
+
+        with ChecksumCache('cache/checksums.db') as cache:
+            self.assertTrue(os.path.exists('cache/checksums.db'))
+            self.assertIsNone(cache.get(file_stat, 'md5'))
+
+            cache.put(file_stat, {'md5': 'abc', 'sha256': 'def'})
+
+            self.assertEqual(cache.get(file_stat, 'md5'), 'abc')
+            self.assertEqual(cache.get(file_stat, 'sha256'), 'def')
+            self.assertIsNone(cache.get(file_stat, 'sha1'))
+
+            self.assertEqual(cache.hits, 2)
+            self.assertEqual(cache.misses, 2)
+
+        # Entries should persist across instances, but be invalidated when the
+        # file changes
+        with ChecksumCache('cache/checksums.db') as cache:
+            self.assertEqual(cache.get(file_stat, 'md5'), 'abc')
+
+            with open('product.bin', 'ab') as outfile:
+                outfile.write(b'!')
+
+            self.assertIsNone(cache.get(os.stat('product.bin'), 'md5'))
+
+    def test_get_digests_with_cache(self):
+        """Tests for use of a ChecksumCache by run_utils.get_digests()/get_checksums()"""
+        contents = os.urandom(4096)
+
+        with open('product.bin', 'wb') as outfile:
+            outfile.write(contents)
+
+        with ChecksumCache('checksums.db') as cache:
+            self.assertDictEqual(
+                get_digests('product.bin', ['md5'], cache=cache),
+                {'md5': hashlib.md5(contents).hexdigest()}
+            )
+
+            # A fully cached file should not be read at all, while a partially
+            # cached file should only compute the missing digests
+            with patch.object(run_utils, 'create_hasher', wraps=run_utils.create_hasher) as mock_create_hasher:
+                checksums = get_checksums(['product.bin'], cache=cache)
+                mock_create_hasher.assert_not_called()
+
+                digests = get_digests('product.bin', ['md5', 'sha256'], cache=cache)
+                mock_create_hasher.assert_called_once_with('sha256')
+
+            self.assertDictEqual(checksums, {'product.bin': hashlib.md5(contents).hexdigest()})
+            self.assertDictEqual(digests, {'md5': hashlib.md5(contents).hexdigest(),
+                                           'sha256': hashlib.sha256(contents).hexdigest()})
+
+            # Modifying the file should force the checksums to be recomputed
+            with open('product.bin', 'wb') as outfile:
+                outfile.write(contents[::-1])
+
+            self.assertEqual(get_checksums(['product.bin'], cache=cache)['product.bin'],
+                             hashlib.md5(contents[::-1]).hexdigest())
+
+
+if __name__ == "__main__":
+    unittest.main()
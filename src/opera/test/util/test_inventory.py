@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+"""
+=================
+test_inventory.py
+=================
+
+Unit tests for the util/inventory.py module.
+"""
+import os
+import tempfile
+import unittest
+from os.path import abspath
+from pathlib import Path
+
+from pkg_resources import resource_filename
+
+from opera.util.inventory import InputInventory, ProductInventory
+
+
+class InventoryTestCase(unittest.TestCase):
+    """Base test class using unittest"""
+
+    starting_dir = None
+    working_dir = None
+    test_dir = None
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Set up directories for testing"""
+        cls.starting_dir = abspath(os.curdir)
+        cls.test_dir = resource_filename(__name__, "")
+
+        os.chdir(cls.test_dir)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """At completion re-establish starting directory"""
+        os.chdir(cls.starting_dir)
+
+    def setUp(self) -> None:
+        """Use the temporary directory as the working directory, and populate an output location"""
+        self.working_dir = tempfile.TemporaryDirectory(
+            prefix="test_inventory_", suffix='temp', dir=os.curdir
+        )
+        os.chdir(self.working_dir.name)
+
+        os.makedirs('output/burst_1')
+        os.makedirs('output/scratch')
+        os.makedirs('output/scratch_products')
+
+        Path('output/product_1.tif').write_bytes(b'1' * 10)
+        Path('output/product_2.tiff').touch()
+        Path('output/burst_1/product_3.nc').write_bytes(b'3' * 30)
+        Path('output/scratch_products/product_4.tif').touch()
+        Path('output/.hidden.tif').touch()
+        Path('output/scratch/intermediate.tif').touch()
+
+    def tearDown(self) -> None:
+        """Return to starting directory"""
+        os.chdir(self.test_dir)
+        self.working_dir.cleanup()
+
+    def test_scan(self):
+        """Test the cached scan of an output location"""
+        inventory = ProductInventory('output', exclude_paths=['output/scratch'], patterns=['*.tif*', '*.nc'])
+
+        expected_products = [abspath(path) for path in ('output/burst_1/product_3.nc', 'output/product_1.tif',
+                                                        'output/product_2.tiff',
+                                                        'output/scratch_products/product_4.tif')]
+
+        self.assertListEqual(inventory.filenames(), expected_products)
+        self.assertEqual(len(inventory), 4)
+
+        entry = inventory.get('output/burst_1/product_3.nc')
+        self.assertEqual(entry.size, 30)
+        self.assertEqual(entry.extension, '.nc')
+        self.assertEqual(entry.pattern, '*.nc')
+        self.assertEqual(entry.mtime_ns, os.stat('output/burst_1/product_3.nc').st_mtime_ns)
+
+        self.assertListEqual(inventory.by_extension('.tif'),
+                             [abspath('output/product_1.tif'), abspath('output/scratch_products/product_4.tif')])
+        self.assertListEqual(inventory.by_extension('.tiff', '.nc'), [expected_products[0], expected_products[2]])
+        self.assertListEqual(inventory.by_pattern('*.tif*'), expected_products[1:])
+        self.assertListEqual(inventory.by_extension('.h5'), [])
+
+        # Lookups should be served from the cached scan
+        Path('output/product_5.tif').touch()
+
+        self.assertNotIn('output/product_5.tif', inventory)
+        self.assertEqual(inventory.scan_count, 1)
+
+        # Until the inventory is invalidated
+        inventory.invalidate()
+
+        self.assertIn('output/product_5.tif', inventory)
+        self.assertEqual(inventory.scan_count, 2)
+
+    def test_updates(self):
+        """Test recording of changes to the products within an output location"""
+        inventory = ProductInventory('output', exclude_paths=['output/scratch'], patterns=['*.tif*'])
+
+        self.assertEqual(inventory.get('output/product_2.tiff').size, 0)
+
+        # Modification of a product
+        Path('output/product_2.tiff').write_bytes(b'2' * 20)
+        self.assertEqual(inventory.update('output/product_2.tiff').size, 20)
+        self.assertEqual(inventory.get('output/product_2.tiff').size, 20)
+
+        # Renaming of a product, including to a location that is not a product
+        os.rename('output/product_1.tif', 'output/renamed_1.tif')
+        entry = inventory.rename('output/product_1.tif', 'output/renamed_1.tif')
+
+        self.assertEqual(entry.path, abspath('output/renamed_1.tif'))
+        self.assertEqual(entry.size, 10)
+        self.assertEqual(entry.pattern, '*.tif*')
+        self.assertNotIn('output/product_1.tif', inventory)
+        self.assertIn(abspath('output/renamed_1.tif'), inventory.by_extension('.tif'))
+
+        os.rename('output/renamed_1.tif', 'output/scratch/renamed_1.tif')
+        self.assertIsNone(inventory.rename('output/renamed_1.tif', 'output/scratch/renamed_1.tif'))
+        self.assertNotIn(abspath('output/renamed_1.tif'), inventory.by_pattern('*.tif*'))
+
+        # Removal of a product
+        os.unlink('output/product_2.tiff')
+        inventory.remove('output/product_2.tiff')
+
+        self.assertListEqual(inventory.filenames(), [abspath('output/burst_1/product_3.nc'),
+                                                     abspath('output/scratch_products/product_4.tif')])
+        self.assertEqual(inventory.scan_count, 1)
+
+    def test_input_inventory(self):
+        """Test enumeration of input files and directories"""
+        os.makedirs('input/T22VEQ/.hidden_dir')
+        Path('input/HLS.B01.tif').write_bytes(b'1' * 10)
+        Path('input/HLS.B02.tif').touch()
+        Path('input/HLS.Fmask.tif').touch()
+        Path('input/manifest.txt').touch()
+        Path('input/.hidden.tif').touch()
+        Path('input/T22VEQ/HLS.B03.tif').touch()
+        Path('input/T22VEQ/.hidden_dir/HLS.B04.tif').touch()
+        Path('explicit.h5').touch()
+        Path('.explicit_hidden.h5').touch()
+
+        input_paths = ['explicit.h5', '.explicit_hidden.h5', 'input', 'missing.tif']
+
+        inventory = InputInventory(input_paths)
+
+        self.assertListEqual(inventory.filenames(), ['explicit.h5', 'input/HLS.B01.tif', 'input/HLS.B02.tif',
+                                                     'input/HLS.Fmask.tif', 'input/manifest.txt'])
+        self.assertListEqual(inventory.missing_paths(), ['missing.tif'])
+        self.assertTrue(inventory.exists('explicit.h5'))
+        self.assertTrue(inventory.exists('input'))
+        self.assertTrue(inventory.exists('.explicit_hidden.h5'))
+        self.assertFalse(inventory.exists('missing.tif'))
+        self.assertFalse(inventory.exists('never_provided.tif'))
+        self.assertTrue(inventory.isdir('input'))
+        self.assertFalse(inventory.isdir('explicit.h5'))
+        self.assertListEqual(inventory.files_in('input', '*.tif*'),
+                             ['input/HLS.B01.tif', 'input/HLS.B02.tif', 'input/HLS.Fmask.tif'])
+        self.assertListEqual(inventory.files_in('explicit.h5'), ['explicit.h5'])
+        self.assertEqual(inventory.get('input/HLS.B01.tif').size, 10)
+
+        # Input locations should only be scanned once
+        Path('input/HLS.B05.tif').touch()
+
+        self.assertNotIn('input/HLS.B05.tif', inventory.filenames())
+        self.assertEqual(inventory.scan_count, 1)
+
+        # Recursion and file name patterns only apply to the contents of directories
+        inventory = InputInventory(input_paths, recursive=True, include_patterns=['*.tif', '*.h5'],
+                                   exclude_patterns=['*Fmask*'])
+
+        self.assertListEqual(inventory.filenames(), ['explicit.h5', 'input/HLS.B01.tif', 'input/HLS.B02.tif',
+                                                     'input/HLS.B05.tif', 'input/T22VEQ/HLS.B03.tif'])
+
+        inventory = InputInventory(input_paths, exclude_patterns=['*.h5'])
+
+        self.assertIn('explicit.h5', inventory.filenames())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+"""
+==================
+test_log_filter.py
+==================
+
+Unit tests for the util/log_filter.py module.
+"""
+import unittest
+
+from opera.util.log_filter import RepeatedLineFilter
+
+
+def _entry(description, time_tag, severity='Warning', module='dswx_hls'):
+    """Returns a parsed log line entry"""
+    return severity, 'DSWx-HLS', module, 902007, 'loc:1', description, time_tag
+
+
+class LogFilterTestCase(unittest.TestCase):
+    """Base test class using unittest"""
+
+    def test_collapse_runs(self):
+        """Test collapsing of runs of identical lines"""
+        line_filter = RepeatedLineFilter()
+
+        entries = [
+            _entry('NaN encountered', 't1'),
+            _entry('NaN encountered', 't2'),
+            _entry('NaN encountered', 't3'),
+            _entry('NaN encountered', 't4', module='other_module'),
+            'unformatted output',
+            'unformatted output',
+            _entry('NaN encountered', 't5')
+        ]
+
+        released = line_filter.filter(entries)
+
+        # The final run is held back until flushed
+        self.assertEqual(len(released), 3)
+        self.assertEqual(released[0], _entry('NaN encountered (repeated 3 times, first at t1, last at t3)', 't1'))
+        self.assertEqual(released[1], _entry('NaN encountered', 't4', module='other_module'))
+        self.assertEqual(released[2], 'unformatted output (repeated 2 times)')
+
+        # Runs continue across calls
+        self.assertListEqual(line_filter.filter([_entry('NaN encountered', 't6')]), [])
+        self.assertListEqual(line_filter.flush(),
+                             [_entry('NaN encountered (repeated 2 times, first at t5, last at t6)', 't5')])
+        self.assertListEqual(line_filter.flush(), [])
+
+        self.assertEqual(line_filter.collapsed_line_count, 4)
+        self.assertEqual(line_filter.suppressed_line_count, 0)
+
+    def test_rate_limits(self):
+        """Test limiting of the lines matching a pattern"""
+        line_filter = RepeatedLineFilter(rate_limits=[('*projection*', 2), ('Warning 1:*', 0)],
+                                         collapse_runs=False)
+
+        entries = [_entry(f'projection warning {index}', f't{index}') for index in range(5)]
+        entries.append('Warning 1: raw GDAL warning')
+        entries.append(_entry('unrelated', 't5'))
+
+        released = line_filter.filter(entries)
+
+        self.assertListEqual(released, entries[:2] + [entries[-1]])
+        self.assertListEqual(line_filter.flush(), [])
+        self.assertListEqual(line_filter.pop_suppressed(),
+                             [('*projection*', 2, 3, 't2', 't4'), ('Warning 1:*', 0, 1, None, None)])
+        self.assertListEqual(line_filter.pop_suppressed(), [])
+        self.assertEqual(line_filter.suppressed_line_count, 4)
+
+        # Limits are cumulative across calls
+        self.assertListEqual(line_filter.filter([_entry('projection warning 5', 't5')]), [])
+
+    def test_collapse_and_rate_limit(self):
+        """Test that collapsed runs count as a single line against rate limits"""
+        line_filter = RepeatedLineFilter(rate_limits=[('*projection*', 1)])
+
+        entries = [_entry('projection warning', 't0')] * 3 + [_entry('other projection warning', 't1')]
+
+        released = line_filter.filter(entries) + line_filter.flush()
+
+        self.assertListEqual(
+            released, [_entry('projection warning (repeated 3 times, first at t0, last at t0)', 't0')]
+        )
+        self.assertEqual(line_filter.collapsed_line_count, 2)
+        self.assertEqual(line_filter.suppressed_line_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
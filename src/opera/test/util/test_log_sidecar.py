@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+"""
+===================
+test_log_sidecar.py
+===================
+
+Unit tests for the util/log_sidecar.py module.
+"""
+import json
+import os
+import tempfile
+import unittest
+from os.path import abspath, join
+
+from pkg_resources import resource_filename
+
+from opera.util.error_codes import ErrorCode
+from opera.util.log_sidecar import get_error_code_range
+from opera.util.log_sidecar import get_sidecar_filename
+from opera.util.log_sidecar import iter_sidecar_records
+from opera.util.log_sidecar import read_sidecar_index
+from opera.util.logger import PgeLogger
+
+
+class LogSidecarTestCase(unittest.TestCase):
+    """Base test class using unittest"""
+
+    starting_dir = None
+    working_dir = None
+    test_dir = None
+    data_dir = None
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Set up directories for testing"""
+        cls.starting_dir = abspath(os.curdir)
+        cls.test_dir = resource_filename(__name__, "")
+        cls.data_dir = join(cls.test_dir, os.pardir, "data")
+
+        os.chdir(cls.test_dir)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """At completion re-establish starting directory"""
+        os.chdir(cls.starting_dir)
+
+    def setUp(self) -> None:
+        """Use the temporary directory as the working directory"""
+        self.working_dir = tempfile.TemporaryDirectory(
+            prefix="test_log_sidecar_", suffix='temp', dir=os.curdir
+        )
+        os.chdir(self.working_dir.name)
+
+    def tearDown(self) -> None:
+        """Return to starting directory"""
+        os.chdir(self.test_dir)
+        self.working_dir.cleanup()
+
+    def test_get_error_code_range(self):
+        """Tests for log_sidecar.get_error_code_range()"""
+        self.assertEqual(get_error_code_range(900000 + ErrorCode.LOG_FILE_INIT_COMPLETE), 900000)
+        self.assertEqual(get_error_code_range(900000 + ErrorCode.LOGGED_WARNING_LINE), 902000)
+        self.assertEqual(get_error_code_range(800000 + ErrorCode.LOGGED_CRITICAL_LINE), 803000)
+
+    def test_pge_logger_sidecar(self):
+        """Tests for the JSON-lines sidecar written by a PgeLogger"""
+        logger = PgeLogger(workflow='test_workflow', log_filename='test.log')
+
+        # Messages logged before the sidecar is enabled should be carried over
+        logger.info('test_log_sidecar', ErrorCode.LOG_FILE_INIT_COMPLETE, 'Logged before sidecar')
+        logger.enable_sidecar()
+
+        logger.warning('test_log_sidecar', ErrorCode.LOGGED_WARNING_LINE, 'A "quoted" warning')
+        logger.append(join(self.data_dir, 'test_sas_log.txt'))
+        logger.append_line('unformatted SAS output')
+
+        logger.close_log_stream()
+
+        sidecar_filename = get_sidecar_filename(logger.get_file_name())
+        self.assertEqual(sidecar_filename, 'test.log.jsonl')
+
+        with open(sidecar_filename, 'r', encoding='utf-8') as infile:
+            sidecar_lines = infile.readlines()
+
+        with open(logger.get_file_name(), 'r', encoding='utf-8') as infile:
+            log_lines = infile.readlines()
+
+        # One record per log line, plus the trailing index record
+        self.assertEqual(len(sidecar_lines), len(log_lines) + 1)
+
+        records = list(iter_sidecar_records(sidecar_filename))
+        self.assertEqual(len(records), len(log_lines))
+
+        self.assertEqual(records[0]['description'], 'Logged before sidecar')
+        self.assertEqual(records[0]['error_code'], 900000 + ErrorCode.LOG_FILE_INIT_COMPLETE)
+        self.assertEqual(records[1]['description'], 'A "quoted" warning')
+        self.assertEqual(records[1]['workflow'], 'test_workflow')
+        self.assertIn({'raw': 'unformatted SAS output'}, records)
+
+        index = read_sidecar_index(sidecar_filename)
+
+        for severity, count in logger.get_log_count_by_severity_dict().items():
+            self.assertEqual(len(index['severity'].get(severity, [])), count)
+
+        # Seeking via the index should only return the requested records
+        critical_records = list(iter_sidecar_records(sidecar_filename, severity='Critical'))
+        self.assertEqual(len(critical_records), 2)
+        self.assertTrue(all(record['severity'] == 'Critical' for record in critical_records))
+
+        warning_code = 900000 + ErrorCode.LOGGED_WARNING_LINE
+        warning_records = list(iter_sidecar_records(sidecar_filename, error_code_range=warning_code))
+        self.assertEqual(len(warning_records), 3)
+        self.assertTrue(all(get_error_code_range(record['error_code']) == 902000
+                            for record in warning_records))
+
+        self.assertListEqual(
+            list(iter_sidecar_records(sidecar_filename, severity='Info', error_code_range=warning_code)),
+            []
+        )
+
+        # Each record should be standalone JSON
+        for line in sidecar_lines:
+            json.loads(line)
+
+        with open('not_a_sidecar.jsonl', 'w', encoding='utf-8') as outfile:
+            outfile.write('{"raw": "line"}\n')
+
+        with self.assertRaises(ValueError):
+            read_sidecar_index('not_a_sidecar.jsonl')
+
+
+if __name__ == "__main__":
+    unittest.main()
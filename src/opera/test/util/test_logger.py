@@ -8,23 +8,40 @@ test_logger.py
 Unit tests for the util/logger.py module.
 
 """
+import gzip
+import inspect
 import os
 import re
 import tempfile
+import time
 import unittest
 from io import StringIO
 from os.path import abspath, exists, join
 from random import randint
+from unittest.mock import patch
 
 from pkg_resources import resource_filename
 
+try:
+    import zstandard
+except (ImportError, ModuleNotFoundError):  # pragma: no cover
+    zstandard = None
+
 from opera.util.error_codes import (CODES_PER_RANGE,
                                     CRITICAL_RANGE_START,
                                     DEBUG_RANGE_START,
                                     ErrorCode,
                                     INFO_RANGE_START,
                                     WARNING_RANGE_START)
+from opera.util import log_streams
+from opera.util.log_streams import AsyncLogStream
+from opera.util.log_streams import SpillingLogStream
+from opera.util.log_streams import open_log_file
+from opera.util.logger import DeferredCriticalError
 from opera.util.logger import PgeLogger
+from opera.util.logger import DEFAULT_APPEND_BLOCK_SIZE
+from opera.util.logger import LOCATION_NOT_CAPTURED
+from opera.util.logger import get_caller_location
 from opera.util.logger import default_log_file_name
 from opera.util.logger import get_severity_from_error_code
 from opera.util.logger import standardize_severity_string
@@ -307,6 +324,35 @@ class LoggerTestCase(unittest.TestCase):
                 self.assertIn("test_pge_args", line)
                 self.assertIn("1717", line)
 
+    def test_defer_critical(self):
+        """Test deferral of critical messages while other work is still logging"""
+        self.logger.move('deferred.log')
+
+        with self.logger.defer_critical():
+            with self.assertRaises(DeferredCriticalError) as context:
+                self.logger.critical('opera_pge', 8, 'Deferred critical message')
+
+            # The log should remain open for other messages
+            self.logger.info('opera_pge', 4, 'Logged after the deferred critical')
+
+        err = context.exception
+
+        self.assertIsInstance(err, RuntimeError)
+        self.assertEqual((err.module, err.error_code_offset, err.description),
+                         ('opera_pge', 8, 'Deferred critical message'))
+        self.assertEqual(self.logger.get_critical_count(), 0)
+        self.assertFalse(self.logger.get_stream_object().closed)
+
+        # Outside the context, critical() logs and finalizes as usual
+        with self.assertRaises(RuntimeError):
+            self.logger.critical(err.module, err.error_code_offset, err.description)
+
+        log_contents = self._read_file('deferred.log')
+
+        self.assertEqual(log_contents.count('Deferred critical message'), 1)
+        self.assertLess(log_contents.index('Logged after the deferred critical'),
+                        log_contents.index('Deferred critical message'))
+
     def test_append_sas_log(self):
         """
         Test appending of a SAS-formatted log file to ensure contents are parsed
@@ -372,6 +418,319 @@ class LoggerTestCase(unittest.TestCase):
             self.assertEqual(self.logger.error_code_base,
                              int(error_code) - error_code_map[severity])
 
+    def test_append_bulk(self):
+        """
+        Test that appending a source in blocks produces the same log as
+        appending each line of the stripped source individually
+        """
+        with open(join(self.data_dir, "test_sas_log.txt"), 'r', encoding='utf-8') as infile:
+            sas_log = infile.read()
+
+        # Mix in lines which must fall back to the full parser, or be
+        # appended as-is, along with surrounding and interior blank lines
+        source = '\n  \n' + sas_log + '\n'.join([
+            '2022-04-04T22:55:01.4+00:00, ERROR, DSWx-HLS, dswx_hls, 999999, loc:1, \'nested "quotes"\'',
+            '2022-13-04 22:55:01.406, INFO, DSWx-HLS, dswx_hls, 999999, loc:2, "invalid month"',
+            '2022-04-04 22:55:01, Warn , DSWx-HLS, dswx_hls, 999999, loc:3, "no fractional seconds"',
+            '2022-04-04 22:55:01.406, VERBOSE, DSWx-HLS, dswx_hls, 999999, loc:4, "unknown severity"',
+            '',
+            'unformatted output  '
+        ]) + '\n\t\n'
+
+        expected_logger = PgeLogger()
+
+        for log_line in source.strip().split('\n'):
+            expected_logger.append_line(log_line)
+
+        for block_size in (1, 512, DEFAULT_APPEND_BLOCK_SIZE):
+            logger = PgeLogger()
+            logger.append(source, block_size=block_size)
+
+            self.assertEqual(logger.get_stream_object().getvalue(),
+                             expected_logger.get_stream_object().getvalue())
+            self.assertDictEqual(logger.get_log_count_by_severity_dict(),
+                                 expected_logger.get_log_count_by_severity_dict())
+
+        # An empty source still appends a single blank line
+        logger = PgeLogger()
+        logger.append('')
+        self.assertEqual(logger.get_stream_object().getvalue(), '\n')
+
+    def test_append_line_filter(self):
+        """Test deduplication and rate-limiting of appended lines"""
+        repeated_line = '2022-04-04 22:55:01.406, WARNING, DSWx-HLS, dswx_hls, 999999, loc:1, "NaN encountered"'
+        projection_line = '2022-04-04 22:55:02.000, WARNING, DSWx-HLS, dswx_hls, 999999, loc:2, "bad projection {}"'
+
+        source = '\n'.join([repeated_line] * 1000
+                           + [projection_line.format(index) for index in range(10)]
+                           + ['unformatted output'] * 3)
+
+        logger = PgeLogger()
+        logger.enable_line_filter(rate_limits=[('bad projection*', 4)])
+        logger.append(source, block_size=512)
+
+        log_lines = logger.get_stream_object().getvalue().splitlines()
+
+        self.assertEqual(len(log_lines), 7)
+        self.assertIn('"NaN encountered (repeated 1000 times, first at 2022-04-04T22:55:01.406000Z, '
+                      'last at 2022-04-04T22:55:01.406000Z)"', log_lines[0])
+        self.assertIn('"bad projection 3"', log_lines[4])
+        self.assertEqual(log_lines[5], 'unformatted output (repeated 3 times)')
+        self.assertIn(f', {logger.error_code_base + ErrorCode.LOGGED_LINES_SUPPRESSED}, ', log_lines[6])
+        self.assertIn("Suppressed 6 appended line(s) matching 'bad projection*' past the limit of 4", log_lines[6])
+
+        # Counts must include every appended line
+        self.assertEqual(logger.get_warning_count(), 1010)
+
+        # Runs of streamed lines are written out before any message logged by the PGE
+        logger = PgeLogger()
+        logger.enable_line_filter()
+
+        for _ in range(5):
+            logger.append_line(repeated_line)
+
+        self.assertEqual(logger.get_stream_object().getvalue(), '')
+
+        logger.info('opera_pge', ErrorCode.SAS_PROGRAM_COMPLETED, 'SAS complete')
+
+        log_lines = logger.get_stream_object().getvalue().splitlines()
+
+        self.assertIn('(repeated 5 times', log_lines[0])
+        self.assertIn('SAS complete', log_lines[1])
+        self.assertEqual(logger.get_warning_count(), 5)
+
+        logger.write_log_summary()
+
+        self.assertEqual(logger.metrics.get('overall.log_messages.collapsed').value, 4)
+        self.assertEqual(logger.metrics.get('overall.log_messages.warning').value, 5)
+
+    def _log_from_helper(self):
+        """Logs a message on behalf of the caller, one frame back"""
+        self.logger.log('opera_pge', 4, 'Logged from helper', additional_back_frames=1)
+
+    def test_location_capture(self):
+        """Test capture of call-site locations, and disabling thereof by error code"""
+        self.assertEqual(get_caller_location(), f'{__file__}:{inspect.currentframe().f_lineno}')
+
+        expected_line = inspect.currentframe().f_lineno + 1
+        self.logger.info('opera_pge', 4, 'Logged directly')
+        self._log_from_helper()
+        self._log_from_helper()
+
+        log_lines = self.logger.get_stream_object().getvalue().splitlines()
+
+        self.assertIn(f'{__file__}:{expected_line}, "Logged directly"', log_lines[0])
+        self.assertIn(f'{__file__}:{expected_line + 1}, "Logged from helper"', log_lines[1])
+        self.assertIn(f'{__file__}:{expected_line + 2}, "Logged from helper"', log_lines[2])
+
+        self.logger.disable_location_capture(ErrorCode.SUMMARY_STATS_MESSAGE)
+
+        self.logger.log_one_metric('opera_pge', 'test.metric', 1)
+        self.logger.info('opera_pge', 4, 'Still located')
+
+        log_lines = self.logger.get_stream_object().getvalue().splitlines()
+
+        self.assertIn(f', {LOCATION_NOT_CAPTURED}, "test.metric: 1"', log_lines[3])
+        self.assertIn(f'{__file__}:', log_lines[4])
+
+    def test_spilling_log_stream(self):
+        """Test spilling of the log to disk once it grows past a threshold"""
+        os.mkdir('scratch')
+
+        self.logger.info('opera_pge', 4, 'Logged before spill was enabled')
+
+        self.logger.enable_spill(1024, spill_dir='scratch')
+
+        stream = self.logger.get_stream_object()
+        self.assertIsInstance(stream, SpillingLogStream)
+
+        # Log should stay in memory until the threshold is crossed
+        self.assertFalse(stream.spilled)
+        self.assertListEqual(os.listdir('scratch'), [])
+        self.assertIn('Logged before spill was enabled', stream.getvalue())
+
+        for index in range(50):
+            self.logger.info('opera_pge', 4, f'Spilled message {index}')
+
+        self.assertTrue(stream.spilled)
+
+        spill_filename = stream.spill_filename
+        self.assertListEqual(os.listdir('scratch'), [os.path.basename(spill_filename)])
+
+        # Contents written before and after the spill should all be available
+        contents = stream.getvalue()
+        self.assertIn('Logged before spill was enabled', contents)
+        self.assertIn('Spilled message 49', contents)
+
+        # Finalizing the log should rename the spill file to the log location
+        self.logger.move('spilled.log')
+        self.logger.close_log_stream()
+
+        self.assertFalse(exists(spill_filename))
+        self.assertListEqual(os.listdir('scratch'), [])
+
+        with open('spilled.log', 'r', encoding='utf-8') as infile:
+            log_contents = infile.read()
+
+        self.assertTrue(log_contents.startswith(contents))
+        self.assertIn('overall.elapsed_seconds', log_contents)
+
+        # A stream which never spills should be written out directly
+        stream = SpillingLogStream(2 ** 20, spill_dir='scratch', initial_value='in memory\n')
+        stream.persist('in_memory.log')
+
+        self.assertTrue(stream.closed)
+        self.assertListEqual(os.listdir('scratch'), [])
+
+        with open('in_memory.log', 'r', encoding='utf-8') as infile:
+            self.assertEqual(infile.read(), 'in memory\n')
+
+    @staticmethod
+    def _wait_until(predicate, timeout=5.0):
+        """Polls the provided predicate until it returns True, or the timeout expires"""
+        deadline = time.monotonic() + timeout
+
+        while not predicate() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    @staticmethod
+    def _read_file(filename):
+        """Returns the contents of the provided text file"""
+        with open(filename, 'r', encoding='utf-8') as infile:
+            return infile.read()
+
+    def test_async_log_stream(self):
+        """Test asynchronous writing of the log to a journal file on disk"""
+        self.logger.info('opera_pge', 4, 'Logged before async writer was enabled')
+
+        self.logger.enable_async_writer(flush_interval=0.05, flush_threshold=2 ** 30,
+                                        journal_dir='scratch')
+
+        stream = self.logger.get_stream_object()
+        self.assertIsInstance(stream, AsyncLogStream)
+
+        journal_filename = stream.journal_filename
+        self.assertListEqual(os.listdir('scratch'), [os.path.basename(journal_filename)])
+
+        # Messages should reach the journal without the log being finalized
+        with patch.object(log_streams.os, 'fsync', wraps=os.fsync) as mock_fsync:
+            for index in range(50):
+                self.logger.info('opera_pge', 4, f'Journaled message {index}')
+
+            self._wait_until(lambda: 'Journaled message 49' in self._read_file(journal_filename))
+            contents = self._read_file(journal_filename)
+
+            self.assertIn('Logged before async writer was enabled', contents)
+            self.assertIn('Journaled message 49', contents)
+
+            # Wait out the flush interval for the journal to be fsync'd
+            self._wait_until(lambda: mock_fsync.called)
+            mock_fsync.assert_called()
+
+        # Finalizing the log should append the summary, then rename the
+        # journal to the log location
+        self.logger.move('async.log')
+        self.logger.close_log_stream()
+
+        self.assertTrue(stream.closed)
+        self.assertListEqual(os.listdir('scratch'), [])
+
+        log_contents = self._read_file('async.log')
+
+        self.assertTrue(log_contents.startswith(contents))
+        self.assertIn('overall.elapsed_seconds', log_contents)
+
+        # Unsynced data past the threshold should be fsync'd without waiting
+        # on the flush interval
+        stream = AsyncLogStream(flush_interval=3600, flush_threshold=16, journal_dir='scratch')
+
+        with patch.object(log_streams.os, 'fsync', wraps=os.fsync) as mock_fsync:
+            stream.write('under\n')
+            stream.write('past the flush threshold\n')
+
+            self._wait_until(lambda: mock_fsync.called)
+            mock_fsync.assert_called()
+
+        self.assertEqual(stream.getvalue(), 'under\npast the flush threshold\n')
+
+        stream.close()
+        self.assertListEqual(os.listdir('scratch'), [])
+
+        with self.assertRaises(ValueError):
+            stream.write('closed')
+
+    def test_compressed_log(self):
+        """Test compression of the finalized log"""
+        # In-memory log, compressed in the foreground, with a sidecar named
+        # after the uncompressed log
+        self.logger.enable_sidecar()
+        self.logger.info('opera_pge', 4, 'Compressed in memory')
+        self.logger.move('in_memory.log.gz')
+        self.logger.close_log_stream(compression='gzip')
+
+        with gzip.open('in_memory.log.gz', 'rt', encoding='utf-8') as infile:
+            log_contents = infile.read()
+
+        self.assertIn('Compressed in memory', log_contents)
+        self.assertIn('overall.elapsed_seconds', log_contents)
+        self.assertTrue(exists('in_memory.log.jsonl'))
+
+        # Spilled log, compressed in the background
+        logger = PgeLogger(log_filename='spilled.log.gz')
+        logger.enable_spill(0, spill_dir='scratch')
+        logger.info('opera_pge', 4, 'Compressed from disk')
+        logger.close_log_stream(compression='gzip', background=True)
+        logger.wait_for_compression()
+
+        with gzip.open('spilled.log.gz', 'rt', encoding='utf-8') as infile:
+            self.assertIn('Compressed from disk', infile.read())
+
+        # No temporary files should be left behind
+        self.assertListEqual(sorted(os.listdir(os.curdir)),
+                             ['in_memory.log.gz', 'in_memory.log.jsonl', 'scratch', 'spilled.log.gz'])
+        self.assertListEqual(os.listdir('scratch'), [])
+
+        # Errors from the background thread should be raised when waited on
+        logger = PgeLogger(log_filename=join('missing_dir', 'failed.log.gz'))
+        logger.close_log_stream(compression='gzip', background=True)
+
+        with self.assertRaises(OSError):
+            logger.wait_for_compression()
+
+        logger = PgeLogger()
+
+        with self.assertRaises(ValueError):
+            logger.close_log_stream(compression='rar')
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed on the local instance")
+    def test_zstd_compressed_log(self):
+        """Test compression of the finalized log with zstd"""
+        self.logger.info('opera_pge', 4, 'Compressed with zstd')
+        self.logger.move('zstd.log.zst')
+        self.logger.close_log_stream(compression='zstd')
+
+        with open('zstd.log.zst', 'rb') as infile:
+            self.assertEqual(infile.read(4), b'\x28\xb5\x2f\xfd')
+
+        with open_log_file('zstd.log.zst') as infile:
+            log_contents = infile.read()
+
+        self.assertIn('Compressed with zstd', log_contents)
+        self.assertIn('overall.elapsed_seconds', log_contents)
+
+        # Spilled log, compressed in the background
+        logger = PgeLogger(log_filename='spilled.log.zst')
+        logger.enable_spill(0, spill_dir='scratch')
+        logger.info('opera_pge', 4, 'Compressed from disk with zstd')
+        logger.close_log_stream(compression='zstd', background=True)
+        logger.wait_for_compression()
+
+        with open_log_file('spilled.log.zst') as infile:
+            self.assertIn('Compressed from disk with zstd', infile.read())
+
+        self.assertListEqual(sorted(os.listdir(os.curdir)), ['scratch', 'spilled.log.zst', 'zstd.log.zst'])
+        self.assertListEqual(os.listdir('scratch'), [])
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
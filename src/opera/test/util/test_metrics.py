@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+"""
+===============
+test_metrics.py
+===============
+
+Unit tests for the util/metrics.py module.
+"""
+import json
+import os
+import tempfile
+import unittest
+from os.path import abspath
+
+from pkg_resources import resource_filename
+
+from opera.util.logger import PgeLogger
+from opera.util.metrics import Counter
+from opera.util.metrics import Gauge
+from opera.util.metrics import MetricsRegistry
+from opera.util.metrics import Timer
+from opera.util.metrics import prometheus_metric_name
+from opera.util.metrics import write_metrics_json
+from opera.util.metrics import write_metrics_prometheus
+
+
+class MetricsTestCase(unittest.TestCase):
+    """Base test class using unittest"""
+
+    starting_dir = None
+    working_dir = None
+    test_dir = None
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Set up directories for testing"""
+        cls.starting_dir = abspath(os.curdir)
+        cls.test_dir = resource_filename(__name__, "")
+
+        os.chdir(cls.test_dir)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """At completion re-establish starting directory"""
+        os.chdir(cls.starting_dir)
+
+    def setUp(self) -> None:
+        """Use the temporary directory as the working directory"""
+        self.working_dir = tempfile.TemporaryDirectory(
+            prefix="test_metrics_", suffix='temp', dir=os.curdir
+        )
+        os.chdir(self.working_dir.name)
+
+    def tearDown(self) -> None:
+        """Return to starting directory"""
+        os.chdir(self.test_dir)
+        self.working_dir.cleanup()
+
+    def test_metrics_registry(self):
+        """Tests for the MetricsRegistry class and metric types"""
+        registry = MetricsRegistry()
+
+        counter = registry.counter('files.processed', 'Number of files processed')
+        counter.inc()
+        counter.inc(2)
+
+        self.assertIs(registry.counter('files.processed'), counter)
+        self.assertEqual(counter.value, 3)
+
+        with self.assertRaises(ValueError):
+            counter.inc(-1)
+
+        with self.assertRaises(ValueError):
+            registry.gauge('files.processed')
+
+        histogram = registry.histogram('product.size_mb', buckets=(1, 10))
+
+        for value in (0.5, 1, 5, 50):
+            histogram.observe(value)
+
+        self.assertListEqual(histogram.cumulative_bucket_counts(),
+                             [(1, 2), (10, 3), (float('inf'), 4)])
+        self.assertEqual(histogram.asdict()['sum'], 56.5)
+        self.assertEqual(histogram.asdict()['max'], 50)
+
+        with registry.timer('step.elapsed_seconds').time():
+            pass
+
+        self.assertEqual(registry.get('step.elapsed_seconds').count, 1)
+
+        # Free-form metrics should be recorded according to their name and value
+        registry.record('sas.elapsed_seconds', 12.5)
+        registry.record('overall.os.max_rss_kb.main_process', 1024)
+        registry.record('overall.os.max_rss_kb.main_process', 2048)
+        registry.record('sas.exit_status', 'failed')
+        registry.record('files.processed', 5)
+
+        self.assertIsInstance(registry.get('sas.elapsed_seconds'), Timer)
+        self.assertIsInstance(registry.get('overall.os.max_rss_kb.main_process'), Gauge)
+        self.assertEqual(registry.get('overall.os.max_rss_kb.main_process').value, 2048)
+        self.assertNotIn('sas.exit_status', registry)
+        self.assertIsInstance(registry.get('files.processed'), Counter)
+        self.assertEqual(counter.value, 5)
+
+        self.assertListEqual(list(registry.asdict().keys()), ['counters', 'gauges', 'histograms', 'timers'])
+
+    def test_pge_logger_metrics(self):
+        """Tests for recording of logged metrics to a PgeLogger's registry"""
+        logger = PgeLogger()
+        logger.log_one_metric('test_metrics', 'sas.elapsed_seconds', 3.5)
+        logger.write_log_summary()
+
+        self.assertEqual(logger.metrics.get('sas.elapsed_seconds').sum, 3.5)
+        self.assertIn('overall.os.cpu.seconds.user', logger.metrics)
+        self.assertIn('overall.log_messages.info', logger.metrics)
+        self.assertIsInstance(logger.metrics.get('overall.elapsed_seconds'), Timer)
+
+    def test_exporters(self):
+        """Tests for the JSON and Prometheus metrics exporters"""
+        pge_registry = MetricsRegistry()
+        pge_registry.counter('files.processed', 'Number of "files"\nprocessed').inc(3)
+        pge_registry.record('sas.elapsed_seconds', 2.0)
+
+        qa_registry = MetricsRegistry()
+        qa_registry.record('sas.elapsed_seconds', 0.02)
+
+        registries = {'pge': pge_registry, 'qa': qa_registry}
+        labels = {'pge': 'BASE_PGE', 'pge_version': '1.0 "rc"'}
+
+        write_metrics_json('metrics.json', registries, labels)
+
+        with open('metrics.json', 'r', encoding='utf-8') as infile:
+            document = json.load(infile)
+
+        self.assertDictEqual(document['labels'], labels)
+        self.assertEqual(document['scopes']['pge']['counters']['files.processed']['value'], 3)
+        self.assertEqual(document['scopes']['qa']['timers']['sas.elapsed_seconds']['count'], 1)
+
+        write_metrics_prometheus('metrics.prom', registries, labels)
+
+        with open('metrics.prom', 'r', encoding='utf-8') as infile:
+            lines = infile.read().splitlines()
+
+        self.assertEqual(prometheus_metric_name('sas.elapsed_seconds'), 'opera_pge_sas_elapsed_seconds')
+
+        self.assertIn('# HELP opera_pge_files_processed Number of "files"\\nprocessed', lines)
+        self.assertIn('# TYPE opera_pge_files_processed counter', lines)
+        self.assertIn('opera_pge_files_processed{pge="BASE_PGE",pge_version="1.0 \\"rc\\"",scope="pge"} 3',
+                      lines)
+
+        # Samples of both scopes should be grouped under a single histogram
+        self.assertEqual(lines.count('# TYPE opera_pge_sas_elapsed_seconds histogram'), 1)
+        self.assertIn('opera_pge_sas_elapsed_seconds_bucket{pge="BASE_PGE",pge_version="1.0 \\"rc\\"",'
+                      'scope="qa",le="0.05"} 1', lines)
+        self.assertIn('opera_pge_sas_elapsed_seconds_count{pge="BASE_PGE",pge_version="1.0 \\"rc\\"",'
+                      'scope="pge"} 1', lines)
+        self.assertIn('opera_pge_sas_elapsed_seconds_sum{pge="BASE_PGE",pge_version="1.0 \\"rc\\"",'
+                      'scope="pge"} 2.0', lines)
+
+        # No temporary files should be left behind
+        self.assertListEqual(sorted(os.listdir(os.curdir)), ['metrics.json', 'metrics.prom'])
+
+        conflicting_registry = MetricsRegistry()
+        conflicting_registry.gauge('files.processed').set(1)
+
+        with self.assertRaises(ValueError):
+            write_metrics_prometheus('conflict.prom', {'pge': pge_registry, 'qa': conflicting_registry})
+
+
+if __name__ == "__main__":
+    unittest.main()
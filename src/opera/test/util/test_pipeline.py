@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""
+================
+test_pipeline.py
+================
+
+Unit tests for the util/pipeline.py module.
+"""
+import threading
+import time
+import unittest
+
+from opera.util.pipeline import PipelineStep, run_pipeline
+
+
+class PipelineTestCase(unittest.TestCase):
+    """Base test class using unittest"""
+
+    def test_run_pipeline(self):
+        """Tests for pipeline.run_pipeline() ordering and concurrency"""
+        events = []
+        events_lock = threading.Lock()
+
+        # Both independent steps must be running at the same time to pass
+        barrier = threading.Barrier(2, timeout=5)
+
+        def _step(name, wait_on_barrier=False):
+            def _run():
+                with events_lock:
+                    events.append(f'{name}.start')
+
+                if wait_on_barrier:
+                    barrier.wait()
+
+                with events_lock:
+                    events.append(f'{name}.end')
+
+            return _run
+
+        steps = [
+            PipelineStep('first', _step('first')),
+            PipelineStep('independent_a', _step('independent_a', True), depends_on=['first']),
+            PipelineStep('independent_b', _step('independent_b', True), depends_on=['first']),
+            PipelineStep('last', _step('last'), depends_on=['independent_a', 'independent_b'])
+        ]
+
+        timings = run_pipeline(steps)
+
+        self.assertListEqual(list(timings.keys()), ['first', 'independent_a', 'independent_b', 'last'])
+        self.assertTrue(all(elapsed >= 0 for elapsed in timings.values()))
+
+        self.assertListEqual(events[:2], ['first.start', 'first.end'])
+        self.assertListEqual(events[-2:], ['last.start', 'last.end'])
+
+    def test_run_pipeline_failure(self):
+        """Tests for error handling by pipeline.run_pipeline()"""
+        ran_steps = []
+
+        def _fail():
+            time.sleep(0.05)
+            raise RuntimeError('step failed')
+
+        steps = [
+            PipelineStep('failing', _fail),
+            PipelineStep('slow', lambda: (time.sleep(0.1), ran_steps.append('slow'))),
+            PipelineStep('dependent', lambda: ran_steps.append('dependent'), depends_on=['failing'])
+        ]
+
+        with self.assertRaisesRegex(RuntimeError, 'step failed'):
+            run_pipeline(steps)
+
+        # Steps already running should finish, but dependents should never start
+        self.assertListEqual(ran_steps, ['slow'])
+
+        with self.assertRaises(ValueError):
+            run_pipeline([PipelineStep('a', print, depends_on=['missing'])])
+
+        with self.assertRaises(ValueError):
+            run_pipeline([PipelineStep('a', print), PipelineStep('a', print)])
+
+        with self.assertRaises(ValueError):
+            run_pipeline([PipelineStep('a', print, depends_on=['b']),
+                          PipelineStep('b', print, depends_on=['a'])])
+
+
+if __name__ == "__main__":
+    unittest.main()
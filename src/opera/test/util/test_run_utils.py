@@ -8,18 +8,27 @@ test_run_utils.py
 Unit tests for the util/run_utils.py module.
 
 """
+import errno
+import hashlib
 import os
 import shutil
+import signal
 import tempfile
+import time
 import unittest
 from os.path import abspath
 from unittest.mock import patch
 
 from pkg_resources import resource_filename
 
+from opera.util.error_codes import ErrorCode
 from opera.util.logger import PgeLogger
 from opera.util.run_utils import create_qa_command_line
 from opera.util.run_utils import create_sas_command_line
+from opera.util.run_utils import get_checksum
+from opera.util.run_utils import get_checksums
+from opera.util.run_utils import get_digests
+from opera.util.run_utils import move_file
 from opera.util.run_utils import time_and_execute
 
 
@@ -67,6 +76,97 @@ class RunUtilsTestCase(unittest.TestCase):
         os.chdir(self.test_dir)
         self.working_dir.cleanup()
 
+    def test_get_checksum(self):
+        """Tests for run_utils.get_checksum() and run_utils.get_checksums()"""
+        file_contents = {
+            'empty.bin': b'',
+            'small.bin': b'hello world',
+            'multi_chunk.bin': os.urandom(10 * 1024 + 7)
+        }
+
+        for file_name, contents in file_contents.items():
+            with open(file_name, 'wb') as outfile:
+                outfile.write(contents)
+
+        expected_checksums = {
+            file_name: hashlib.md5(contents).hexdigest()
+            for file_name, contents in file_contents.items()
+        }
+
+        for file_name, expected_checksum in expected_checksums.items():
+            self.assertEqual(get_checksum(file_name), expected_checksum)
+            self.assertEqual(get_checksum(file_name, chunk_size=1024), expected_checksum)
+
+        # Results should be identical (and in the same order) regardless of
+        # the number of workers
+        for num_workers in (None, 1, 2):
+            checksums = get_checksums(file_contents.keys(), num_workers=num_workers, chunk_size=1024)
+            self.assertListEqual(list(checksums.items()), list(expected_checksums.items()))
+
+        self.assertDictEqual(get_checksums([]), {})
+
+        with self.assertRaises(FileNotFoundError):
+            get_checksums(['small.bin', 'missing.bin'], num_workers=2)
+
+    def test_get_digests(self):
+        """Tests for run_utils.get_digests() with multiple checksum algorithms"""
+        contents = os.urandom(10 * 1024 + 7)
+
+        with open('product.bin', 'wb') as outfile:
+            outfile.write(contents)
+
+        expected_digests = {
+            'md5': hashlib.md5(contents).hexdigest(),
+            'sha256': hashlib.sha256(contents).hexdigest(),
+            'blake2b-128': hashlib.blake2b(contents, digest_size=16).hexdigest()
+        }
+
+        digests = get_digests('product.bin', expected_digests.keys(), chunk_size=1024)
+
+        self.assertDictEqual(digests, expected_digests)
+
+        checksums = get_checksums(['product.bin'], algorithms=expected_digests.keys())
+
+        self.assertDictEqual(checksums, {'product.bin': expected_digests})
+
+        # Unsupported algorithms should be rejected before any file is read
+        with self.assertRaises(ValueError):
+            get_checksums(['missing.bin'], algorithms=['md5', 'crc1024'])
+
+    def test_move_file(self):
+        """Tests for run_utils.move_file()"""
+        contents = os.urandom(10 * 1024 + 7)
+
+        with open('source.bin', 'wb') as outfile:
+            outfile.write(contents)
+
+        # Moves within the same file system should be a plain rename
+        self.assertIsNone(move_file('source.bin', 'renamed.bin'))
+        self.assertFalse(os.path.exists('source.bin'))
+
+        # Simulate a move across file systems, which should copy the file
+        # while computing its checksums
+        def _cross_device_rename(source, destination):
+            raise OSError(errno.EXDEV, 'Invalid cross-device link', source, None, destination)
+
+        source_mtime_ns = os.stat('renamed.bin').st_mtime_ns
+
+        with patch.object(os, 'rename', _cross_device_rename):
+            digests = move_file('renamed.bin', 'copied.bin', algorithms=['md5', 'sha256'], chunk_size=1024)
+
+        self.assertDictEqual(digests, {'md5': hashlib.md5(contents).hexdigest(),
+                                       'sha256': hashlib.sha256(contents).hexdigest()})
+        self.assertFalse(os.path.exists('renamed.bin'))
+        self.assertEqual(os.stat('copied.bin').st_mtime_ns, source_mtime_ns)
+        self.assertListEqual(os.listdir(os.curdir), ['copied.bin'])
+
+        with open('copied.bin', 'rb') as infile:
+            self.assertEqual(infile.read(), contents)
+
+        # Any other failure should be raised to the caller
+        with self.assertRaises(FileNotFoundError):
+            move_file('missing.bin', 'copied.bin')
+
     def test_create_sas_command_line(self):
         """Tests for run_utils.create_sas_command_line()"""
         # Make a command from something locally available on PATH (findable
@@ -210,3 +310,95 @@ class RunUtilsTestCase(unittest.TestCase):
         # Check for the erroneous run (note this test is generalized to work
         # on both linux and osx)
         self.assertIn('bash -c exit 1 /path/to/runconfig" failed with exit code 1', log)
+
+    def test_time_and_execute_streaming(self):
+        """Tests for run_utils.time_and_execute() with output streaming enabled"""
+        logger = PgeLogger()
+
+        # Emit a mix of OPERA-formatted and free-form lines from the program
+        with open('stream_test.sh', 'w', encoding='utf-8') as outfile:
+            outfile.write('echo "line one"\n')
+            outfile.write("echo '2022-04-04 22:55:01.406, WARNING, DSWx-HLS, dswx_hls, 999999, "
+                          "/path/to/dswx_hls.py:1595, \"Streamed SAS warning\"'\n")
+            outfile.write('echo "line three"\n')
+
+        command_line = create_qa_command_line('bash', ['stream_test.sh'])
+
+        elapsed_time = time_and_execute(command_line, logger, execute_via_shell=False,
+                                        stream_output=True)
+
+        self.assertGreater(elapsed_time, 0.0)
+
+        log = logger.get_stream_object().getvalue()
+
+        # Check that output was captured in order, and that the OPERA-formatted
+        # line was parsed and counted according to its severity
+        self.assertLess(log.index('line one'), log.index('Streamed SAS warning'))
+        self.assertLess(log.index('Streamed SAS warning'), log.index('line three'))
+        self.assertEqual(logger.get_warning_count(), 1)
+
+        # Execute an invalid command (non-zero return) in streaming mode
+        command_line = create_qa_command_line('bash', ['-c', 'exit 1'])
+
+        with self.assertRaises(RuntimeError):
+            time_and_execute(command_line, logger, execute_via_shell=False,
+                             stream_output=True)
+
+        with open(logger.get_file_name(), 'r', encoding='utf-8') as infile:
+            log = infile.read()
+
+        self.assertIn('failed with exit code 1', log)
+
+    def test_time_and_execute_watchdog(self):
+        """Tests for the timeout/watchdog support of run_utils.time_and_execute()"""
+        # Check that the wall-clock limit is enforced
+        logger = PgeLogger(log_filename='test_timeout.log')
+        command_line = create_qa_command_line('sleep', ['30'])
+
+        start_time = time.monotonic()
+
+        with self.assertRaises(RuntimeError):
+            time_and_execute(command_line, logger, timeout=0.5)
+
+        self.assertLess(time.monotonic() - start_time, 10)
+
+        with open('test_timeout.log', 'r', encoding='utf-8') as infile:
+            log = infile.read()
+
+        self.assertIn('exceeded the wall-clock limit of 0.5 second(s)', log)
+        self.assertIn(str(logger.error_code_base + ErrorCode.SAS_PROGRAM_TIMED_OUT), log)
+        self.assertIn('watchdog.elapsed_seconds', log)
+
+        # Check that the inactivity limit is enforced, and that the output
+        # produced before the program stalled was captured
+        logger = PgeLogger(log_filename='test_inactivity.log')
+        command_line = create_qa_command_line('bash', ['-c', 'echo "before the stall"; sleep 30'])
+
+        with self.assertRaises(RuntimeError):
+            time_and_execute(command_line, logger, timeout=20, inactivity_timeout=0.5)
+
+        with open('test_inactivity.log', 'r', encoding='utf-8') as infile:
+            log = infile.read()
+
+        self.assertIn('before the stall', log)
+        self.assertIn('produced no output for 0.5 second(s)', log)
+
+        # Check that a program ignoring SIGTERM is escalated to SIGKILL
+        logger = PgeLogger(log_filename='test_kill.log')
+        command_line = create_qa_command_line(
+            'bash', ['-c', 'trap "" TERM; echo "ignoring SIGTERM"; sleep 30']
+        )
+
+        start_time = time.monotonic()
+
+        with self.assertRaises(RuntimeError):
+            time_and_execute(command_line, logger, stream_output=True,
+                             timeout=0.5, kill_grace_period=0.5)
+
+        self.assertLess(time.monotonic() - start_time, 10)
+
+        with open('test_kill.log', 'r', encoding='utf-8') as infile:
+            log = infile.read()
+
+        self.assertIn('ignoring SIGTERM', log)
+        self.assertIn(f'watchdog.exit_code: {-signal.SIGKILL}', log)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+"""
+====================
+test_schema_cache.py
+====================
+
+Unit tests for the util/schema_cache.py module.
+"""
+import os
+import pickle
+import tempfile
+import unittest
+from os.path import abspath, join
+from unittest.mock import patch
+
+from pkg_resources import resource_filename
+
+import yamale
+
+from opera.pge.base.runconfig import BASE_PGE_SCHEMA, RunConfig
+from opera.util import schema_cache
+from opera.util.schema_cache import clear_schema_cache
+from opera.util.schema_cache import get_schema
+from opera.util.schema_cache import link_schema_includes
+
+
+class SchemaCacheTestCase(unittest.TestCase):
+    """Base test class using unittest"""
+
+    starting_dir = None
+    working_dir = None
+    test_dir = None
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Set up directories for testing"""
+        cls.starting_dir = abspath(os.curdir)
+        cls.test_dir = resource_filename(__name__, "")
+        cls.data_dir = join(cls.test_dir, os.pardir, "data")
+
+        os.chdir(cls.test_dir)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """At completion re-establish starting directory"""
+        os.chdir(cls.starting_dir)
+
+    def setUp(self) -> None:
+        """Use the temporary directory as the working directory"""
+        self.working_dir = tempfile.TemporaryDirectory(
+            prefix="test_schema_cache_", suffix='temp', dir=os.curdir
+        )
+        os.chdir(self.working_dir.name)
+
+        with open('schema.yaml', 'w', encoding='utf-8') as outfile:
+            outfile.write("name: str()\nitems: list(include('item'))\n---\nitem:\n  value: int()\n")
+
+    def tearDown(self) -> None:
+        """Return to starting directory"""
+        os.chdir(self.test_dir)
+        self.working_dir.cleanup()
+        clear_schema_cache()
+
+    def test_get_schema(self):
+        """Test in-process caching of compiled schemas"""
+        schema = get_schema('schema.yaml')
+
+        self.assertIs(get_schema(abspath('schema.yaml')), schema)
+
+        yamale.validate(schema, [({'name': 'test', 'items': [{'value': 1}]}, 'data')])
+
+        # Modifying the schema file should result in a recompiled schema
+        with open('schema.yaml', 'a', encoding='utf-8') as outfile:
+            outfile.write("  label: str(required=False)\n")
+
+        modified_schema = get_schema('schema.yaml')
+
+        self.assertIsNot(modified_schema, schema)
+        self.assertIn('label', modified_schema.includes['item'].dict)
+
+    def test_on_disk_cache(self):
+        """Test caching of compiled schemas to disk"""
+        schema = get_schema('schema.yaml', cache_dir='cache')
+
+        pickle_files = os.listdir('cache')
+        self.assertEqual(len(pickle_files), 1)
+        self.assertTrue(pickle_files[0].endswith('.pickle'))
+
+        # A new process (simulated by clearing the in-process cache) should
+        # load the schema from disk rather than recompiling it
+        clear_schema_cache()
+
+        with patch.object(yamale, 'make_schema') as mock_make_schema:
+            with patch.dict(os.environ, {schema_cache.SCHEMA_CACHE_DIR_ENV: 'cache'}):
+                cached_schema = get_schema('schema.yaml')
+
+        mock_make_schema.assert_not_called()
+        self.assertIsNot(cached_schema, schema)
+        self.assertEqual(cached_schema.name, schema.name)
+
+        yamale.validate(cached_schema, [({'name': 'test', 'items': [{'value': 1}]}, 'data')])
+
+        # A corrupt entry should be replaced with a recompiled schema
+        with open(join('cache', pickle_files[0]), 'wb') as outfile:
+            outfile.write(b'corrupt')
+
+        clear_schema_cache()
+
+        get_schema('schema.yaml', cache_dir='cache')
+
+        self.assertIsNotNone(schema_cache._load_pickled_schema(join('cache', pickle_files[0])))
+
+        # A different version of Yamale should not reuse the entry
+        clear_schema_cache()
+
+        with patch.object(yamale, '__version__', '0.0.0'):
+            get_schema('schema.yaml', cache_dir='cache')
+
+        self.assertEqual(len(os.listdir('cache')), 2)
+
+        # Failed writes should not leave temporary files behind
+        clear_schema_cache()
+
+        with patch.object(pickle, 'dump', side_effect=pickle.PicklingError('mock pickling failure')):
+            schema_cache._write_pickled_schema(join('cache', 'failed.pickle'), schema)
+
+        with patch.object(os, 'replace', side_effect=OSError('mock replace failure')):
+            schema_cache._write_pickled_schema(join('cache', 'failed.pickle'), schema)
+
+        self.assertEqual(len(os.listdir('cache')), 2)
+
+    def test_link_schema_includes(self):
+        """Test linking of includes to a copy of a cached schema"""
+        with open('outer.yaml', 'w', encoding='utf-8') as outfile:
+            outfile.write("inner: include('inner_config')\nextra: include('extra', required=False)\n"
+                          "---\nextra:\n  nested: include('inner_config', required=False)\n")
+
+        outer_schema = get_schema('outer.yaml')
+        inner_schema = get_schema('schema.yaml')
+
+        linked_schema = link_schema_includes(outer_schema, {'inner_config': inner_schema})
+
+        # The cached schema, and the includes it shares, should be untouched
+        self.assertNotIn('inner_config', outer_schema.includes)
+        self.assertNotIn('inner_config', outer_schema.includes['extra'].includes)
+        self.assertIs(linked_schema.includes['extra'].includes, linked_schema.includes)
+
+        data = {'inner': {'name': 'test', 'items': []},
+                'extra': {'nested': {'name': 'nested', 'items': [{'value': 2}]}}}
+
+        yamale.validate(linked_schema, [(data, 'data')])
+
+        with self.assertRaises(yamale.YamaleError):
+            data['extra']['nested']['items'][0]['value'] = 'not an int'
+            yamale.validate(linked_schema, [(data, 'data')])
+
+    def test_runconfig_validation(self):
+        """Test that validation of RunConfigs leaves the cached PGE schema untouched"""
+        runconfig = RunConfig(join(self.data_dir, 'test_base_pge_config.yaml'))
+
+        runconfig.validate()
+        runconfig.validate()
+
+        self.assertNotIn('sas_configuration', get_schema(BASE_PGE_SCHEMA).includes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+"""
+===============
+test_tracing.py
+===============
+
+Unit tests for the util/tracing.py module.
+"""
+import json
+import os
+import tempfile
+import threading
+import unittest
+from os.path import abspath
+from unittest.mock import patch
+
+from pkg_resources import resource_filename
+
+from opera.util.tracing import Tracer
+from opera.util.tracing import trace_methods
+
+
+class _Steps:
+    """Simple class with steps to be traced"""
+
+    def __init__(self):
+        self.tracer = Tracer()
+        trace_methods(self, self.tracer, ['outer', 'inner', 'fail', 'missing'])
+
+    def outer(self, count):
+        """Invokes the inner step the requested number of times"""
+        return [self.inner(i) for i in range(count)]
+
+    def inner(self, value):  # pylint: disable=no-self-use
+        """Returns the provided value"""
+        return value
+
+    def fail(self):  # pylint: disable=no-self-use
+        """Raises an Exception"""
+        raise ValueError('step failed')
+
+
+class _OverriddenSteps(_Steps):
+    """Subclass overriding one of the traced steps"""
+
+    def inner(self, value):
+        return super().inner(value) * 2
+
+
+class TracingTestCase(unittest.TestCase):
+    """Base test class using unittest"""
+
+    starting_dir = None
+    working_dir = None
+    test_dir = None
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Set up directories for testing"""
+        cls.starting_dir = abspath(os.curdir)
+        cls.test_dir = resource_filename(__name__, "")
+
+        os.chdir(cls.test_dir)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """At completion re-establish starting directory"""
+        os.chdir(cls.starting_dir)
+
+    def setUp(self) -> None:
+        """Use the temporary directory as the working directory"""
+        self.working_dir = tempfile.TemporaryDirectory(
+            prefix="test_tracing_", suffix='temp', dir=os.curdir
+        )
+        os.chdir(self.working_dir.name)
+
+    def tearDown(self) -> None:
+        """Return to starting directory"""
+        os.chdir(self.test_dir)
+        self.working_dir.cleanup()
+
+    def test_tracer(self):
+        """Tests for nesting and summarizing of spans by the Tracer class"""
+        tracer = Tracer()
+
+        with tracer.span('outer', stage='test') as outer_span:
+            with tracer.span('inner'):
+                pass
+            with tracer.span('inner'):
+                pass
+
+        self.assertEqual(len(tracer.spans), 3)
+        self.assertIs(tracer.spans[-1], outer_span)
+        self.assertEqual(outer_span.args, {'stage': 'test'})
+        self.assertListEqual([span.depth for span in tracer.spans], [1, 1, 0])
+        self.assertEqual(outer_span.child_ns, sum(span.duration_ns for span in tracer.spans[:2]))
+
+        summary = tracer.summary()
+
+        self.assertListEqual(list(summary.keys()), ['outer', 'inner'])
+        self.assertEqual(summary['inner']['calls'], 2)
+        self.assertAlmostEqual(summary['outer']['self_seconds'],
+                               summary['outer']['total_seconds'] - summary['inner']['total_seconds'])
+
+        # Spans exited by an Exception should be recorded along with the error
+        with self.assertRaises(RuntimeError):
+            with tracer.span('failed'):
+                raise RuntimeError('failure')
+
+        self.assertEqual(tracer.spans[-1].args['error'], 'RuntimeError')
+
+        # Spans opened by other threads should not nest within those of this thread
+        with tracer.span('main'):
+            worker = threading.Thread(target=self._open_span, args=(tracer,), name='trace_worker')
+            worker.start()
+            worker.join()
+
+        worker_span = next(span for span in tracer.spans if span.name == 'worker_step')
+
+        self.assertEqual(worker_span.depth, 0)
+        self.assertEqual(worker_span.thread_name, 'trace_worker')
+
+    @staticmethod
+    def _open_span(tracer):
+        """Records a single span from a worker thread"""
+        with tracer.span('worker_step'):
+            pass
+
+    def test_trace_methods(self):
+        """Tests for tracing of the methods of an instance"""
+        steps = _OverriddenSteps()
+
+        self.assertListEqual(steps.outer(2), [0, 2])
+        self.assertListEqual([span.name for span in steps.tracer.spans], ['inner', 'inner', 'outer'])
+        self.assertFalse(hasattr(steps, 'missing'))
+
+        with self.assertRaises(ValueError):
+            steps.fail()
+
+        self.assertEqual(steps.tracer.spans[-1].args['error'], 'ValueError')
+
+        # Patching of the class should still take effect for traced methods
+        with patch.object(_OverriddenSteps, 'inner', return_value=-1):
+            self.assertListEqual(steps.outer(1), [-1])
+
+        self.assertEqual(steps.tracer.spans[-2].name, 'inner')
+
+    def test_write_chrome_trace(self):
+        """Tests for export of spans in the Chrome trace event format"""
+        steps = _Steps()
+        steps.outer(3)
+
+        steps.tracer.write_chrome_trace('trace.json')
+
+        with open('trace.json', 'r', encoding='utf-8') as infile:
+            trace = json.load(infile)
+
+        events = trace['traceEvents']
+
+        self.assertEqual(events[0]['ph'], 'M')
+        self.assertEqual(events[0]['args']['name'], threading.current_thread().name)
+
+        complete_events = [event for event in events if event['ph'] == 'X']
+
+        self.assertListEqual([event['name'] for event in complete_events], ['outer', 'inner', 'inner', 'inner'])
+
+        outer_event = complete_events[0]
+
+        for event in complete_events[1:]:
+            self.assertEqual(event['pid'], os.getpid())
+            self.assertEqual(event['tid'], outer_event['tid'])
+            self.assertGreaterEqual(event['ts'], outer_event['ts'])
+            self.assertLessEqual(event['ts'] + event['dur'], outer_event['ts'] + outer_event['dur'])
+
+
+if __name__ == "__main__":
+    unittest.main()
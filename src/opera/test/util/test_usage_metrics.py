@@ -7,8 +7,11 @@ test_usage_metrics.py
 
 Unit tests for the util/usage_metrics.py module.
 """
+import csv
+import json
 import os
 import re
+import subprocess
 import tempfile
 import unittest
 from os.path import abspath, join
@@ -16,7 +19,9 @@ from sys import platform
 
 from pkg_resources import resource_filename
 
+from opera.util.usage_metrics import ProcessTreeSampler
 from opera.util.usage_metrics import get_os_metrics
+from opera.util.usage_metrics import get_percentile
 
 
 class UsageMetricsTestCase(unittest.TestCase):
@@ -115,6 +120,76 @@ class UsageMetricsTestCase(unittest.TestCase):
                 self.assertEqual(str(metrics['os.peak_vm_kb.main_process']), re.match(int_regex,
                                  str(metrics['os.peak_vm_kb.main_process'])).group())
 
+    def test_get_percentile(self):
+        """Test the nearest-rank percentile helper"""
+        values = list(range(1, 101))
+
+        self.assertEqual(get_percentile(values, 50), 50)
+        self.assertEqual(get_percentile(values, 95), 95)
+        self.assertEqual(get_percentile(values, 100), 100)
+        self.assertEqual(get_percentile(values, 0), 1)
+        self.assertEqual(get_percentile([3.0], 95), 3.0)
+        self.assertIsNone(get_percentile([], 95))
+
+    @unittest.skipIf(platform != "linux", "Requires the Linux proc filesystem")
+    def test_process_tree_sampler(self):
+        """Test sampling of a process tree with ProcessTreeSampler"""
+        sampler = ProcessTreeSampler(interval=0.05)
+
+        # Spawn a small process tree: a shell running a child python process
+        # which holds on to a known amount of memory for a short while
+        child_program = ("import time; buffer = bytearray(64 * 2 ** 20); "
+                         "open('io_test.bin', 'wb').write(buffer); time.sleep(1.0)")
+
+        with subprocess.Popen(['bash', '-c', f'python3 -c "{child_program}"; true']) as process:
+            sampler.start(process.pid)
+            process.wait()
+            sampler.stop()
+
+        self.assertGreater(len(sampler.samples), 5)
+
+        for sample in sampler.samples:
+            self.assertTupleEqual(tuple(sample.keys()), ProcessTreeSampler.TIMELINE_FIELDS)
+
+        # Both the shell and the python interpreter should have been observed
+        self.assertGreaterEqual(max(sample['num_processes'] for sample in sampler.samples), 2)
+
+        metrics = sampler.get_summary_metrics()
+
+        for field in ProcessTreeSampler.SUMMARY_FIELDS:
+            for statistic in ('peak', 'p95', 'mean'):
+                self.assertIn(f'{field}.{statistic}', metrics)
+                self.assertGreaterEqual(metrics[f'{field}.{statistic}'], 0)
+
+            self.assertGreaterEqual(metrics[f'{field}.peak'], metrics[f'{field}.mean'])
+
+        # The 64 MiB buffer should be reflected in the summed RSS of the tree
+        self.assertGreater(metrics['rss_kb.peak'], 64 * 1024)
+        self.assertGreaterEqual(metrics['write_bytes.total'], 0)
+        self.assertEqual(metrics['num_samples'], len(sampler.samples))
+
+        # Check the timeline can be written in both supported formats
+        sampler.write_timeline('timeline.csv', 'csv')
+
+        with open('timeline.csv', 'r', encoding='utf-8') as infile:
+            rows = list(csv.DictReader(infile))
+
+        self.assertEqual(len(rows), len(sampler.samples))
+
+        sampler.write_timeline('timeline.json', 'json')
+
+        with open('timeline.json', 'r', encoding='utf-8') as infile:
+            timeline = json.load(infile)
+
+        self.assertEqual(timeline['interval'], 0.05)
+        self.assertEqual(len(timeline['samples']), len(sampler.samples))
+
+        with self.assertRaises(ValueError):
+            sampler.write_timeline('timeline.xml', 'xml')
+
+        # A sampler that never ran should report nothing
+        self.assertDictEqual(ProcessTreeSampler().get_summary_metrics(), {})
+
 
 if __name__ == "__main__":
     unittest.main()
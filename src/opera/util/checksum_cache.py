@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+"""
+=================
+checksum_cache.py
+=================
+
+Persistent cache of file checksums for use with OPERA PGEs.
+
+Checksums are keyed on the identity and state of a file as reported by the
+file system (device, inode, size and modification time in nanoseconds), along
+with the checksum algorithm. A file which has not changed since its checksum
+was cached can therefore have its checksum returned without reading any of
+its contents.
+
+The cache is backed by a SQLite database, so it may be shared by multiple
+threads and processes (such as concurrent PGE jobs of a batch).
+
+"""
+
+import os
+import sqlite3
+import threading
+
+DEFAULT_CACHE_TIMEOUT = 30.0
+"""Number of seconds to wait on a lock held by another user of the cache database"""
+
+
+class ChecksumCache:
+    """
+    SQLite-backed mapping of (device, inode, size, mtime_ns, algorithm) to
+    checksum digest.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS checksums (
+            device INTEGER NOT NULL,
+            inode INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            algorithm TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            PRIMARY KEY (device, inode, algorithm)
+        )
+    """
+
+    def __init__(self, cache_path):
+        """
+        Opens (creating if necessary) the checksum cache database at the
+        provided location.
+
+        Parameters
+        ----------
+        cache_path : str
+            Path to the SQLite database backing the cache.
+
+        """
+        self.cache_path = os.path.abspath(cache_path)
+
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            self.cache_path, timeout=DEFAULT_CACHE_TIMEOUT, check_same_thread=False
+        )
+
+        with self._lock, self._connection:
+            # Write-ahead logging allows readers to proceed while another
+            # process is updating the cache
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(self._SCHEMA)
+
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        """Returns the cache, for use as a context manager"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Closes the cache on leaving the context"""
+        self.close()
+
+    def close(self):
+        """Closes the connection to the cache database"""
+        with self._lock:
+            self._connection.close()
+
+    def get(self, file_stat, algorithm):
+        """
+        Returns the cached checksum for the file described by the provided stat
+        result, if the file is unchanged since the checksum was cached.
+
+        Parameters
+        ----------
+        file_stat : os.stat_result
+            Result of os.stat() for the file to look up.
+        algorithm : str
+            Name of the checksum algorithm.
+
+        Returns
+        -------
+        digest : str or None
+            The cached checksum, or None if there is no valid cache entry.
+
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT digest FROM checksums WHERE device = ? AND inode = ? AND size = ? '
+                'AND mtime_ns = ? AND algorithm = ?',
+                (file_stat.st_dev, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns, algorithm)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return row[0]
+
+    def put(self, file_stat, digests):
+        """
+        Caches the checksums for the file described by the provided stat
+        result, replacing any stale entries for the same file.
+
+        Parameters
+        ----------
+        file_stat : os.stat_result
+            Result of os.stat() for the file, taken before its contents were
+            read to compute the checksums.
+        digests : dict
+            Mapping of checksum algorithm names to checksums of the file.
+
+        """
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO checksums (device, inode, size, mtime_ns, algorithm, digest) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(file_stat.st_dev, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns,
+                  algorithm, digest)
+                 for algorithm, digest in digests.items()]
+            )
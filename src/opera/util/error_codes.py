@@ -66,6 +66,7 @@ class ErrorCode(IntEnum):
     CLOSING_LOG_FILE = auto()
     LOGGED_INFO_LINE = auto()
     UPDATING_PRODUCT_METADATA = auto()
+    LOGGED_LINES_SUPPRESSED = auto()
 
     # Debug - 1000 – 1999
     CONFIGURATION_DETAILS = DEBUG_RANGE_START
@@ -107,6 +108,7 @@ class ErrorCode(IntEnum):
     SAS_OUTPUT_FILE_HAS_MISSING_DATA = auto()
     LOGGED_CRITICAL_LINE = auto()
     DYNAMIC_IMPORT_FAILED = auto()
+    SAS_PROGRAM_TIMED_OUT = auto()
 
     @classmethod
     def describe(cls):
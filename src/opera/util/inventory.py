@@ -0,0 +1,587 @@
+#!/usr/bin/env python3
+
+"""
+============
+inventory.py
+============
+
+Cached inventories of the input files read by a PGE, and of the output
+products written to a PGE output location.
+
+Pre- and post-processing steps repeatedly need the set of input files (to
+validate them, or list them in the catalog metadata) and output products (to
+stage, checksum, validate or collect metadata from them). Rather than listing
+the same locations for each step, the inventories scan them once with
+os.scandir(), recording the size and modification time of each file. Later
+lookups are served from the cached scan.
+
+The inventories do not watch the file system. Callers which add, rename,
+modify or remove output products must record the change via update(),
+rename() or remove(), or invalidate() the ProductInventory so it is
+rescanned on next use.
+
+"""
+
+import os
+import stat
+import threading
+from fnmatch import fnmatch
+from os.path import abspath, basename, dirname, splitext
+
+
+class FileEntry:
+    """The cached details of a single input file or output product"""
+
+    __slots__ = ('path', 'name', 'extension', 'size', 'mtime_ns', 'pattern')
+
+    def __init__(self, path, name, stat_result, pattern=None):
+        """
+        Creates a new FileEntry.
+
+        Parameters
+        ----------
+        path : str
+            Path to the file.
+        name : str
+            File name of the file.
+        stat_result : os.stat_result
+            Result of stat'ing the file.
+        pattern : str, optional
+            The first of the inventory's classification patterns matched by
+            the file name, if any.
+
+        """
+        self.path = path
+        self.name = name
+        self.extension = splitext(name)[-1]
+        self.size = stat_result.st_size
+        self.mtime_ns = stat_result.st_mtime_ns
+        self.pattern = pattern
+
+    def __repr__(self):
+        """Returns a representation of the entry, for debugging"""
+        return f'FileEntry({self.path!r}, size={self.size}, mtime_ns={self.mtime_ns}, pattern={self.pattern!r})'
+
+
+class ProductInventory:
+    """
+    Inventory of the products within an output location, scanned on first
+    use and cached until invalidated.
+
+    Hidden files (those whose names start with ".") are not considered
+    products, and the contents of any excluded directories (such as a
+    scratch location nested within the output location) are skipped entirely.
+
+    All methods may be called concurrently from multiple threads.
+
+    """
+
+    def __init__(self, root_path, exclude_paths=(), patterns=()):
+        """
+        Creates a new, unscanned, ProductInventory.
+
+        Parameters
+        ----------
+        root_path : str
+            Path to the output location to inventory.
+        exclude_paths : Iterable[str], optional
+            Paths to directories within the output location whose contents
+            are not products.
+        patterns : Iterable[str], optional
+            Unix-style file name patterns used to classify products. Each
+            product is classified by the first pattern its file name matches.
+
+        """
+        self.root_path = abspath(root_path)
+        self.exclude_paths = frozenset(abspath(exclude_path) for exclude_path in exclude_paths)
+        self.patterns = tuple(patterns)
+
+        self._lock = threading.RLock()
+        self._entries = None
+        self._by_extension = {}
+        self._by_pattern = {}
+        self._sorted_cache = {}
+
+        self.scan_count = 0
+
+    def _classify(self, name):
+        """Returns the first classification pattern matched by a file name, or None"""
+        for pattern in self.patterns:
+            if fnmatch(name, pattern):
+                return pattern
+
+        return None
+
+    @staticmethod
+    def _stat(dir_entry):
+        """Returns the stat result for a scanned file, falling back to the link itself for broken symlinks"""
+        try:
+            return dir_entry.stat()
+        except OSError:
+            return dir_entry.stat(follow_symlinks=False)
+
+    def _add(self, entry):
+        """Adds an entry to the inventory and its lookup tables"""
+        self._entries[entry.path] = entry
+        self._by_extension.setdefault(entry.extension, set()).add(entry.path)
+
+        if entry.pattern is not None:
+            self._by_pattern.setdefault(entry.pattern, set()).add(entry.path)
+
+        self._sorted_cache.clear()
+
+    def _discard(self, path):
+        """Removes the entry for a path from the inventory, returning it (or None if not present)"""
+        entry = self._entries.pop(path, None)
+
+        if entry is not None:
+            self._by_extension[entry.extension].discard(path)
+
+            if entry.pattern is not None:
+                self._by_pattern[entry.pattern].discard(path)
+
+            self._sorted_cache.clear()
+
+        return entry
+
+    def _scan(self):
+        """Scans the output location, replacing any cached entries"""
+        self._entries = {}
+        self._by_extension = {}
+        self._by_pattern = {}
+        self._sorted_cache.clear()
+
+        entries = self._entries
+        by_extension = self._by_extension
+
+        pending_dirs = [self.root_path]
+
+        while pending_dirs:
+            dir_path = pending_dirs.pop()
+
+            try:
+                dir_entries = list(os.scandir(dir_path))
+            except FileNotFoundError:
+                continue
+
+            for dir_entry in dir_entries:
+                if dir_entry.is_dir():
+                    # Symlinked directories are not descended into, matching
+                    # the default behavior of os.walk()
+                    if not dir_entry.is_symlink() and dir_entry.path not in self.exclude_paths:
+                        pending_dirs.append(dir_entry.path)
+                elif not dir_entry.name.startswith('.'):
+                    entry = FileEntry(dir_entry.path, dir_entry.name, self._stat(dir_entry),
+                                      self._classify(dir_entry.name))
+
+                    entries[entry.path] = entry
+                    by_extension.setdefault(entry.extension, set()).add(entry.path)
+
+                    if entry.pattern is not None:
+                        self._by_pattern.setdefault(entry.pattern, set()).add(entry.path)
+
+        self.scan_count += 1
+
+    def _ensure_scanned(self):
+        """Scans the output location if it has not been scanned since the last invalidation"""
+        if self._entries is None:
+            self._scan()
+
+    def _sorted(self, key, paths):
+        """Returns the sorted list of the provided paths, cached under key until the inventory changes"""
+        sorted_paths = self._sorted_cache.get(key)
+
+        if sorted_paths is None:
+            sorted_paths = self._sorted_cache[key] = sorted(paths)
+
+        return list(sorted_paths)
+
+    def invalidate(self):
+        """Discards the cached scan, so the output location is rescanned on next use"""
+        with self._lock:
+            self._entries = None
+
+    def update(self, path):
+        """
+        Records a product which has been written or modified, re-stat'ing it.
+        If the path no longer exists, any entry for it is removed.
+
+        Parameters
+        ----------
+        path : str
+            Path to the product.
+
+        Returns
+        -------
+        entry : FileEntry or None
+            The updated entry for the product, or None if the path does not
+            exist or is not considered a product.
+
+        """
+        path = abspath(path)
+
+        with self._lock:
+            self._ensure_scanned()
+            self._discard(path)
+
+            if not self._is_product_path(path):
+                return None
+
+            try:
+                name = basename(path)
+                entry = FileEntry(path, name, os.stat(path), self._classify(name))
+            except FileNotFoundError:
+                return None
+
+            self._add(entry)
+
+            return entry
+
+    def rename(self, source, destination):
+        """
+        Records the renaming (or move) of a product.
+
+        Parameters
+        ----------
+        source : str
+            Original path to the product.
+        destination : str
+            New path to the product.
+
+        Returns
+        -------
+        entry : FileEntry or None
+            The entry for the product at its new path, or None if the
+            destination is not considered a product.
+
+        """
+        with self._lock:
+            self.remove(source)
+            return self.update(destination)
+
+    def remove(self, path):
+        """
+        Records the removal of a product.
+
+        Parameters
+        ----------
+        path : str
+            Path to the removed product.
+
+        """
+        with self._lock:
+            self._ensure_scanned()
+            self._discard(abspath(path))
+
+    def _is_product_path(self, path):
+        """Returns True if a path would be picked up as a product by a scan of the output location"""
+        if basename(path).startswith('.'):
+            return False
+
+        parent = dirname(path)
+
+        while parent not in self.exclude_paths:
+            if parent == self.root_path:
+                return True
+
+            next_parent = dirname(parent)
+
+            if next_parent == parent:
+                return False
+
+            parent = next_parent
+
+        return False
+
+    def get(self, path):
+        """
+        Returns the cached entry for a product.
+
+        Parameters
+        ----------
+        path : str
+            Path to the product.
+
+        Returns
+        -------
+        entry : FileEntry or None
+            The entry for the product, or None if it is not in the inventory.
+
+        """
+        with self._lock:
+            self._ensure_scanned()
+            return self._entries.get(abspath(path))
+
+    def entries(self):
+        """Returns the entries for all products, sorted by path"""
+        with self._lock:
+            self._ensure_scanned()
+            return [self._entries[path] for path in self._sorted('all', self._entries)]
+
+    def filenames(self):
+        """Returns the absolute paths to all products, sorted"""
+        with self._lock:
+            self._ensure_scanned()
+            return self._sorted('all', self._entries)
+
+    def by_extension(self, *extensions):
+        """
+        Returns the sorted paths to all products with any of the provided file
+        extensions.
+
+        Parameters
+        ----------
+        extensions : str
+            File extensions to look up, including the dot (".tif", for example).
+            Extensions are case-sensitive.
+
+        Returns
+        -------
+        paths : list[str]
+            Absolute paths to the matching products.
+
+        """
+        with self._lock:
+            self._ensure_scanned()
+            paths = set().union(*(self._by_extension.get(extension, ()) for extension in extensions))
+            return self._sorted(('extension',) + extensions, paths)
+
+    def by_pattern(self, pattern):
+        """
+        Returns the sorted paths to all products classified by the provided
+        pattern.
+
+        Parameters
+        ----------
+        pattern : str
+            One of the classification patterns provided to the inventory.
+
+        Returns
+        -------
+        paths : list[str]
+            Absolute paths to the products classified by the pattern.
+
+        """
+        with self._lock:
+            self._ensure_scanned()
+            return self._sorted(('pattern', pattern), self._by_pattern.get(pattern, ()))
+
+    def __len__(self):
+        """Returns the number of products within the output location"""
+        with self._lock:
+            self._ensure_scanned()
+            return len(self._entries)
+
+    def __contains__(self, path):
+        """Returns True if the provided path is one of the products within the output location"""
+        return self.get(path) is not None
+
+
+class InputInventory:
+    """
+    Inventory of the input files listed by a RunConfig, scanned on first use.
+
+    Input paths may be files, which are included as-is, or directories, whose
+    files are included. Directory contents may optionally be filtered by file
+    name patterns, and subdirectories scanned recursively. Hidden files and
+    directories (those whose names start with ".") are never included, and
+    input paths which do not exist are recorded as missing.
+
+    Paths are reported in the form they were provided (relative input paths
+    yield relative file paths).
+
+    """
+
+    def __init__(self, input_paths, recursive=False, include_patterns=(), exclude_patterns=()):
+        """
+        Creates a new, unscanned, InputInventory.
+
+        Parameters
+        ----------
+        input_paths : Iterable[str]
+            Paths to the input files and directories.
+        recursive : bool, optional
+            Whether to include the files within subdirectories of input
+            directories. Defaults to False, in which case only the files
+            directly within input directories are included.
+        include_patterns : Iterable[str], optional
+            Unix-style file name patterns. If provided, only the files within
+            input directories matching at least one pattern are included.
+        exclude_patterns : Iterable[str], optional
+            Unix-style file name patterns. Files within input directories
+            matching any pattern are excluded.
+
+        """
+        self.input_paths = list(input_paths)
+        self.recursive = recursive
+        self.include_patterns = tuple(include_patterns)
+        self.exclude_patterns = tuple(exclude_patterns)
+
+        self._lock = threading.RLock()
+        self._entries = None
+        self._dir_files = {}
+        self._located_paths = set()
+        self._missing_paths = []
+        self._sorted_filenames = None
+
+        self.scan_count = 0
+
+    def _included(self, name):
+        """Returns True if a file name found within an input directory passes the include/exclude patterns"""
+        if self.include_patterns and not any(fnmatch(name, pattern) for pattern in self.include_patterns):
+            return False
+
+        return not any(fnmatch(name, pattern) for pattern in self.exclude_patterns)
+
+    def _scan_dir(self, input_dir):
+        """Scans an input directory, returning the paths to the files included from within it"""
+        dir_files = []
+        pending_dirs = [input_dir]
+
+        while pending_dirs:
+            dir_path = pending_dirs.pop()
+
+            try:
+                dir_entries = list(os.scandir(dir_path))
+            except OSError:
+                continue
+
+            for dir_entry in dir_entries:
+                if dir_entry.name.startswith('.'):
+                    continue
+
+                if dir_entry.is_file():
+                    if self._included(dir_entry.name):
+                        self._entries[dir_entry.path] = FileEntry(dir_entry.path, dir_entry.name,
+                                                                  dir_entry.stat())
+                        dir_files.append(dir_entry.path)
+                elif self.recursive and dir_entry.is_dir() and not dir_entry.is_symlink():
+                    pending_dirs.append(dir_entry.path)
+
+        return dir_files
+
+    def _ensure_scanned(self):
+        """Scans the input paths, if they have not been scanned already"""
+        if self._entries is not None:
+            return
+
+        self._entries = {}
+        self._dir_files = {}
+        self._located_paths = set()
+        self._missing_paths = []
+        self._sorted_filenames = None
+
+        for input_path in self.input_paths:
+            try:
+                input_stat = os.stat(input_path)
+            except OSError:
+                self._missing_paths.append(input_path)
+                continue
+
+            self._located_paths.add(input_path)
+
+            if stat.S_ISDIR(input_stat.st_mode):
+                self._dir_files[input_path] = self._scan_dir(input_path)
+            elif stat.S_ISREG(input_stat.st_mode):
+                name = basename(input_path)
+
+                if not name.startswith('.'):
+                    self._entries[input_path] = FileEntry(input_path, name, input_stat)
+
+        self.scan_count += 1
+
+    def invalidate(self):
+        """Discards the cached scan, so the input paths are rescanned on next use"""
+        with self._lock:
+            self._entries = None
+
+    def filenames(self):
+        """Returns the paths to all included input files, sorted on first request"""
+        with self._lock:
+            self._ensure_scanned()
+
+            if self._sorted_filenames is None:
+                self._sorted_filenames = sorted(self._entries)
+
+            return list(self._sorted_filenames)
+
+    def entries(self):
+        """Returns the entries for all included input files, sorted by path"""
+        with self._lock:
+            return [self._entries[path] for path in self.filenames()]
+
+    def get(self, path):
+        """
+        Returns the cached entry for an included input file.
+
+        Parameters
+        ----------
+        path : str
+            Path to the file, in the form reported by the inventory.
+
+        Returns
+        -------
+        entry : FileEntry or None
+            The entry for the file, or None if it is not included.
+
+        """
+        with self._lock:
+            self._ensure_scanned()
+            return self._entries.get(path)
+
+    def missing_paths(self):
+        """Returns the input paths which could not be located"""
+        with self._lock:
+            self._ensure_scanned()
+            return list(self._missing_paths)
+
+    def exists(self, input_path):
+        """Returns True if one of the input paths was located, False for missing or unknown paths"""
+        with self._lock:
+            self._ensure_scanned()
+            return input_path in self._located_paths
+
+    def isdir(self, input_path):
+        """Returns True if one of the input paths is a directory"""
+        with self._lock:
+            self._ensure_scanned()
+            return input_path in self._dir_files
+
+    def files_in(self, input_path, pattern=None):
+        """
+        Returns the included files found for one of the input paths.
+
+        Parameters
+        ----------
+        input_path : str
+            One of the input paths provided to the inventory.
+        pattern : str, optional
+            Unix-style pattern the returned file names must match.
+
+        Returns
+        -------
+        paths : list[str]
+            Sorted paths to the included files within the input path, if it is
+            a directory, or the input path itself if it is an included file.
+
+        """
+        with self._lock:
+            self._ensure_scanned()
+
+            if input_path in self._dir_files:
+                paths = sorted(self._dir_files[input_path])
+            elif input_path in self._entries:
+                paths = [input_path]
+            else:
+                paths = []
+
+        if pattern is not None:
+            paths = [path for path in paths if fnmatch(basename(path), pattern)]
+
+        return paths
+
+    def __len__(self):
+        """Returns the number of included input files"""
+        with self._lock:
+            self._ensure_scanned()
+            return len(self._entries)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+"""
+=============
+log_filter.py
+=============
+
+Deduplication and rate-limiting of the lines appended to OPERA PGE logs.
+
+Some SAS programs emit the same message (a projection or NaN warning, for
+example) a very large number of times. The filter defined here collapses runs
+of identical lines into a single entry recording the number of repeats, along
+with the time tags of the first and last occurrence, and optionally limits the
+number of lines written for messages matching a set of patterns.
+
+Entries passed through the filter are either parsed log lines, as returned by
+PgeLogger.parse_line(), or raw lines which do not conform to the OPERA log
+formatting style.
+
+"""
+
+from fnmatch import fnmatchcase
+
+
+def _entry_time_tag(entry):
+    """Returns the time tag of an entry, or None for raw lines"""
+    return None if isinstance(entry, str) else entry[6]
+
+
+class RepeatedLineFilter:
+    """
+    Collapses runs of repeated log lines, and enforces per-pattern limits on
+    the number of lines written.
+
+    Lines are considered identical if they share the same severity, module and
+    description (raw lines must match exactly). A run is held back until a
+    different line arrives, or the filter is flushed, at which point a single
+    entry is released for the whole run. The entry is the first line of the
+    run, with its description annotated with the repeat count and the time
+    tags of the first and last occurrence.
+
+    """
+
+    def __init__(self, rate_limits=(), collapse_runs=True):
+        """
+        Creates a new filter.
+
+        Parameters
+        ----------
+        rate_limits : Iterable[tuple], optional
+            Pairs of a Unix-style (case-sensitive) pattern, matched against the
+            description of parsed lines or the whole of raw lines, and the
+            maximum number of matching entries to release. Lines matching more
+            than one pattern are limited by the first.
+        collapse_runs : bool, optional
+            Whether to collapse runs of identical lines. Defaults to True.
+
+        """
+        self.rate_limits = [(pattern, int(max_lines)) for pattern, max_lines in rate_limits]
+        self.collapse_runs = collapse_runs
+
+        # Number of lines released so far for each rate limit, and details of
+        # the lines suppressed since the last call to pop_suppressed()
+        self._released_counts = [0] * len(self.rate_limits)
+        self._suppressed = {}
+
+        # The run currently held back, as [key, entry, count, first time tag, last time tag]
+        self._run = None
+
+        self.collapsed_line_count = 0
+        self.suppressed_line_count = 0
+
+    @staticmethod
+    def _key(entry):
+        """Returns the key lines must share to be considered identical"""
+        if isinstance(entry, str):
+            return entry
+
+        return entry[0], entry[2], entry[5]
+
+    @staticmethod
+    def _collapse(run):
+        """Returns the single entry released for a run"""
+        _, entry, count, first_time_tag, last_time_tag = run
+
+        if count == 1:
+            return entry
+
+        if isinstance(entry, str):
+            return f'{entry} (repeated {count} times)'
+
+        (severity, workflow, module, error_code, error_location, description, time_tag) = entry
+
+        description = (f'{description} (repeated {count} times, first at {first_time_tag}, '
+                       f'last at {last_time_tag})')
+
+        return severity, workflow, module, error_code, error_location, description, time_tag
+
+    def _rate_limited(self, entry):
+        """Returns True if the entry exceeds its rate limit, recording it as suppressed if so"""
+        text = entry if isinstance(entry, str) else entry[5]
+
+        for index, (pattern, max_lines) in enumerate(self.rate_limits):
+            if fnmatchcase(text, pattern):
+                if self._released_counts[index] < max_lines:
+                    self._released_counts[index] += 1
+                    return False
+
+                time_tag = _entry_time_tag(entry)
+                suppressed = self._suppressed.setdefault(index, [0, time_tag, time_tag])
+                suppressed[0] += 1
+                suppressed[2] = time_tag
+                self.suppressed_line_count += 1
+
+                return True
+
+        return False
+
+    def filter(self, entries):
+        """
+        Passes a sequence of entries through the filter.
+
+        Parameters
+        ----------
+        entries : Iterable[tuple or str]
+            The parsed or raw lines to filter, in the order they were logged.
+
+        Returns
+        -------
+        released : list[tuple or str]
+            The entries to write to the log. Any run still in progress is held
+            back until a later call, or flush().
+
+        """
+        released = []
+
+        for entry in entries:
+            run = self._run
+
+            if run is not None:
+                key = self._key(entry)
+
+                if run[0] == key:
+                    run[2] += 1
+                    run[4] = _entry_time_tag(entry)
+                    self.collapsed_line_count += 1
+                    continue
+
+                released.append(self._collapse(run))
+                self._run = None
+
+            if self.rate_limits and self._rate_limited(entry):
+                continue
+
+            if self.collapse_runs:
+                time_tag = _entry_time_tag(entry)
+                self._run = [self._key(entry), entry, 1, time_tag, time_tag]
+            else:
+                released.append(entry)
+
+        return released
+
+    def flush(self):
+        """
+        Releases the run currently held back, if any.
+
+        Returns
+        -------
+        released : list[tuple or str]
+            The entries to write to the log.
+
+        """
+        if self._run is None:
+            return []
+
+        released = [self._collapse(self._run)]
+        self._run = None
+
+        return released
+
+    def pop_suppressed(self):
+        """
+        Returns the details of the lines suppressed by each rate limit since the
+        last call, and resets them.
+
+        Returns
+        -------
+        suppressed : list[tuple]
+            The pattern and maximum number of lines of each rate limit which
+            suppressed lines, along with the number of lines suppressed, and
+            the time tags of the first and last of them (None for raw lines).
+
+        """
+        suppressed = [
+            (self.rate_limits[index][0], self.rate_limits[index][1], count, first_time_tag, last_time_tag)
+            for index, (count, first_time_tag, last_time_tag) in sorted(self._suppressed.items())
+        ]
+
+        self._suppressed.clear()
+
+        return suppressed
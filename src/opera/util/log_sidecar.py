@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+
+"""
+==============
+log_sidecar.py
+==============
+
+Machine-readable JSON-lines sidecar for PGE logs.
+
+The sidecar holds one JSON record per logged message, so tools do not need to
+re-split and re-parse the text log. The final line of the sidecar is an index
+record, containing the byte offsets of the records for each severity and for
+each error code range, which allows tools to seek straight to the messages of
+interest (such as all Critical messages) without scanning the whole file.
+
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from array import array
+
+from .error_codes import CODES_PER_RANGE
+
+SIDECAR_SUFFIX = '.jsonl'
+"""Suffix appended to a log file name to form the name of its sidecar"""
+
+INDEX_RECORD_KEY = 'index'
+"""Key identifying the trailing index record of a sidecar"""
+
+_INDEX_SEARCH_BLOCK_SIZE = 64 * 1024
+"""Number of bytes to read at a time when searching backwards for the index record"""
+
+_encode_record = json.JSONEncoder(separators=(',', ':')).encode
+
+
+def get_sidecar_filename(log_filename):
+    """Returns the file name of the sidecar for the provided log file name."""
+    return f'{log_filename}{SIDECAR_SUFFIX}'
+
+
+def get_error_code_range(error_code):
+    """
+    Returns the start of the error code range (such as 903000 for 903017)
+    that the provided error code falls within. Ranges include the error code
+    base, so the ranges of different loggers remain distinct.
+
+    """
+    return int(error_code) - int(error_code) % CODES_PER_RANGE
+
+
+class JsonLinesLogSidecar:
+    """
+    Accumulates the JSON-lines sidecar for a log as messages are logged.
+
+    Records are spooled to an anonymous temporary file as they arrive, with
+    only the index offsets kept in memory, and the sidecar is written out
+    with its trailing index once the log is finalized.
+
+    """
+
+    def __init__(self, spool_dir=None):
+        """
+        Creates a new JsonLinesLogSidecar.
+
+        Parameters
+        ----------
+        spool_dir : str, optional
+            Directory to spool records to until the sidecar is persisted.
+            Defaults to the system temporary directory.
+
+        """
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+
+        self._spool = tempfile.TemporaryFile(dir=spool_dir)  # pylint: disable=consider-using-with
+        self._offset = 0
+
+        self.record_count = 0
+        self.severity_offsets = {}
+        self.error_code_range_offsets = {}
+
+    @property
+    def closed(self):
+        """Returns True if the sidecar has been persisted or closed."""
+        return self._spool.closed
+
+    def _write_record(self, record):
+        """Spools the provided record, returning its byte offset within the sidecar."""
+        offset = self._offset
+        data = (_encode_record(record) + '\n').encode('utf-8')
+
+        self._spool.write(data)
+        self._offset += len(data)
+        self.record_count += 1
+
+        return offset
+
+    def add_message(self, time_tag, severity, workflow, module, error_code,
+                    error_location, description):
+        """
+        Adds a record for a formatted log message, indexing it by severity
+        and error code range.
+
+        Parameters
+        ----------
+        time_tag : str
+            ISO format time tag of the message.
+        severity : str
+            The standardized severity level of the message.
+        workflow : str
+            Name of the workflow where the logging took place.
+        module : str
+            Name of the module where the logging took place.
+        error_code : int
+            The (final, logged) error code associated with the message.
+        error_location : str
+            File name and line number where the logging took place.
+        description : str
+            Description of the logged event.
+
+        """
+        error_code = int(error_code)
+
+        offset = self._write_record({
+            'time': time_tag,
+            'severity': severity,
+            'workflow': workflow,
+            'module': module,
+            'error_code': error_code,
+            'location': error_location,
+            'description': description
+        })
+
+        self.severity_offsets.setdefault(severity, array('Q')).append(offset)
+        self.error_code_range_offsets.setdefault(
+            get_error_code_range(error_code), array('Q')
+        ).append(offset)
+
+    def add_raw_line(self, line):
+        """
+        Adds a record for a line of the log which does not conform to the
+        OPERA log format, such as unformatted SAS output. Raw lines are not
+        indexed.
+
+        Parameters
+        ----------
+        line : str
+            The line of text, without a trailing newline.
+
+        """
+        self._write_record({'raw': line})
+
+    def index_record(self):
+        """Returns the trailing index record for the records added so far."""
+        return {
+            INDEX_RECORD_KEY: {
+                'severity': {severity: offsets.tolist()
+                             for severity, offsets in self.severity_offsets.items()},
+                'error_code_range': {str(error_code_range): offsets.tolist()
+                                     for error_code_range, offsets
+                                     in sorted(self.error_code_range_offsets.items())}
+            },
+            'record_count': self.record_count
+        }
+
+    def persist(self, filename):
+        """
+        Writes the sidecar, with its trailing index record, to the provided
+        file name and closes the spool file.
+
+        Parameters
+        ----------
+        filename : str
+            Path to write the sidecar to.
+
+        """
+        self._spool.write((_encode_record(self.index_record()) + '\n').encode('utf-8'))
+        self._spool.seek(0)
+
+        with open(filename, 'wb') as outfile:
+            shutil.copyfileobj(self._spool, outfile)
+
+        self._spool.close()
+
+    def close(self):
+        """Closes the sidecar, discarding any spooled records."""
+        self._spool.close()
+
+
+def read_sidecar_index(filename):
+    """
+    Reads the trailing index record of a sidecar, without reading any of the
+    message records.
+
+    Parameters
+    ----------
+    filename : str
+        Path to the sidecar file.
+
+    Returns
+    -------
+    index : dict
+        The index record, with the byte offsets of the message records
+        under "severity" (keyed by severity) and "error_code_range" (keyed
+        by the string form of the range start).
+
+    Raises
+    ------
+    ValueError
+        If the final line of the file is not a sidecar index record.
+
+    """
+    with open(filename, 'rb') as infile:
+        end = infile.seek(0, os.SEEK_END)
+        position = end
+        tail = b''
+
+        # Search backwards for the newline preceding the final line
+        while position > 0:
+            read_size = min(_INDEX_SEARCH_BLOCK_SIZE, position)
+            position -= read_size
+            infile.seek(position)
+            tail = infile.read(read_size) + tail
+
+            if tail.rfind(b'\n', 0, len(tail) - 1) >= 0:
+                break
+
+    last_line = tail.rstrip(b'\n').rsplit(b'\n', 1)[-1]
+
+    try:
+        return json.loads(last_line)[INDEX_RECORD_KEY]
+    except (KeyError, TypeError, ValueError) as err:
+        raise ValueError(f'{filename} does not end with a log sidecar index record') from err
+
+
+def iter_sidecar_records(filename, severity=None, error_code_range=None):
+    """
+    Yields the message records of a sidecar, using its index to seek directly
+    to the records matching the provided filters.
+
+    Parameters
+    ----------
+    filename : str
+        Path to the sidecar file.
+    severity : str, optional
+        If provided, only records of this severity are returned.
+    error_code_range : int, optional
+        If provided, only records with an error code within the range
+        containing this error code are returned.
+
+    Yields
+    ------
+    record : dict
+        The matching message records, in the order they were logged. When no
+        filters are provided, raw line records are included as well.
+
+    """
+    if severity is None and error_code_range is None:
+        with open(filename, 'r', encoding='utf-8') as infile:
+            for line in infile:
+                record = json.loads(line)
+
+                if INDEX_RECORD_KEY not in record:
+                    yield record
+
+        return
+
+    index = read_sidecar_index(filename)
+    offsets = None
+
+    if severity is not None:
+        offsets = set(index['severity'].get(severity, []))
+
+    if error_code_range is not None:
+        range_offsets = set(
+            index['error_code_range'].get(str(get_error_code_range(error_code_range)), [])
+        )
+        offsets = range_offsets if offsets is None else offsets & range_offsets
+
+    with open(filename, 'rb') as infile:
+        for offset in sorted(offsets):
+            infile.seek(offset)
+            yield json.loads(infile.readline())
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+
+"""
+==============
+log_streams.py
+==============
+
+Disk-backed text streams used to buffer PGE logs, and utilities for
+compressing finalized logs and reading them back.
+
+Both streams stand in for the in-memory StringIO a PgeLogger normally buffers
+its log in, keeping the log on disk as it is written so memory use stays
+bounded and the log survives the process being killed. Once the log is
+finalized, the file backing the stream is renamed to the final log location.
+
+"""
+
+import errno
+import gzip
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from io import StringIO, TextIOWrapper
+from os.path import basename, dirname, join
+
+try:
+    import zstandard
+except (ImportError, ModuleNotFoundError):  # pragma: no cover
+    zstandard = None
+
+DEFAULT_FLUSH_INTERVAL = 1.0
+"""Default maximum number of seconds between fsyncs of an asynchronously written log"""
+
+DEFAULT_FLUSH_THRESHOLD = 2**20
+"""Default number of unsynced bytes past which an asynchronously written log is fsync'd"""
+
+LOG_COMPRESSION_SUFFIXES = {'gzip': '.gz'}
+"""File name suffixes of the supported log compression formats, by format name"""
+
+if zstandard is not None:
+    LOG_COMPRESSION_SUFFIXES['zstd'] = '.zst'
+
+GZIP_COMPRESSION_LEVEL = 6
+"""Compression level used for gzip-compressed logs"""
+
+ZSTD_COMPRESSION_LEVEL = 3
+"""Compression level used for zstd-compressed logs"""
+
+_COMPRESSION_CHUNK_SIZE = 2**20
+"""Number of characters/bytes of a log to feed to a compressor at a time"""
+
+
+class SpillingLogStream:
+    """
+    Text stream used to buffer a log, which is kept in memory until it grows
+    past a threshold, after which it is spilled to a temporary file and all
+    further writes go to that file.
+
+    Keeping large logs on disk bounds the memory used by the log, and means
+    the log so far survives on disk should the process be killed. Once the
+    log is finalized, the temporary file is renamed to the final log location,
+    rather than copied.
+
+    """
+
+    SPILL_FILE_PREFIX = '.pge_log_'
+    """Prefix for the temporary files logs are spilled to (hidden, to stay out of product scans)"""
+
+    SPILL_FILE_SUFFIX = '.spill'
+    """Suffix for the temporary files logs are spilled to"""
+
+    def __init__(self, spill_threshold, spill_dir=None, initial_value=''):
+        """
+        Creates a new SpillingLogStream.
+
+        Parameters
+        ----------
+        spill_threshold : int
+            Size of the in-memory buffer, in characters (roughly bytes for
+            typical log contents), past which the log is spilled to disk.
+        spill_dir : str, optional
+            Directory to create the spill file within. Defaults to the system
+            temporary directory.
+        initial_value : str, optional
+            Initial contents of the stream, such as the contents of a log
+            which has been buffered up to this point.
+
+        """
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self.spill_filename = None
+
+        self._stream = StringIO()
+        self.write(initial_value)
+
+    @property
+    def closed(self):
+        """Returns True if the stream has been closed."""
+        return self._stream.closed
+
+    @property
+    def spilled(self):
+        """Returns True if the stream has been spilled to disk."""
+        return self.spill_filename is not None
+
+    def _spill(self):
+        """Moves the in-memory contents of the stream to a new spill file."""
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+        spill_fd, self.spill_filename = tempfile.mkstemp(
+            prefix=self.SPILL_FILE_PREFIX, suffix=self.SPILL_FILE_SUFFIX, dir=self.spill_dir
+        )
+
+        spill_file = open(spill_fd, 'w+', encoding='utf-8')  # pylint: disable=consider-using-with
+        spill_file.write(self._stream.getvalue())
+
+        self._stream.close()
+        self._stream = spill_file
+
+    def write(self, text):
+        """Writes the provided text to the end of the stream."""
+        num_chars = self._stream.write(text)
+
+        if not self.spilled and self._stream.tell() > self.spill_threshold:
+            self._spill()
+
+        return num_chars
+
+    def flush(self):
+        """Flushes any buffered writes to the spill file."""
+        self._stream.flush()
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """Moves the stream position, see io.TextIOBase.seek()."""
+        return self._stream.seek(offset, whence)
+
+    def tell(self):
+        """Returns the current stream position."""
+        return self._stream.tell()
+
+    def read(self, size=-1):
+        """Reads from the current stream position, see io.TextIOBase.read()."""
+        return self._stream.read(size)
+
+    def readlines(self):
+        """Reads the remaining lines from the current stream position."""
+        return self._stream.readlines()
+
+    def getvalue(self):
+        """Returns the entire contents of the stream, leaving the stream position at the end."""
+        if not self.spilled:
+            return self._stream.getvalue()
+
+        self._stream.seek(0)
+        contents = self._stream.read()
+
+        return contents
+
+    def persist(self, filename):
+        """
+        Closes the stream, writing its contents to the provided file name. If
+        the stream was spilled to disk, the spill file is moved into place.
+
+        Parameters
+        ----------
+        filename : str
+            Path to write the stream contents to.
+
+        """
+        if not self.spilled:
+            with open(filename, 'w', encoding='utf-8') as outfile:
+                outfile.write(self._stream.getvalue())
+
+            self._stream.close()
+            return
+
+        self._stream.flush()
+        self._stream.close()
+
+        try:
+            os.replace(self.spill_filename, filename)
+        except OSError as err:
+            if err.errno != errno.EXDEV:
+                raise
+
+            shutil.move(self.spill_filename, filename)
+
+        self.spill_filename = None
+
+    def close(self):
+        """Closes the stream, discarding any spill file."""
+        self._stream.close()
+
+        if self.spilled:
+            os.unlink(self.spill_filename)
+            self.spill_filename = None
+
+
+class AsyncLogStream:
+    """
+    Text stream used to buffer a log, which is written to a journal file on
+    disk by a background thread as messages are logged.
+
+    Writes only place the text on a queue, so the logging call path never
+    waits on the disk. The writer thread drains the queue to the journal file,
+    and fsyncs the journal at least every flush interval, or sooner once the
+    unsynced data grows past the flush threshold. Should the process be
+    killed, the journal holds the log up to the last drain. Once the log is
+    finalized, the journal is renamed to the final log location.
+
+    """
+
+    JOURNAL_FILE_PREFIX = '.pge_log_'
+    """Prefix for journal files (hidden, to stay out of product scans)"""
+
+    JOURNAL_FILE_SUFFIX = '.journal'
+    """Suffix for journal files"""
+
+    _STOP = object()
+    """Queue sentinel instructing the writer thread to exit"""
+
+    def __init__(self, flush_interval=DEFAULT_FLUSH_INTERVAL, flush_threshold=DEFAULT_FLUSH_THRESHOLD,
+                 journal_dir=None, initial_value=''):
+        """
+        Creates a new AsyncLogStream, starting its writer thread.
+
+        Parameters
+        ----------
+        flush_interval : float, optional
+            Maximum number of seconds between fsyncs of the journal, while
+            there is unsynced data. Defaults to DEFAULT_FLUSH_INTERVAL.
+        flush_threshold : int, optional
+            Number of unsynced bytes past which the journal is fsync'd
+            without waiting on the flush interval. Defaults to
+            DEFAULT_FLUSH_THRESHOLD.
+        journal_dir : str, optional
+            Directory to create the journal file within. Should be on the same
+            file system as the final log location, so finalizing the log is
+            just a rename. Defaults to the system temporary directory.
+        initial_value : str, optional
+            Initial contents of the stream, such as the contents of a log
+            which has been buffered up to this point.
+
+        """
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+
+        if journal_dir:
+            os.makedirs(journal_dir, exist_ok=True)
+
+        journal_fd, self.journal_filename = tempfile.mkstemp(
+            prefix=self.JOURNAL_FILE_PREFIX, suffix=self.JOURNAL_FILE_SUFFIX, dir=journal_dir
+        )
+
+        self._journal = open(journal_fd, 'w+', encoding='utf-8')  # pylint: disable=consider-using-with
+        self._queue = queue.SimpleQueue()
+        self._error = None
+        self._closed = False
+
+        self._writer_thread = threading.Thread(target=self._drain, name='PgeLogWriter', daemon=True)
+        self._writer_thread.start()
+
+        self.write(initial_value)
+
+    @property
+    def closed(self):
+        """Returns True if the stream has been closed."""
+        return self._closed
+
+    def _sync(self):
+        """Flushes and fsyncs the journal file."""
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _drain(self):
+        """Writer thread loop, draining the queue into the journal file."""
+        unsynced_bytes = 0
+        sync_deadline = None
+
+        while True:
+            timeout = None if sync_deadline is None else max(sync_deadline - time.monotonic(), 0)
+
+            try:
+                items = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                items = []
+
+            # Write everything queued so far in a single batch
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            texts = [item for item in items if isinstance(item, str)]
+            stop = any(item is self._STOP for item in items)
+            sync_events = [item for item in items if isinstance(item, threading.Event)]
+
+            try:
+                if texts and self._error is None:
+                    text = ''.join(texts)
+                    self._journal.write(text)
+                    self._journal.flush()
+
+                    unsynced_bytes += len(text)
+
+                    if sync_deadline is None:
+                        sync_deadline = time.monotonic() + self.flush_interval
+
+                if sync_deadline is not None and self._error is None and (
+                        stop or sync_events or unsynced_bytes >= self.flush_threshold
+                        or time.monotonic() >= sync_deadline):
+                    self._sync()
+                    unsynced_bytes = 0
+                    sync_deadline = None
+            except OSError as err:
+                # Surfaced to the logging thread on the next flush/persist
+                self._error = err
+                sync_deadline = None
+
+            for sync_event in sync_events:
+                sync_event.set()
+
+            if stop:
+                return
+
+    def _raise_error(self):
+        """Re-raises any error encountered by the writer thread."""
+        if self._error is not None:
+            raise self._error
+
+    def write(self, text):
+        """Queues the provided text to be written to the end of the stream."""
+        if self._closed:
+            raise ValueError('I/O operation on closed log stream')
+
+        if text:
+            self._queue.put(text)
+
+        return len(text)
+
+    def flush(self):
+        """Waits until everything written so far has been written to, and fsync'd to, the journal file."""
+        if self._closed:
+            return
+
+        sync_event = threading.Event()
+        self._queue.put(sync_event)
+        sync_event.wait()
+
+        self._raise_error()
+
+    def getvalue(self):
+        """Returns the entire contents of the stream."""
+        self.flush()
+
+        with open(self.journal_filename, 'r', encoding='utf-8') as infile:
+            return infile.read()
+
+    def _stop(self):
+        """Stops the writer thread, once it has drained and fsync'd the queue, and closes the journal."""
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._writer_thread.join()
+        self._journal.close()
+
+    def persist(self, filename):
+        """
+        Closes the stream, moving the journal file, with all logged messages,
+        to the provided file name.
+
+        Parameters
+        ----------
+        filename : str
+            Path to move the stream contents to.
+
+        """
+        self._stop()
+        self._raise_error()
+
+        try:
+            os.replace(self.journal_filename, filename)
+        except OSError as err:
+            if err.errno != errno.EXDEV:
+                raise
+
+            shutil.move(self.journal_filename, filename)
+
+    def close(self):
+        """Closes the stream, discarding the journal file."""
+        if not self._closed:
+            self._stop()
+            os.unlink(self.journal_filename)
+
+
+def validate_log_compression(compression):
+    """
+    Checks that the provided log compression format is supported.
+
+    Parameters
+    ----------
+    compression : str
+        Name of the compression format.
+
+    Raises
+    ------
+    ValueError
+        If the format is not supported, such as "zstd" when the zstandard
+        package is not installed.
+
+    """
+    if compression not in LOG_COMPRESSION_SUFFIXES:
+        raise ValueError(f'Unsupported log compression format "{compression}", supported formats '
+                         f'are {sorted(LOG_COMPRESSION_SUFFIXES)}')
+
+
+def _open_log_compressor(outfile, compression, log_filename):
+    """Returns a binary stream compressing everything written to it into outfile"""
+    validate_log_compression(compression)
+
+    if compression == 'gzip':
+        # The name recorded in the gzip header is the log name, minus ".gz"
+        return gzip.GzipFile(filename=log_filename, mode='wb', fileobj=outfile,
+                             compresslevel=GZIP_COMPRESSION_LEVEL)
+
+    return zstandard.ZstdCompressor(level=ZSTD_COMPRESSION_LEVEL).stream_writer(
+        outfile, closefd=False
+    )
+
+
+def write_compressed_log(log_filename, compression, contents=None, source_filename=None):
+    """
+    Writes a log through a streaming compressor. The compressed log is written
+    to a hidden, temporary file alongside the destination, and renamed into
+    place once complete, so a partially compressed log is never visible at
+    the final location.
+
+    Parameters
+    ----------
+    log_filename : str
+        Path to write the compressed log to.
+    compression : str
+        Compression format, one of the keys of LOG_COMPRESSION_SUFFIXES.
+    contents : str, optional
+        Contents of the log to compress. Either this or source_filename must
+        be provided.
+    source_filename : str, optional
+        Path to an uncompressed log to compress, which is removed once the
+        compressed log is in place.
+
+    """
+    partial_filename = join(dirname(log_filename), f'.{basename(log_filename)}.partial')
+
+    try:
+        with open(partial_filename, 'wb') as outfile:
+            with _open_log_compressor(outfile, compression, log_filename) as compressor:
+                if source_filename is not None:
+                    with open(source_filename, 'rb') as infile:
+                        shutil.copyfileobj(infile, compressor, _COMPRESSION_CHUNK_SIZE)
+                else:
+                    for start in range(0, len(contents), _COMPRESSION_CHUNK_SIZE):
+                        compressor.write(contents[start:start + _COMPRESSION_CHUNK_SIZE].encode('utf-8'))
+
+        os.replace(partial_filename, log_filename)
+    except BaseException:
+        if os.path.exists(partial_filename):
+            os.unlink(partial_filename)
+
+        raise
+
+    if source_filename is not None:
+        os.unlink(source_filename)
+
+
+def open_log_file(log_filename):
+    """
+    Opens a finalized log for reading as text, transparently decompressing
+    logs with any of the suffixes in LOG_COMPRESSION_SUFFIXES.
+
+    Parameters
+    ----------
+    log_filename : str
+        Path to the (possibly compressed) log to open.
+
+    Returns
+    -------
+    log_file : io.TextIOBase
+        The opened log.
+
+    """
+    if log_filename.endswith(LOG_COMPRESSION_SUFFIXES['gzip']):
+        return gzip.open(log_filename, 'rt', encoding='utf-8')
+
+    if zstandard is not None and log_filename.endswith(LOG_COMPRESSION_SUFFIXES['zstd']):
+        return TextIOWrapper(
+            zstandard.ZstdDecompressor().stream_reader(open(log_filename, 'rb'), closefd=True),
+            encoding='utf-8'
+        )
+
+    return open(log_filename, 'r', encoding='utf-8')
@@ -13,20 +13,70 @@ Adapted By: Scott Collins, Jim Hofman
 
 """
 import datetime
-import inspect
+import re
 import shutil
+import sys
+import threading
 import time
+from contextlib import contextmanager
 from io import StringIO
-from os.path import basename, isfile
+from os.path import basename, dirname, isfile, join
 
 import opera.util.time as time_util
 from opera.util import error_codes
 
 from .error_codes import ErrorCode
+from .log_filter import RepeatedLineFilter
+from .log_sidecar import JsonLinesLogSidecar, get_sidecar_filename
+from .log_streams import DEFAULT_FLUSH_INTERVAL, DEFAULT_FLUSH_THRESHOLD
+from .log_streams import LOG_COMPRESSION_SUFFIXES, AsyncLogStream, SpillingLogStream
+from .log_streams import validate_log_compression, write_compressed_log
+from .metrics import MetricsRegistry
 from .time import get_iso_time
 from .usage_metrics import get_os_metrics
 
 
+DEFAULT_APPEND_BLOCK_SIZE = 4 * 2**20
+"""Approximate number of characters of a source log to process at a time when appending"""
+
+LOCATION_NOT_CAPTURED = "N/A"
+"""Location logged for messages whose error code has location capture disabled"""
+
+_LOCATION_CACHE = {}
+"""Cache of formatted call-site locations, keyed by (code object, line number)"""
+
+
+def get_caller_location(back_frames=0):
+    """
+    Returns the "<file name>:<line number>" location of a call site on the
+    current call stack.
+
+    Locations are formatted once per call site and cached, so repeated calls
+    from the same location only perform a frame lookup and dictionary access.
+
+    Parameters
+    ----------
+    back_frames : int, optional
+        Number of call-stack frames to back up from the caller of this
+        function. Zero returns the location of the caller itself.
+
+    Returns
+    -------
+    location : str
+        The file name and line number of the requested call-stack frame.
+
+    """
+    # pylint: disable=protected-access
+    frame = sys._getframe(back_frames + 1)
+    key = (frame.f_code, frame.f_lineno)
+
+    try:
+        return _LOCATION_CACHE[key]
+    except KeyError:
+        location = _LOCATION_CACHE[key] = f'{frame.f_code.co_filename}:{frame.f_lineno}'
+        return location
+
+
 def write(log_stream, severity, workflow, module, error_code, error_location,
           description, time_tag=None):
     """
@@ -62,6 +112,36 @@ def write(log_stream, severity, workflow, module, error_code, error_location,
     log_stream.write(message_str)
 
 
+def split_log_line(line):
+    """
+    Splits a formatted log line into its component fields, with any
+    leading/trailing whitespace removed, but otherwise as logged.
+
+    Parameters
+    ----------
+    line : str
+        The log line to split.
+
+    Returns
+    -------
+    line_components : tuple
+        The time tag, severity, workflow, module, error code, error location
+        and description fields of the line.
+
+    Raises
+    ------
+    ValueError
+        If the line does not have the expected number of fields.
+
+    """
+    line_components = line.split(',', maxsplit=6)
+
+    if len(line_components) < 7:
+        raise ValueError('Line does not conform to expected formatting style')
+
+    return tuple(str.strip(line_component) for line_component in line_components)
+
+
 def default_log_file_name():
     """
     Returns a path + filename that can be used for the log file right away.
@@ -115,6 +195,85 @@ def get_severity_from_error_code(error_code):
     return "Critical"
 
 
+_STANDARD_SEVERITIES = frozenset(("Debug", "Info", "Warning", "Critical"))
+"""The standardized severity strings"""
+
+
+_LOGGED_LINE_ERROR_CODES = {
+    "Debug": ErrorCode.LOGGED_DEBUG_LINE,
+    "Info": ErrorCode.LOGGED_INFO_LINE,
+    "Warning": ErrorCode.LOGGED_WARNING_LINE,
+    "Critical": ErrorCode.LOGGED_CRITICAL_LINE
+}
+"""Error code offsets assigned to appended log lines, by standardized severity"""
+
+_match_simple_time_tag = re.compile(
+    r'(\d{4}-\d{2}-\d{2})[T ]((?:[01]\d|2[0-3]):[0-5]\d:[0-5]\d)(?:\.(\d{3}|\d{6}))?'
+).fullmatch
+"""
+Matches the naive time tags (with millisecond, microsecond or no fractional
+seconds) typically logged by SAS programs, which can be converted to ISO format
+without a round-trip through datetime.
+"""
+
+
+def _format_log_entry(entry):
+    """
+    Returns the log line for an entry appended to a log, which is either a
+    parsed line (as returned by PgeLogger.parse_line()), or a raw line.
+    """
+    if isinstance(entry, str):
+        return entry + "\n"
+
+    severity, workflow, module, error_code, error_location, description, time_tag = entry
+
+    return f'{time_tag}, {severity}, {workflow}, {module}, {error_code}, {error_location}, "{description}"\n'
+
+
+def _iter_stripped_line_blocks(source_stream, block_size):
+    """
+    Yields lists of lines read from the provided text stream, a block at a
+    time, such that the lines yielded are the same as those obtained by
+    reading the whole stream, stripping it, and splitting it on newlines.
+    """
+    started = False
+
+    # The last non-blank line read so far, followed by any blank lines read
+    # since, which are held back until it is known whether they are trailing
+    held_lines = []
+
+    while True:
+        lines = source_stream.readlines(block_size)
+
+        if not lines:
+            break
+
+        block = []
+
+        for line in lines:
+            if line[-1:] == '\n':
+                line = line[:-1]
+
+            if not line or line.isspace():
+                if started:
+                    held_lines.append(line)
+                continue
+
+            if not started:
+                line = line.lstrip()
+                started = True
+
+            block.extend(held_lines)
+            held_lines = [line]
+
+        if block:
+            yield block
+
+    # Drop trailing whitespace, including any trailing blank lines. An empty
+    # source still results in a single (empty) line.
+    yield [held_lines[0].rstrip()] if held_lines else ['']
+
+
 def standardize_severity_string(severity):
     """
     Returns the severity string in a consistent way.
@@ -130,6 +289,10 @@ def standardize_severity_string(severity):
         The standardized severity string.
 
     """
+    # Fast path for severities which are already standardized
+    if severity in _STANDARD_SEVERITIES:
+        return severity
+
     severity = severity.strip().title()  # first char uppercase, rest lowercase.
 
     # Convert some potential log level name variations
@@ -142,6 +305,35 @@ def standardize_severity_string(severity):
     return severity
 
 
+class DeferredCriticalError(RuntimeError):
+    """
+    Raised by PgeLogger.critical() in place of logging the message and
+    finalizing the log, while critical messages are deferred. See
+    PgeLogger.defer_critical().
+    """
+
+    def __init__(self, module, error_code_offset, description):
+        """
+        Creates a new DeferredCriticalError.
+
+        Parameters
+        ----------
+        module : str
+            Name of the module which raised the critical message.
+        error_code_offset : int
+            Error code offset of the critical message.
+        description : str
+            Description of the critical message, also used as the exception
+            string.
+
+        """
+        super().__init__(description)
+
+        self.module = module
+        self.error_code_offset = error_code_offset
+        self.description = description
+
+
 class PgeLogger:
     """
     Class to help with the PGE logging.
@@ -149,6 +341,8 @@ class PgeLogger:
     Advantages over the standalone write() function:
     * Opens and closes the log file for you
     * The class's write() function has fewer arguments that need to be provided.
+    * Safe for use from multiple threads, such as concurrent post-processing
+      steps.
 
     """
 
@@ -176,6 +370,10 @@ class PgeLogger:
         self.log_count_by_severity = self._make_blank_log_count_by_severity_dict()
         self.log_filename = log_filename
 
+        # Serializes access to the log stream and message counts. Reentrant,
+        # since finalizing the log writes the log summary.
+        self._lock = threading.RLock()
+
         if not log_filename:
             self.log_filename = default_log_file_name()
 
@@ -189,6 +387,25 @@ class PgeLogger:
         self._error_code_base = (error_code_base
                                  if error_code_base else PgeLogger.LOGGER_CODE_BASE)
 
+        # Error code offsets for which the call-site location is not captured
+        self.location_capture_disabled = set()
+
+        # Optional JSON-lines sidecar, written alongside the log when finalized
+        self.sidecar = None
+
+        # Optional filter collapsing repeated lines appended to the log
+        self.line_filter = None
+
+        # Typed record of each metric logged via log_one_metric()
+        self.metrics = MetricsRegistry()
+
+        # Background compression of the finalized log, see close_log_stream()
+        self._compression_thread = None
+        self._compression_error = None
+
+        # Whether critical() raises without finalizing the log, see defer_critical()
+        self._critical_deferred = False
+
     @property
     def workflow(self):
         """Return specific workflow"""
@@ -198,6 +415,20 @@ class PgeLogger:
     def workflow(self, workflow: str):
         self._workflow = workflow
 
+    def disable_location_capture(self, *error_code_offsets):
+        """
+        Disables capture of the call-site location for messages logged with
+        any of the provided error code offsets. This is useful for high-volume
+        messages, such as metrics, where the location is of little use.
+
+        Parameters
+        ----------
+        *error_code_offsets : int or ErrorCode
+            The error code offsets to disable location capture for.
+
+        """
+        self.location_capture_disabled.update(error_code_offsets)
+
     @property
     def error_code_base(self):
         """Return the error code base from error_codes.py"""
@@ -207,23 +438,272 @@ class PgeLogger:
     def error_code_base(self, error_code_base: int):
         self._error_code_base = error_code_base
 
-    def close_log_stream(self):
+    def close_log_stream(self, compression=None, background=False):
         """
         Writes the log summary to the log stream
         Writes the log stream to a log file and saves the file to disk
         Closes the log stream
 
+        Parameters
+        ----------
+        compression : str, optional
+            If provided, the log file is written through a streaming
+            compressor of this format (one of the keys of
+            LOG_COMPRESSION_SUFFIXES). The log file name should already carry
+            the matching suffix, which is left off the name of any sidecar.
+        background : bool, optional
+            If True, compression runs on a background thread, and
+            wait_for_compression() must be called to ensure the compressed
+            log is complete. Ignored when compression is not requested.
+
+        """
+        with self._lock:
+            if self.log_stream and not self.log_stream.closed:
+                self._flush_line_filter()
+                self.write_log_summary()
+
+                sidecar_log_filename = self.log_filename
+
+                if compression is not None:
+                    suffix = LOG_COMPRESSION_SUFFIXES.get(compression, '')
+
+                    if suffix and sidecar_log_filename.endswith(suffix):
+                        sidecar_log_filename = sidecar_log_filename[:-len(suffix)]
+
+                    self._compress_log_stream(compression, background)
+                elif isinstance(self.log_stream, (SpillingLogStream, AsyncLogStream)):
+                    self.log_stream.persist(self.log_filename)
+                else:
+                    self.log_stream.seek(0)
+
+                    with open(self.log_filename, 'w', encoding='utf-8') as outfile:
+                        shutil.copyfileobj(self.log_stream, outfile)
+
+                    self.log_stream.close()
+
+                if self.sidecar is not None and not self.sidecar.closed:
+                    self.sidecar.persist(get_sidecar_filename(sidecar_log_filename))
+
+    def _compress_log_stream(self, compression, background):
+        """
+        Closes the log stream, writing its contents to the log file through
+        a streaming compressor. See close_log_stream().
         """
-        if self.log_stream and not self.log_stream.closed:
-            self.write_log_summary()
+        # Validate up front, so an unsupported format is reported before the log stream is closed
+        validate_log_compression(compression)
 
-            self.log_stream.seek(0)
+        compression_args = {'log_filename': self.log_filename, 'compression': compression}
 
-            with open(self.log_filename, 'w', encoding='utf-8') as outfile:
-                shutil.copyfileobj(self.log_stream, outfile)
+        log_on_disk = (isinstance(self.log_stream, AsyncLogStream)
+                       or (isinstance(self.log_stream, SpillingLogStream) and self.log_stream.spilled))
 
+        if log_on_disk:
+            # Move the on-disk log next to its destination, and compress from there
+            source_filename = join(dirname(self.log_filename),
+                                   f'.{basename(self.log_filename)}.uncompressed')
+            self.log_stream.persist(source_filename)
+            compression_args['source_filename'] = source_filename
+        else:
+            compression_args['contents'] = self.log_stream.getvalue()
             self.log_stream.close()
 
+        if not background:
+            write_compressed_log(**compression_args)
+            return
+
+        def _run_compression():
+            try:
+                write_compressed_log(**compression_args)
+            except Exception as err:  # pylint: disable=broad-except
+                self._compression_error = err
+
+        self._compression_thread = threading.Thread(target=_run_compression, name='PgeLogCompressor')
+        self._compression_thread.start()
+
+    def wait_for_compression(self):
+        """
+        Waits for any background compression of the finalized log started by
+        close_log_stream() to complete.
+
+        Raises
+        ------
+        Exception
+            Any error encountered while compressing the log.
+
+        """
+        if self._compression_thread is not None:
+            self._compression_thread.join()
+            self._compression_thread = None
+
+        if self._compression_error is not None:
+            error, self._compression_error = self._compression_error, None
+            raise error
+
+    def enable_spill(self, spill_threshold, spill_dir=None):
+        """
+        Switches the log stream over to a SpillingLogStream, so the log is
+        only buffered in memory until it grows past the provided threshold,
+        after which it is buffered on disk.
+
+        Any messages logged so far are carried over to the new stream.
+
+        Parameters
+        ----------
+        spill_threshold : int
+            Size of the in-memory log buffer, in characters, past which the
+            log is spilled to disk.
+        spill_dir : str, optional
+            Directory to spill the log to. Should be on the same file system
+            as the final log location, so finalizing the log is just a rename.
+            Defaults to the system temporary directory.
+
+        """
+        with self._lock:
+            if isinstance(self.log_stream, AsyncLogStream):
+                # Already buffered on disk
+                return
+
+            if isinstance(self.log_stream, SpillingLogStream):
+                self.log_stream.spill_threshold = spill_threshold
+                return
+
+            contents = self.log_stream.getvalue()
+            self.log_stream.close()
+
+            self.log_stream = SpillingLogStream(spill_threshold, spill_dir, initial_value=contents)
+
+    def enable_async_writer(self, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                            flush_threshold=DEFAULT_FLUSH_THRESHOLD, journal_dir=None):
+        """
+        Switches the log stream over to an AsyncLogStream, so the log is
+        written to a journal file on disk by a background thread as messages
+        are logged, and survives should the process be killed before the log
+        is finalized.
+
+        Any messages logged so far are carried over to the new stream.
+
+        Parameters
+        ----------
+        flush_interval : float, optional
+            Maximum number of seconds between fsyncs of the journal.
+            Defaults to DEFAULT_FLUSH_INTERVAL.
+        flush_threshold : int, optional
+            Number of unsynced bytes past which the journal is fsync'd early.
+            Defaults to DEFAULT_FLUSH_THRESHOLD.
+        journal_dir : str, optional
+            Directory to write the journal file within. Should be on the same
+            file system as the final log location, so finalizing the log is
+            just a rename. Defaults to the system temporary directory.
+
+        """
+        with self._lock:
+            if isinstance(self.log_stream, AsyncLogStream):
+                self.log_stream.flush_interval = flush_interval
+                self.log_stream.flush_threshold = flush_threshold
+                return
+
+            contents = self.log_stream.getvalue()
+            self.log_stream.close()
+
+            self.log_stream = AsyncLogStream(flush_interval, flush_threshold, journal_dir,
+                                             initial_value=contents)
+
+    def enable_line_filter(self, rate_limits=(), collapse_runs=True):
+        """
+        Enables filtering of the lines appended to this log via append() and
+        append_line(). Runs of identical lines are collapsed into a single
+        entry, and lines matching any of the provided patterns are limited to
+        a maximum number of entries. See log_filter.RepeatedLineFilter.
+
+        The counts of messages logged for each severity always include every
+        appended line, whether or not it was written to the log.
+
+        Parameters
+        ----------
+        rate_limits : Iterable[tuple], optional
+            Pairs of a Unix-style pattern, matched against the description of
+            each appended line, and the maximum number of matching entries to
+            write to the log.
+        collapse_runs : bool, optional
+            Whether to collapse runs of identical lines. Defaults to True.
+
+        """
+        with self._lock:
+            self.line_filter = RepeatedLineFilter(rate_limits, collapse_runs)
+
+    def _write_entries(self, entries):
+        """Writes parsed or raw appended lines to the log stream and sidecar"""
+        self.log_stream.write(''.join(map(_format_log_entry, entries)))
+
+        if self.sidecar is not None:
+            for entry in entries:
+                if isinstance(entry, str):
+                    self.sidecar.add_raw_line(entry)
+                else:
+                    (severity, workflow, module, error_code,
+                     error_location, description, time_tag) = entry
+
+                    self.sidecar.add_message(time_tag, severity, workflow, module,
+                                             error_code, error_location, description)
+
+    def _flush_line_filter(self):
+        """
+        Writes out any run of lines held back by the line filter, followed by
+        a message for each rate limit which suppressed lines since the last
+        flush.
+        """
+        with self._lock:
+            if self.line_filter is None:
+                return
+
+            self._write_entries(self.line_filter.flush())
+
+            for pattern, max_lines, count, first_time_tag, last_time_tag in self.line_filter.pop_suppressed():
+                msg = f"Suppressed {count} appended line(s) matching '{pattern}' past the limit of {max_lines}"
+
+                if first_time_tag:
+                    msg += f', first at {first_time_tag}, last at {last_time_tag}'
+
+                self.info("PgeLogger", ErrorCode.LOGGED_LINES_SUPPRESSED, msg)
+
+    def enable_sidecar(self, spool_dir=None):
+        """
+        Enables the JSON-lines sidecar for this log, which is written alongside
+        the log file (with the name returned by log_sidecar.get_sidecar_filename())
+        when the log is finalized.
+
+        Any messages logged so far are carried over to the sidecar.
+
+        Parameters
+        ----------
+        spool_dir : str, optional
+            Directory to spool sidecar records to until the log is finalized.
+            Defaults to the system temporary directory.
+
+        """
+        with self._lock:
+            if self.sidecar is not None:
+                return
+
+            self.sidecar = JsonLinesLogSidecar(spool_dir)
+
+            for log_line in self.log_stream.getvalue().splitlines():
+                try:
+                    (time_tag, severity, workflow, module,
+                     error_code, error_location, description) = split_log_line(log_line)
+
+                    error_code = int(error_code)
+                except ValueError:
+                    self.sidecar.add_raw_line(log_line)
+                    continue
+
+                # Remove the quotes added around descriptions by write()
+                if len(description) >= 2 and description[0] == description[-1] == '"':
+                    description = description[1:-1]
+
+                self.sidecar.add_message(time_tag, severity, workflow, module,
+                                         error_code, error_location, description)
+
     def get_log_count_by_severity(self, severity):
         """
         Gets the number of messages logged for the specified severity
@@ -304,20 +784,30 @@ class PgeLogger:
 
         """
         severity = standardize_severity_string(severity)
-        self.increment_log_count_by_severity(severity)
-
-        caller = inspect.currentframe().f_back
 
         # TODO: Can the number of back frames be determined implicitly?
         #       i.e. back up until the first non-logging frame is reached?
-        for _ in range(additional_back_frames):
-            caller = caller.f_back
+        if self.location_capture_disabled and error_code_offset in self.location_capture_disabled:
+            location = LOCATION_NOT_CAPTURED
+        else:
+            location = get_caller_location(additional_back_frames + 1)
+
+        time_tag = time_util.get_current_iso_time()
+        error_code = self.error_code_base + error_code_offset
 
-        location = caller.f_code.co_filename + ':' + str(caller.f_lineno)
+        with self._lock:
+            # Any run of appended lines held back precedes this message
+            if self.line_filter is not None:
+                self._write_entries(self.line_filter.flush())
 
-        write(self.log_stream, severity, self.workflow, module,
-              self.error_code_base + error_code_offset,
-              location, description)
+            self.increment_log_count_by_severity(severity)
+
+            write(self.log_stream, severity, self.workflow, module,
+                  error_code, location, description, time_tag)
+
+            if self.sidecar is not None:
+                self.sidecar.add_message(time_tag, severity, self.workflow, module,
+                                         error_code, location, description)
 
     def info(self, module, error_code_offset, description):
         """
@@ -380,7 +870,8 @@ class PgeLogger:
         Since critical messages should be used for unrecoverable errors, any
         time this log level is invoked a RuntimeError is raised with the
         description provided to this function. The log file is closed and
-        finalized before the exception is raised.
+        finalized before the exception is raised. Within defer_critical(),
+        a DeferredCriticalError is raised instead, and nothing is logged.
 
         Parameters
         ----------
@@ -399,6 +890,9 @@ class PgeLogger:
             parameter is provided as the exception string.
 
         """
+        if self._critical_deferred:
+            raise DeferredCriticalError(module, error_code_offset, description)
+
         self.write("Critical", module, error_code_offset, description,
                    additional_back_frames=1)
 
@@ -406,6 +900,26 @@ class PgeLogger:
 
         raise RuntimeError(description)
 
+    @contextmanager
+    def defer_critical(self):
+        """
+        Context manager within which critical() raises a DeferredCriticalError,
+        rather than logging the message and finalizing the log.
+
+        This allows work running concurrently on other threads to keep logging
+        until it completes, after which the caller logs the deferred message
+        by passing the attributes of the error to critical().
+
+        """
+        with self._lock:
+            previously_deferred, self._critical_deferred = self._critical_deferred, True
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._critical_deferred = previously_deferred
+
     def log(self, module, error_code_offset, description, additional_back_frames=0):
         """
         Logs any kind of message.
@@ -453,42 +967,148 @@ class PgeLogger:
         self.log_filename = new_filename
 
     def get_stream_object(self):
-        """Return the stingIO object for the current log."""
+        """Return the stream object (StringIO, SpillingLogStream or AsyncLogStream) for the current log."""
         return self.log_stream
 
     def get_file_name(self):
         """Return the file name for the current log."""
         return self.log_filename
 
-    def append(self, source):
+    def append(self, source, block_size=DEFAULT_APPEND_BLOCK_SIZE):
         """
         Appends text from another file to this log file.
 
+        Leading and trailing whitespace is removed from the source, and each
+        line is then appended as if by append_line(). The source is streamed
+        in blocks rather than read into memory, and lines using the typical
+        SAS time tag format are parsed via a fast path, with the formatted
+        lines written to the log a block at a time. If the line filter is
+        enabled, any run of lines held back by the filter is written out once
+        the whole source is appended, along with a message for each rate
+        limit which suppressed lines.
+
         Parameters
         ----------
         source : str
             The source text to append. If the source refers a file name, the
             contents of the file will be appended. Otherwise, the provided
             text is appended as is.
+        block_size : int, optional
+            Approximate number of characters of the source to process at a
+            time. Defaults to DEFAULT_APPEND_BLOCK_SIZE.
 
         """
         if isfile(source):
             with open(source, 'r', encoding='utf-8') as source_file_object:
-                source_contents = source_file_object.read().strip()
+                self._append_stream(source_file_object, block_size)
         else:
-            source_contents = source.strip()
+            self._append_stream(StringIO(source), block_size)
+
+    def _append_stream(self, source_stream, block_size):
+        """
+        Appends the (stripped) contents of the provided text stream to this
+        log file, a block at a time. See append().
+        """
+        # Caches of the standardized form (or None if unrecognized) of each
+        # severity string, and of whether each date is valid, since these
+        # are typically repeated across the whole source
+        severities = {}
+        valid_dates = {}
+
+        for lines in _iter_stripped_line_blocks(source_stream, block_size):
+            error_code_base = self.error_code_base
+            entries = []
+            block_counts = dict.fromkeys(_LOGGED_LINE_ERROR_CODES, 0)
+
+            for line in lines:
+                parsed_line = None
+                fields = line.split(',', 6)
+                time_match = len(fields) == 7 and _match_simple_time_tag(fields[0].strip())
+
+                if time_match:
+                    (_, raw_severity, workflow, module,
+                     _, error_location, description) = fields
+                    date, time_of_day, fraction = time_match.groups()
+
+                    try:
+                        severity = severities[raw_severity]
+                    except KeyError:
+                        severity = standardize_severity_string(raw_severity)
+                        severity = severities[raw_severity] = (
+                            severity if severity in _LOGGED_LINE_ERROR_CODES else None
+                        )
+
+                    try:
+                        date_valid = valid_dates[date]
+                    except KeyError:
+                        try:
+                            datetime.date.fromisoformat(date)
+                            date_valid = valid_dates[date] = True
+                        except ValueError:
+                            date_valid = valid_dates[date] = False
+
+                    if severity and date_valid:
+                        parsed_line = (severity, workflow.strip(), module.strip(),
+                                       error_code_base + _LOGGED_LINE_ERROR_CODES[severity],
+                                       error_location.strip(),
+                                       description.strip().strip('"').strip("'").replace('"', "'"),
+                                       f'{date}T{time_of_day}.{(fraction or "").ljust(6, "0")}Z')
+
+                # Fall back to the full parser for anything off the fast path
+                if parsed_line is None:
+                    try:
+                        parsed_line = self.parse_line(line)
+                    except ValueError:
+                        entries.append(line)
+                        continue
+
+                entries.append(parsed_line)
+                block_counts[parsed_line[0]] += 1
+
+            with self._lock:
+                if self.line_filter is not None:
+                    entries = self.line_filter.filter(entries)
+
+                self._write_entries(entries)
+
+                # Counts include any lines collapsed or suppressed by the filter
+                for severity, count in block_counts.items():
+                    self.log_count_by_severity[severity] += count
+
+        self._flush_line_filter()
+
+    def append_line(self, log_line):
+        """
+        Appends a single line of text to this log file.
+
+        This is the per-line counterpart to append(), and is suitable for
+        feeding in output from a source, such as the stdout of a running
+        SAS, one line at a time as it becomes available.
+
+        Parameters
+        ----------
+        log_line : str
+            The line of text to append, without a trailing newline.
 
-        # Parse the contents to append to see if they conform to the expected log
+        """
+        # Parse the line to append to see if it conforms to the expected log
         # formatting for OPERA
-        for log_line in source_contents.split('\n'):
-            try:
-                parsed_line = self.parse_line(log_line)
-                write(self.log_stream, *parsed_line)
-                severity = parsed_line[0]
-                self.increment_log_count_by_severity(severity)
-            # If the line does not conform to the expected formatting, just append as-is
-            except ValueError:
-                self.log_stream.write(log_line + "\n")
+        try:
+            parsed_line = self.parse_line(log_line)
+        # If the line does not conform to the expected formatting, just append as-is
+        except ValueError:
+            parsed_line = None
+
+        with self._lock:
+            entries = [log_line if parsed_line is None else parsed_line]
+
+            if self.line_filter is not None:
+                entries = self.line_filter.filter(entries)
+
+            self._write_entries(entries)
+
+            if parsed_line is not None:
+                self.increment_log_count_by_severity(parsed_line[0])
 
     def parse_line(self, line):
         """
@@ -512,21 +1132,13 @@ class PgeLogger:
 
         """
         try:
-            line_components = line.split(',', maxsplit=6)
-
-            if len(line_components) < 7:
-                raise ValueError('Line does not conform to expected formatting style')
-
-            # Remove leading/trailing whitespace from all parsed fields
-            line_components = tuple(str.strip(line_component) for line_component in line_components)
-
             (time_tag,
              severity,
              workflow,
              module,
              error_code,
              error_location,
-             description) = line_components
+             description) = split_log_line(line)
 
             # Convert time-tag to expected iso format
             time_tag = get_iso_time(datetime.datetime.fromisoformat(time_tag))
@@ -541,12 +1153,7 @@ class PgeLogger:
             description = description.replace('"', "'")
 
             # Map the error code based on message severity
-            error_code = {
-                "Debug": ErrorCode.LOGGED_DEBUG_LINE,
-                "Info": ErrorCode.LOGGED_INFO_LINE,
-                "Warning": ErrorCode.LOGGED_WARNING_LINE,
-                "Critical": ErrorCode.LOGGED_CRITICAL_LINE
-            }[severity]
+            error_code = _LOGGED_LINE_ERROR_CODES[severity]
 
             # Add the error code base
             error_code += self.error_code_base
@@ -561,7 +1168,8 @@ class PgeLogger:
     def log_one_metric(self, module, metric_name, metric_value,
                        additional_back_frames=0):
         """
-        Writes one metric value to the log file.
+        Writes one metric value to the log file, and records it to this
+        logger's metrics registry.
 
         Parameters
         ----------
@@ -576,6 +1184,8 @@ class PgeLogger:
             the calling function and line number.
 
         """
+        self.metrics.record(metric_name, metric_value)
+
         # msg = "{}: {}".format(metric_name, metric_value)
         msg = f"{metric_name}: {metric_value}"
         self.log(module, ErrorCode.SUMMARY_STATS_MESSAGE, msg,
@@ -601,6 +1211,14 @@ class PgeLogger:
         for metric_name, value in metrics.items():
             self.log_one_metric(module_name, "overall." + metric_name, value)
 
+        # Lines appended to the log which were collapsed into repeats, or
+        # suppressed by a rate limit
+        if self.line_filter is not None:
+            self.log_one_metric(module_name, "overall.log_messages.collapsed",
+                                self.line_filter.collapsed_line_count)
+            self.log_one_metric(module_name, "overall.log_messages.suppressed",
+                                self.line_filter.suppressed_line_count)
+
         # Overall elapsed time
         elapsed_time_seconds = time.monotonic() - self.start_time
         self.log_one_metric(module_name, "overall.elapsed_seconds",
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+
+"""
+==========
+metrics.py
+==========
+
+Registry of typed metrics (counters, gauges, timers and histograms) for use
+with OPERA PGEs.
+
+Metrics logged via PgeLogger.log_one_metric() are also recorded to the
+logger's registry, which may be exported at the end of a job as a JSON
+document, or as a file for the Prometheus node exporter's textfile collector,
+so metrics can be collected without parsing the PGE logs.
+
+"""
+
+import bisect
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from os.path import dirname
+
+DEFAULT_HISTOGRAM_BUCKETS = (0.01, 0.1, 1.0, 10.0, 100.0, 1000.0, 10000.0)
+"""Default upper bounds of histogram buckets"""
+
+DEFAULT_TIMER_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0,
+                         300.0, 600.0, 1800.0, 3600.0, 7200.0, 14400.0)
+"""Default upper bounds, in seconds, of timer buckets"""
+
+DEFAULT_PROMETHEUS_NAMESPACE = 'opera_pge'
+"""Prefix applied to the names of metrics exported for Prometheus"""
+
+TIMER_NAME_SUFFIX = 'seconds'
+"""Metrics recorded by name with this suffix are treated as timings"""
+
+_INVALID_PROMETHEUS_CHARACTERS = re.compile(r'[^a-zA-Z0-9_:]')
+
+
+class Counter:
+    """A monotonically increasing count, such as a number of files processed."""
+
+    kind = 'counter'
+    """Kind of the metric, as recorded by the exporters"""
+
+    def __init__(self, name, description=''):
+        """
+        Creates a new Counter, starting from zero.
+
+        Parameters
+        ----------
+        name : str
+            Name of the counter within its registry.
+        description : str, optional
+            Human-readable description of what is counted.
+
+        """
+        self.name = name
+        self.description = description
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """Increments the counter by the provided (non-negative) amount."""
+        if amount < 0:
+            raise ValueError(f'Counter {self.name} can not be decremented')
+
+        with self._lock:
+            self.value += amount
+
+    def asdict(self):
+        """Returns the state of the counter in its dictionary representation."""
+        return {'value': self.value}
+
+
+class Gauge:
+    """A value which may go up or down, such as a peak memory usage."""
+
+    kind = 'gauge'
+    """Kind of the metric, as recorded by the exporters"""
+
+    def __init__(self, name, description=''):
+        """
+        Creates a new Gauge, with an initial value of zero.
+
+        Parameters
+        ----------
+        name : str
+            Name of the gauge within its registry.
+        description : str, optional
+            Human-readable description of the measured value.
+
+        """
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def set(self, value):
+        """Sets the value of the gauge."""
+        self.value = value
+
+    def asdict(self):
+        """Returns the state of the gauge in its dictionary representation."""
+        return {'value': self.value}
+
+
+class Histogram:
+    """A distribution of observed values, counted into buckets."""
+
+    kind = 'histogram'
+    """Kind of the metric, as recorded by the exporters"""
+
+    def __init__(self, name, description='', buckets=DEFAULT_HISTOGRAM_BUCKETS):
+        """
+        Creates a new Histogram, with no observations.
+
+        Parameters
+        ----------
+        name : str
+            Name of the histogram within its registry.
+        description : str, optional
+            Human-readable description of the observed values.
+        buckets : iterable of float, optional
+            Upper bounds of the buckets observations are counted into. An
+            infinite bucket is always added past the last bound. Defaults to
+            DEFAULT_HISTOGRAM_BUCKETS.
+
+        """
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Records an observed value."""
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def cumulative_bucket_counts(self):
+        """
+        Returns a list of (upper bound, count of observations less than or equal
+        to the upper bound) pairs, ending with the infinite bucket.
+        """
+        cumulative_counts = []
+        total = 0
+
+        for upper_bound, bucket_count in zip(self.buckets + (math.inf,), self.bucket_counts):
+            total += bucket_count
+            cumulative_counts.append((upper_bound, total))
+
+        return cumulative_counts
+
+    def asdict(self):
+        """Returns the state of the histogram in its dictionary representation."""
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'buckets': OrderedDict((_format_bound(upper_bound), count)
+                                   for upper_bound, count in self.cumulative_bucket_counts())
+        }
+
+
+class Timer(Histogram):
+    """A histogram of durations, in seconds."""
+
+    kind = 'timer'
+    """Kind of the metric, as recorded by the exporters"""
+
+    def __init__(self, name, description='', buckets=DEFAULT_TIMER_BUCKETS):
+        """
+        Creates a new Timer, with no observations.
+
+        Parameters
+        ----------
+        name : str
+            Name of the timer within its registry.
+        description : str, optional
+            Human-readable description of what is timed.
+        buckets : iterable of float, optional
+            Upper bounds, in seconds, of the buckets durations are counted
+            into. Defaults to DEFAULT_TIMER_BUCKETS.
+
+        """
+        super().__init__(name, description, buckets)
+
+    @contextmanager
+    def time(self):
+        """Context manager which observes the time taken to run its body."""
+        start_time = time.monotonic()
+
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start_time)
+
+
+def _format_bound(upper_bound):
+    """Formats a bucket upper bound as used by Prometheus ("+Inf" for the last bucket)."""
+    return '+Inf' if math.isinf(upper_bound) else repr(float(upper_bound))
+
+
+class MetricsRegistry:
+    """
+    Thread-safe collection of named metrics.
+
+    Metrics are created on first access by name, via counter(), gauge(),
+    histogram() or timer(), with the same metric returned on each subsequent
+    access.
+
+    """
+
+    def __init__(self):
+        """Creates a new, empty MetricsRegistry."""
+        self._metrics = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Returns the number of metrics in the registry."""
+        return len(self._metrics)
+
+    def __iter__(self):
+        """Iterates over a snapshot of the metrics, in the order they were created."""
+        with self._lock:
+            return iter(list(self._metrics.values()))
+
+    def __contains__(self, name):
+        """Returns True if the registry holds a metric with the provided name."""
+        return name in self._metrics
+
+    def get(self, name):
+        """Returns the metric with the provided name, or None if there is no such metric."""
+        return self._metrics.get(name)
+
+    def _get_or_create(self, metric_class, name, **kwargs):
+        """Returns the named metric, creating it as an instance of metric_class if there is no such metric."""
+        metric = self._metrics.get(name)
+
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+
+                if metric is None:
+                    metric = self._metrics[name] = metric_class(name, **kwargs)
+
+        if type(metric) is not metric_class:  # pylint: disable=unidiomatic-typecheck
+            raise ValueError(f'Metric {name} is already registered as a {metric.kind}, '
+                             f'not a {metric_class.kind}')
+
+        return metric
+
+    def counter(self, name, description=''):
+        """Returns the Counter with the provided name, creating it if necessary."""
+        return self._get_or_create(Counter, name, description=description)
+
+    def gauge(self, name, description=''):
+        """Returns the Gauge with the provided name, creating it if necessary."""
+        return self._get_or_create(Gauge, name, description=description)
+
+    def histogram(self, name, description='', buckets=DEFAULT_HISTOGRAM_BUCKETS):
+        """Returns the Histogram with the provided name, creating it if necessary."""
+        return self._get_or_create(Histogram, name, description=description, buckets=buckets)
+
+    def timer(self, name, description='', buckets=DEFAULT_TIMER_BUCKETS):
+        """Returns the Timer with the provided name, creating it if necessary."""
+        return self._get_or_create(Timer, name, description=description, buckets=buckets)
+
+    def record(self, name, value):
+        """
+        Records a free-form metric value, such as one logged by
+        PgeLogger.log_one_metric().
+
+        Numeric values of metrics named with the TIMER_NAME_SUFFIX are observed
+        by a timer, while any other numeric values are set on a gauge. Values
+        which are not numeric (or are not finite) are not recorded.
+
+        Parameters
+        ----------
+        name : str
+            Name of the metric.
+        value : object
+            Value of the metric.
+
+        """
+        if isinstance(value, bool):
+            value = int(value)
+
+        if not isinstance(value, (int, float)) or not math.isfinite(value):
+            return
+
+        existing_metric = self._metrics.get(name)
+
+        if isinstance(existing_metric, Histogram):
+            existing_metric.observe(value)
+        elif isinstance(existing_metric, Counter):
+            existing_metric.inc(max(value - existing_metric.value, 0))
+        elif existing_metric is None and name.endswith(TIMER_NAME_SUFFIX):
+            self.timer(name).observe(value)
+        else:
+            self.gauge(name).set(value)
+
+    def asdict(self):
+        """Returns the registered metrics in their dictionary representation, grouped by kind."""
+        metrics_dict = OrderedDict((f'{metric_class.kind}s', OrderedDict())
+                                   for metric_class in (Counter, Gauge, Histogram, Timer))
+
+        for metric in self:
+            metrics_dict[f'{metric.kind}s'][metric.name] = metric.asdict()
+
+        return metrics_dict
+
+
+def _write_atomic(filename, contents):
+    """Writes a file via a temporary file and rename, so readers never see a partial file."""
+    temp_fd, temp_filename = tempfile.mkstemp(prefix=f'.{os.path.basename(filename)}.',
+                                              dir=dirname(filename) or os.curdir)
+
+    try:
+        with open(temp_fd, 'w', encoding='utf-8') as outfile:
+            outfile.write(contents)
+
+        os.chmod(temp_filename, 0o644)
+        os.replace(temp_filename, filename)
+    except BaseException:
+        os.unlink(temp_filename)
+        raise
+
+
+def write_metrics_json(filename, registries, labels=None):
+    """
+    Exports one or more metrics registries as a JSON document.
+
+    Parameters
+    ----------
+    filename : str
+        Path to write the JSON document to.
+    registries : dict
+        Mapping of a scope name (such as "pge" or "qa") to the MetricsRegistry
+        holding the metrics for that scope.
+    labels : dict, optional
+        Labels describing the job the metrics belong to.
+
+    """
+    document = OrderedDict([
+        ('labels', labels or {}),
+        ('scopes', OrderedDict((scope, registry.asdict()) for scope, registry in registries.items()))
+    ])
+
+    _write_atomic(filename, json.dumps(document, indent=2) + '\n')
+
+
+def prometheus_metric_name(name, namespace=DEFAULT_PROMETHEUS_NAMESPACE):
+    """Returns the provided metric name converted to a valid Prometheus metric name."""
+    return _INVALID_PROMETHEUS_CHARACTERS.sub('_', f'{namespace}_{name}' if namespace else name)
+
+
+def _format_labels(labels):
+    """Formats a Prometheus label set, escaping label values as required."""
+    if not labels:
+        return ''
+
+    formatted_labels = ','.join(
+        f'{_INVALID_PROMETHEUS_CHARACTERS.sub("_", key)}="'
+        + str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') + '"'
+        for key, value in labels.items()
+    )
+
+    return '{' + formatted_labels + '}'
+
+
+def _format_value(value):
+    """Formats a sample value as expected by Prometheus."""
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def write_metrics_prometheus(filename, registries, labels=None, namespace=DEFAULT_PROMETHEUS_NAMESPACE,
+                             scope_label='scope'):
+    """
+    Exports one or more metrics registries in the Prometheus text exposition
+    format, for collection by the node exporter's textfile collector. The file
+    should use the ".prom" extension, and is written atomically, as required
+    by the collector.
+
+    Timers are exported as Prometheus histograms.
+
+    Parameters
+    ----------
+    filename : str
+        Path to write the metrics to.
+    registries : dict
+        Mapping of a scope name (such as "pge" or "qa") to the MetricsRegistry
+        holding the metrics for that scope. The scope is exported as a label.
+    labels : dict, optional
+        Labels describing the job the metrics belong to, applied to each
+        exported sample.
+    namespace : str, optional
+        Prefix applied to each metric name. Defaults to DEFAULT_PROMETHEUS_NAMESPACE.
+    scope_label : str, optional
+        Name of the label identifying the scope of each sample.
+
+    Raises
+    ------
+    ValueError
+        If metrics of the same name have conflicting kinds across registries.
+
+    """
+    # Samples of each metric must be grouped together, under a single type
+    families = OrderedDict()
+
+    for scope, registry in registries.items():
+        for metric in registry:
+            metric_name = prometheus_metric_name(metric.name, namespace)
+            metric_type = 'histogram' if isinstance(metric, Histogram) else metric.kind
+
+            family = families.setdefault(metric_name, {'type': metric_type,
+                                                       'description': metric.description,
+                                                       'samples': []})
+
+            if family['type'] != metric_type:
+                raise ValueError(f'Metric {metric_name} is exported as both a {family["type"]} '
+                                 f'and a {metric_type}')
+
+            sample_labels = OrderedDict(labels or {})
+            sample_labels[scope_label] = scope
+
+            if isinstance(metric, Histogram):
+                for upper_bound, count in metric.cumulative_bucket_counts():
+                    bucket_labels = OrderedDict(sample_labels)
+                    bucket_labels['le'] = _format_bound(upper_bound)
+                    family['samples'].append(f'{metric_name}_bucket{_format_labels(bucket_labels)} {count}')
+
+                family['samples'].append(f'{metric_name}_sum{_format_labels(sample_labels)} '
+                                         f'{_format_value(float(metric.sum))}')
+                family['samples'].append(f'{metric_name}_count{_format_labels(sample_labels)} {metric.count}')
+            else:
+                family['samples'].append(f'{metric_name}{_format_labels(sample_labels)} '
+                                         f'{_format_value(metric.value)}')
+
+    lines = []
+
+    for metric_name, family in families.items():
+        if family['description']:
+            description = family['description'].replace('\\', '\\\\').replace('\n', '\\n')
+            lines.append(f'# HELP {metric_name} {description}')
+
+        lines.append(f'# TYPE {metric_name} {family["type"]}')
+        lines.extend(family['samples'])
+
+    _write_atomic(filename, '\n'.join(lines) + '\n')
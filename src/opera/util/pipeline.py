@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+"""
+===========
+pipeline.py
+===========
+
+Minimal dependency-aware pipeline for running independent steps of a PGE
+concurrently within a pool of threads.
+
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class PipelineStep:
+    """
+    A single named step of a pipeline, which may depend on the completion
+    of other steps.
+    """
+
+    def __init__(self, name, function, depends_on=()):
+        """
+        Creates a new PipelineStep.
+
+        Parameters
+        ----------
+        name : str
+            Name of the step, unique within its pipeline.
+        function : callable
+            Function to invoke (with no arguments) to perform the step.
+        depends_on : Iterable[str], optional
+            Names of the steps which must complete successfully before this
+            step may start.
+
+        """
+        self.name = name
+        self.function = function
+        self.depends_on = tuple(depends_on)
+
+
+def run_pipeline(steps, max_workers=None):
+    """
+    Runs the provided pipeline steps, starting each step as soon as all of the
+    steps it depends on have completed, with independent steps running
+    concurrently.
+
+    If any step raises an exception, no further steps are started, and once
+    any steps already running have finished, the first exception raised is
+    re-raised to the caller.
+
+    Parameters
+    ----------
+    steps : Iterable[PipelineStep]
+        The steps of the pipeline.
+    max_workers : int, optional
+        Maximum number of steps to run concurrently. Defaults to the number of
+        steps.
+
+    Returns
+    -------
+    timings : collections.OrderedDict
+        Mapping of step name to the number of seconds the step took to run,
+        in the order the steps were provided.
+
+    Raises
+    ------
+    ValueError
+        If the steps contain duplicate names, reference an unknown
+        dependency, or contain a dependency cycle.
+
+    """
+    steps = list(steps)
+    step_names = [step.name for step in steps]
+
+    if len(set(step_names)) != len(step_names):
+        raise ValueError(f'Pipeline contains duplicate step names: {step_names}')
+
+    for step in steps:
+        unknown_dependencies = set(step.depends_on) - set(step_names)
+
+        if unknown_dependencies:
+            raise ValueError(f'Pipeline step {step.name} depends on unknown step(s): '
+                             f'{sorted(unknown_dependencies)}')
+
+    pending = OrderedDict((step.name, step) for step in steps)
+    completed = set()
+    timings = {}
+    errors = []
+    errors_lock = threading.Lock()
+
+    def _run_step(step):
+        start_time = time.monotonic()
+
+        try:
+            step.function()
+        except BaseException as err:
+            # Record errors in the order they are raised, rather than the
+            # order their steps are collected in
+            with errors_lock:
+                errors.append(err)
+            raise
+        finally:
+            timings[step.name] = time.monotonic() - start_time
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(steps), 1)) as executor:
+        running = {}
+
+        while pending or running:
+            if not errors:
+                ready_steps = [step for step in pending.values()
+                               if all(dependency in completed for dependency in step.depends_on)]
+
+                for step in ready_steps:
+                    del pending[step.name]
+                    running[executor.submit(_run_step, step)] = step
+
+            if not running:
+                if errors:
+                    break
+
+                raise ValueError(f'Pipeline contains a dependency cycle between steps: {list(pending)}')
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                step = running.pop(future)
+
+                if future.exception() is None:
+                    completed.add(step.name)
+
+    if errors:
+        raise errors[0]
+
+    return OrderedDict((name, timings[name]) for name in step_names if name in timings)
@@ -10,17 +10,186 @@ subsystem.
 
 """
 
+import errno
 import hashlib
 import os
 import shutil
+import signal
 import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from os.path import abspath
 
 from .error_codes import ErrorCode
 
+# xxhash is an optional dependency, when it is not installed the xxh*
+# checksum algorithms are simply unavailable
+try:
+    import xxhash
+except (ImportError, ModuleNotFoundError):  # pragma: no cover
+    xxhash = None                           # pragma: no cover
 
-def get_checksum(file_name):
+MAX_STREAMED_LINE_LENGTH = 2 ** 20
+"""Maximum number of bytes read for a single line of streamed program output"""
+
+DEFAULT_KILL_GRACE_PERIOD = 10.0
+"""Default number of seconds to wait after SIGTERM before a timed-out program is sent SIGKILL"""
+
+WATCHDOG_POLL_INTERVAL = 1.0
+"""Maximum number of seconds between checks of the watchdog limits of a running program"""
+
+DEFAULT_CHECKSUM_CHUNK_SIZE = 2 ** 20
+"""Default number of bytes read from a file per update of a checksum digest"""
+
+DEFAULT_CHECKSUM_ALGORITHM = 'md5'
+"""Checksum algorithm used when no specific set of algorithms is requested"""
+
+CHECKSUM_ALGORITHMS = {
+    'md5': hashlib.md5,
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+    'sha512': hashlib.sha512,
+    'blake2b': hashlib.blake2b,
+    'blake2b-128': partial(hashlib.blake2b, digest_size=16),
+    'blake2b-64': partial(hashlib.blake2b, digest_size=8),
+}
+"""Mapping of supported checksum algorithm names to their hasher constructors"""
+
+if xxhash is not None:
+    CHECKSUM_ALGORITHMS.update({
+        'xxh64': xxhash.xxh64,
+        'xxh3-64': xxhash.xxh3_64,
+        'xxh3-128': xxhash.xxh3_128,
+    })
+
+
+def validate_checksum_algorithms(algorithms):
+    """
+    Ensures each of the provided checksum algorithms is supported.
+
+    Parameters
+    ----------
+    algorithms : Iterable[str]
+        Names of the checksum algorithms to validate.
+
+    Raises
+    ------
+    ValueError
+        If any algorithm is not supported, or depends on a library which is
+        not installed.
+
+    """
+    for algorithm in algorithms:
+        if algorithm not in CHECKSUM_ALGORITHMS:
+            raise ValueError(
+                f"Unsupported checksum algorithm '{algorithm}', available algorithms "
+                f"are: {', '.join(CHECKSUM_ALGORITHMS.keys())}"
+            )
+
+
+def create_hasher(algorithm):
+    """
+    Creates a new hasher object for the provided checksum algorithm.
+
+    Parameters
+    ----------
+    algorithm : str
+        Name of the checksum algorithm, must be one of the keys of
+        CHECKSUM_ALGORITHMS.
+
+    Returns
+    -------
+    hasher : object
+        New hasher instance, supporting the update() and hexdigest() methods
+        of the hashlib interface.
+
+    Raises
+    ------
+    ValueError
+        If the algorithm is not supported.
+
+    """
+    validate_checksum_algorithms((algorithm,))
+
+    return CHECKSUM_ALGORITHMS[algorithm]()
+
+
+def get_digests(file_name, algorithms, chunk_size=DEFAULT_CHECKSUM_CHUNK_SIZE, cache=None):
+    """
+    Generate checksums of the provided file for each of the provided
+    algorithms, in a single pass over the file's contents.
+
+    The file is read into a single reusable buffer, rather than allocating a
+    new bytes object per chunk. Since hashlib releases the GIL while digesting
+    large buffers, this function may be run concurrently from multiple
+    threads (see get_checksums()).
+
+    Parameters
+    ----------
+    file_name : str
+        Path the file on disk to generate the checksums for.
+    algorithms : Iterable[str]
+        Names of the checksum algorithms to compute. See CHECKSUM_ALGORITHMS
+        for the supported algorithms.
+    chunk_size : int, optional
+        Number of bytes to read from the file per digest update.
+    cache : opera.util.checksum_cache.ChecksumCache, optional
+        Checksum cache to consult before reading the file. Only the checksums
+        missing from the cache are computed, and are then added to the cache.
+
+    Returns
+    -------
+    digests : dict
+        Mapping of each algorithm name to the corresponding checksum of the
+        provided file.
+
+    Raises
+    ------
+    ValueError
+        If any of the requested algorithms are not supported.
+
+    """
+    digests = dict.fromkeys(algorithms)
+
+    with open(file_name, "rb", buffering=0) as infile:
+        file_stat = os.fstat(infile.fileno())
+
+        if cache is not None:
+            for algorithm in digests:
+                digests[algorithm] = cache.get(file_stat, algorithm)
+
+        hashers = {algorithm: create_hasher(algorithm)
+                   for algorithm, digest in digests.items() if digest is None}
+
+        if not hashers:
+            return digests
+
+        buffer = bytearray(chunk_size)
+        buffer_view = memoryview(buffer)
+
+        for num_bytes in iter(lambda: infile.readinto(buffer), 0):
+            chunk = buffer_view[:num_bytes]
+
+            for hasher in hashers.values():
+                hasher.update(chunk)
+
+        final_stat = os.fstat(infile.fileno())
+
+    computed_digests = {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
+
+    digests.update(computed_digests)
+
+    # Only cache the results if the file was not modified while it was read
+    if (cache is not None
+            and (final_stat.st_size, final_stat.st_mtime_ns) == (file_stat.st_size, file_stat.st_mtime_ns)):
+        cache.put(file_stat, computed_digests)
+
+    return digests
+
+
+def get_checksum(file_name, chunk_size=DEFAULT_CHECKSUM_CHUNK_SIZE, cache=None):
     """
     Generate the MD5 checksum of the provided file.
 
@@ -30,6 +199,10 @@ def get_checksum(file_name):
     ----------
     file_name : str
         Path the file on disk to generate the checksum for.
+    chunk_size : int, optional
+        Number of bytes to read from the file per digest update.
+    cache : opera.util.checksum_cache.ChecksumCache, optional
+        Checksum cache to consult before reading the file.
 
     Returns
     -------
@@ -37,14 +210,149 @@ def get_checksum(file_name):
         MD5 checksum of the provided file.
 
     """
-    hash_md5 = hashlib.md5()
+    return get_digests(
+        file_name, (DEFAULT_CHECKSUM_ALGORITHM,), chunk_size, cache
+    )[DEFAULT_CHECKSUM_ALGORITHM]
 
-    with open(file_name, "rb") as infile:
-        # chunk size is set to 1048576
-        for chunk in iter(lambda: infile.read(2 ** 20), b""):
-            hash_md5.update(chunk)
 
-    return hash_md5.hexdigest()
+def get_checksums(file_names, num_workers=None, chunk_size=DEFAULT_CHECKSUM_CHUNK_SIZE,
+                  algorithms=None, cache=None):
+    """
+    Generate checksums of the provided files, hashing multiple files
+    concurrently within a pool of threads.
+
+    Parameters
+    ----------
+    file_names : Iterable[str]
+        Paths to the files on disk to generate checksums for.
+    num_workers : int, optional
+        Maximum number of files to hash concurrently. Defaults to the default
+        thread count of concurrent.futures.ThreadPoolExecutor. A value of 1
+        hashes each file sequentially within the calling thread.
+    chunk_size : int, optional
+        Number of bytes to read from each file per digest update.
+    algorithms : Iterable[str], optional
+        Names of the checksum algorithms to compute for each file. If not
+        provided, only the MD5 checksum is computed.
+    cache : opera.util.checksum_cache.ChecksumCache, optional
+        Checksum cache to consult before reading each file. Files which are
+        unchanged since their checksums were cached are not read.
+
+    Returns
+    -------
+    checksums : dict
+        Mapping of each provided file name, in the order the file names were
+        provided, to its MD5 checksum if no algorithms were requested,
+        otherwise to a mapping of algorithm name to checksum (see get_digests()).
+
+    Raises
+    ------
+    ValueError
+        If any of the requested algorithms are not supported.
+
+    """
+    file_names = list(file_names)
+
+    if algorithms is None:
+        checksum_func = partial(get_checksum, chunk_size=chunk_size, cache=cache)
+    else:
+        algorithms = list(algorithms)
+
+        # Fail fast on any unsupported algorithms before touching any files
+        validate_checksum_algorithms(algorithms)
+
+        checksum_func = partial(get_digests, algorithms=algorithms, chunk_size=chunk_size, cache=cache)
+
+    if num_workers == 1 or len(file_names) <= 1:
+        checksums = [checksum_func(file_name) for file_name in file_names]
+    else:
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            checksums = list(executor.map(checksum_func, file_names))
+
+    return dict(zip(file_names, checksums))
+
+
+def move_file(source, destination, algorithms=None, chunk_size=DEFAULT_CHECKSUM_CHUNK_SIZE):
+    """
+    Moves a file to a new location, computing its checksums along the way if
+    the move requires the file's contents to be copied.
+
+    When the source and destination are on the same file system, the file is
+    simply renamed, with no data read or written. When they are on different
+    file systems, the file is copied through a single reusable buffer which
+    also feeds each of the requested hashers, so the contents are only read
+    once for both the copy and the checksums. The copy is written to a
+    temporary file alongside the destination and renamed into place once
+    complete (hidden, so it is never mistaken for a finished product), after
+    which the source is removed.
+
+    Parameters
+    ----------
+    source : str
+        Path to the file to move.
+    destination : str
+        Path to move the file to.
+    algorithms : Iterable[str], optional
+        Names of the checksum algorithms to compute when the file must be
+        copied. Defaults to MD5 only.
+    chunk_size : int, optional
+        Number of bytes to copy per read/write.
+
+    Returns
+    -------
+    digests : dict or None
+        Mapping of algorithm name to checksum of the moved file if its
+        contents were copied, or None if the file was renamed in place.
+
+    Raises
+    ------
+    OSError
+        If the file could not be moved.
+    ValueError
+        If any of the requested algorithms are not supported.
+
+    """
+    algorithms = list(algorithms or (DEFAULT_CHECKSUM_ALGORITHM,))
+    validate_checksum_algorithms(algorithms)
+
+    try:
+        os.rename(source, destination)
+        return None
+    except OSError as err:
+        if err.errno != errno.EXDEV:
+            raise
+
+    hashers = {algorithm: create_hasher(algorithm) for algorithm in algorithms}
+
+    buffer = bytearray(chunk_size)
+    buffer_view = memoryview(buffer)
+
+    partial_destination = os.path.join(os.path.dirname(destination),
+                                       f'.{os.path.basename(destination)}.partial')
+
+    try:
+        with open(source, 'rb', buffering=0) as infile, \
+                open(partial_destination, 'wb', buffering=0) as outfile:
+            for num_bytes in iter(lambda: infile.readinto(buffer), 0):
+                chunk = buffer_view[:num_bytes]
+
+                for hasher in hashers.values():
+                    hasher.update(chunk)
+
+                # Unbuffered writes may be partial
+                while chunk:
+                    chunk = chunk[outfile.write(chunk):]
+
+        shutil.copystat(source, partial_destination)
+        os.replace(partial_destination, destination)
+    except BaseException:
+        if os.path.exists(partial_destination):
+            os.unlink(partial_destination)
+        raise
+
+    os.unlink(source)
+
+    return {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
 
 
 def get_extension(file_name):
@@ -167,7 +475,77 @@ def create_qa_command_line(qa_program_path, qa_program_options=None):
     return command_line
 
 
-def time_and_execute(command_line, logger, execute_via_shell=False):
+class _OutputReader(threading.Thread):
+    """
+    Reader thread which drains the combined stdout/stderr pipe of a child
+    process line by line, handing each decoded line off to a callback as it
+    becomes available.
+
+    Lines longer than MAX_STREAMED_LINE_LENGTH are split into multiple lines,
+    so the amount of memory held at any point remains bounded. The time of the
+    most recently read output is tracked for use with inactivity timeouts.
+
+    """
+
+    def __init__(self, stream, line_handler):
+        """
+        Creates a new (unstarted) reader thread.
+
+        Parameters
+        ----------
+        stream : io.BufferedReader
+            The byte stream (typically the stdout pipe of a child process) to
+            read from. Reading continues until EOF is reached.
+        line_handler : callable
+            Callable invoked with each line read from the stream, decoded
+            and stripped of its trailing newline.
+
+        """
+        super().__init__(name='time_and_execute_reader', daemon=True)
+
+        self.stream = stream
+        self.line_handler = line_handler
+        self.last_output_time = time.monotonic()
+
+    def run(self):
+        """Reads the stream until EOF, passing each line to the line handler."""
+        for raw_line in iter(lambda: self.stream.readline(MAX_STREAMED_LINE_LENGTH), b''):
+            self.last_output_time = time.monotonic()
+            self.line_handler(raw_line.decode(errors='replace').rstrip('\r\n'))
+
+        self.stream.close()
+
+
+def _terminate_process_group(process, kill_grace_period):
+    """
+    Gracefully terminates the process group led by the provided process.
+    SIGTERM is sent first, and if the process has not exited within the
+    grace period, the group is sent SIGKILL.
+
+    Parameters
+    ----------
+    process : subprocess.Popen
+        The process to terminate. The process is expected to have been started
+        in its own session, so that its process group contains only the program
+        and any descendants it has spawned.
+    kill_grace_period : float
+        Number of seconds to wait for the process to exit after SIGTERM.
+
+    """
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=kill_grace_period)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        # Process group has already exited
+        process.wait()
+
+
+def time_and_execute(command_line, logger, execute_via_shell=False, stream_output=False,
+                     timeout=None, inactivity_timeout=None, kill_grace_period=None,
+                     resource_sampler=None):
     """
     Executes the provided command line via subprocess while collecting the
     runtime of the execution.
@@ -183,6 +561,24 @@ def time_and_execute(command_line, logger, execute_via_shell=False):
         If true, instruct subprocess.run to execute the command-line via system
         shell. Useful for running test commands but should generally not be used
         for production.
+    stream_output : bool, optional
+        If true, the stdout/stderr of the executed program is read line by line
+        on a separate reader thread, and each line is fed to the logger as it
+        arrives. Otherwise, all output is captured in memory and appended to
+        the logger once the program exits.
+    timeout : float, optional
+        Wall-clock limit, in seconds, for the executed program. If exceeded,
+        the program is terminated and a critical error is logged.
+    inactivity_timeout : float, optional
+        Maximum number of seconds the executed program may go without writing
+        any output. If exceeded, the program is terminated and a critical error
+        is logged.
+    kill_grace_period : float, optional
+        Number of seconds a timed-out program is given to exit after SIGTERM
+        before it is sent SIGKILL. Defaults to DEFAULT_KILL_GRACE_PERIOD.
+    resource_sampler : ProcessTreeSampler, optional
+        If provided, the sampler is started on the executed program as soon as
+        it is launched, and stopped once it exits.
 
     Returns
     -------
@@ -199,17 +595,88 @@ def time_and_execute(command_line, logger, execute_via_shell=False):
     if execute_via_shell:
         command_line = " ".join(command_line)
 
-    # TODO: support for timeout argument?
-    run_result = subprocess.run(command_line, env=os.environ.copy(), check=False,
-                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                                shell=execute_via_shell)
+    watchdog_enabled = bool(timeout or inactivity_timeout)
+    watchdog_reason = None
+
+    if stream_output or watchdog_enabled or resource_sampler:
+        captured_lines = []
+        line_handler = logger.append_line if stream_output else captured_lines.append
+
+        # When the watchdog is enabled, the program is started within its own
+        # session, so that it and any children it spawns can be signalled as
+        # a single process group
+        process = subprocess.Popen(command_line, env=os.environ.copy(),  # pylint: disable=consider-using-with
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   shell=execute_via_shell,
+                                   start_new_session=watchdog_enabled)
+
+        reader_thread = _OutputReader(process.stdout, line_handler)
+        reader_thread.start()
+
+        if resource_sampler:
+            resource_sampler.start(process.pid)
+
+        poll_interval = min(
+            [WATCHDOG_POLL_INTERVAL] + [limit / 4 for limit in (timeout, inactivity_timeout) if limit]
+        )
+
+        while True:
+            try:
+                returncode = process.wait(timeout=poll_interval if watchdog_enabled else None)
+                break
+            except subprocess.TimeoutExpired:
+                current_time = time.monotonic()
+
+                if timeout and current_time - start_time > timeout:
+                    watchdog_reason = f'exceeded the wall-clock limit of {timeout} second(s)'
+                elif inactivity_timeout and current_time - reader_thread.last_output_time > inactivity_timeout:
+                    watchdog_reason = f'produced no output for {inactivity_timeout} second(s)'
+
+                if watchdog_reason:
+                    _terminate_process_group(
+                        process, kill_grace_period
+                        if kill_grace_period is not None else DEFAULT_KILL_GRACE_PERIOD
+                    )
+                    returncode = process.returncode
+                    break
+
+        if resource_sampler:
+            resource_sampler.stop()
+
+        # Make sure all output has been logged before continuing. A descendant
+        # of a terminated program could still be holding the pipe open, so
+        # only wait so long in that case (the reader closes the pipe on EOF).
+        reader_thread.join(timeout=WATCHDOG_POLL_INTERVAL if watchdog_reason else None)
+
+        if not stream_output:
+            # Append the stdout/stderr captured by the subprocess to our log
+            logger.append("\n".join(captured_lines))
+    else:
+        run_result = subprocess.run(command_line, env=os.environ.copy(), check=False,
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    shell=execute_via_shell)
+
+        # Append the stdout/stderr captured by the subprocess to our log
+        logger.append(run_result.stdout.decode())
+
+        returncode = run_result.returncode
+
+    if watchdog_reason:
+        # Record what we know about the terminated run before the log is finalized
+        logger.log_one_metric(module_name, 'watchdog.elapsed_seconds',
+                              time.monotonic() - start_time)
+        logger.log_one_metric(module_name, 'watchdog.seconds_since_last_output',
+                              time.monotonic() - reader_thread.last_output_time)
+        logger.log_one_metric(module_name, 'watchdog.exit_code', returncode)
+
+        error_msg = (f'Command "{" ".join(command_line)}" {watchdog_reason}, '
+                     f'and was terminated')
 
-    # Append the stdout/stderr captured by the subprocess to our log
-    logger.append(run_result.stdout.decode())
+        logger.critical(module_name, ErrorCode.SAS_PROGRAM_TIMED_OUT, error_msg)
 
-    if run_result.returncode:
+    if returncode:
         error_msg = (f'Command "{" ".join(command_line)}" failed with exit '
-                     f'code {run_result.returncode}')
+                     f'code {returncode}')
 
         logger.critical(module_name, ErrorCode.SAS_PROGRAM_FAILED, error_msg)
 
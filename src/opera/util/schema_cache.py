@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+"""
+===============
+schema_cache.py
+===============
+
+Caching of compiled Yamale schemas.
+
+Compiling a Yamale schema parses the schema file and constructs a validator
+for every node within it, which is repeated for every RunConfig validated.
+Compiled schemas are cached here for the life of the process, keyed by the
+path and a hash of the contents of the schema file, so a modified schema is
+always recompiled. Compiled schemas may also be pickled to a cache directory,
+so that they are compiled once per node rather than once per process. On-disk
+entries are additionally keyed by the installed Yamale version.
+
+"""
+
+import copy
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from os.path import abspath, join
+
+import yamale
+
+SCHEMA_CACHE_DIR_ENV = 'OPERA_SCHEMA_CACHE_DIR'
+"""Environment variable naming the directory to cache compiled schemas in, if not provided explicitly"""
+
+_SCHEMA_CACHE = {}
+"""In-process cache of compiled schemas, keyed by absolute path and content hash"""
+
+_SCHEMA_CACHE_LOCK = threading.Lock()
+
+
+def get_schema_cache_key(schema_content):
+    """
+    Returns the key to cache a schema compiled from the provided content under.
+
+    Parameters
+    ----------
+    schema_content : bytes
+        Contents of the schema file.
+
+    Returns
+    -------
+    cache_key : str
+        Hex digest of the schema contents and the installed Yamale version.
+
+    """
+    digest = hashlib.sha256(schema_content)
+    digest.update(f'\0yamale-{yamale.__version__}'.encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def _load_pickled_schema(pickle_filename):
+    """Returns the compiled schema pickled to the provided file, or None if it cannot be loaded"""
+    try:
+        with open(pickle_filename, 'rb') as infile:
+            return pickle.load(infile)
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        # Corrupt, or written by an incompatible version of a library, so
+        # fall back to recompiling the schema (which replaces the entry)
+        return None
+
+
+def _write_pickled_schema(pickle_filename, schema):
+    """
+    Pickles a compiled schema to the provided file, via a temporary file
+    which is renamed into place, so concurrent readers never see a partially
+    written entry. Failures are ignored, as the cache is only an optimization.
+    """
+    cache_dir = os.path.dirname(pickle_filename)
+    temp_filename = None
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+
+        with tempfile.NamedTemporaryFile('wb', dir=cache_dir, prefix='.schema_', delete=False) as outfile:
+            temp_filename = outfile.name
+            pickle.dump(schema, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(temp_filename, pickle_filename)
+    except (OSError, pickle.PicklingError):
+        # Don't leave partial entries behind in the (possibly shared) cache directory
+        if temp_filename is not None:
+            try:
+                os.unlink(temp_filename)
+            except OSError:
+                pass
+
+
+def get_schema(schema_file, cache_dir=None):
+    """
+    Returns the compiled Yamale schema for the provided schema file, compiling
+    it only if a schema with the same path and contents is not already cached.
+
+    The returned schema is shared with other callers, and must not be
+    modified. Use link_schema_includes() to add includes to a schema.
+
+    Parameters
+    ----------
+    schema_file : str
+        Path to the Yamale schema file.
+    cache_dir : str, optional
+        Directory to cache compiled schemas to on disk. Defaults to the
+        directory named by the OPERA_SCHEMA_CACHE_DIR environment variable.
+        If neither is set, schemas are only cached in-process.
+
+    Returns
+    -------
+    schema : yamale.schema.Schema
+        The compiled schema.
+
+    """
+    with open(schema_file, 'rb') as infile:
+        schema_content = infile.read()
+
+    cache_key = get_schema_cache_key(schema_content)
+    process_key = (abspath(schema_file), cache_key)
+
+    with _SCHEMA_CACHE_LOCK:
+        schema = _SCHEMA_CACHE.get(process_key)
+
+    if schema is not None:
+        return schema
+
+    cache_dir = cache_dir or os.environ.get(SCHEMA_CACHE_DIR_ENV)
+    pickle_filename = None
+
+    if cache_dir:
+        # The schema name (its path) is embedded in the compiled schema, so
+        # is included within the on-disk key as well
+        path_key = hashlib.sha256(abspath(schema_file).encode('utf-8')).hexdigest()[:16]
+        pickle_filename = join(cache_dir, f'{path_key}-{cache_key}.pickle')
+        schema = _load_pickled_schema(pickle_filename)
+
+    if schema is None:
+        schema = yamale.make_schema(schema_file)
+
+        if pickle_filename:
+            _write_pickled_schema(pickle_filename, schema)
+
+    with _SCHEMA_CACHE_LOCK:
+        return _SCHEMA_CACHE.setdefault(process_key, schema)
+
+
+def clear_schema_cache():
+    """Removes all compiled schemas from the in-process cache"""
+    with _SCHEMA_CACHE_LOCK:
+        _SCHEMA_CACHE.clear()
+
+
+def link_schema_includes(schema, includes):
+    """
+    Returns a copy of a (cached) schema with additional includes linked in,
+    leaving the original schema untouched.
+
+    Yamale shares a single includes mapping between a schema and the includes
+    defined by its own file, so these are copied as well, and relinked to the
+    new mapping.
+
+    Parameters
+    ----------
+    schema : yamale.schema.Schema
+        The schema to link the includes to.
+    includes : dict
+        Mapping of include names to the schemas to link under them.
+
+    Returns
+    -------
+    linked_schema : yamale.schema.Schema
+        Copy of the schema with the includes linked.
+
+    """
+    linked_includes = {}
+
+    for include_name, include_schema in schema.includes.items():
+        if include_schema.includes is schema.includes:
+            include_schema = copy.copy(include_schema)
+            include_schema.includes = linked_includes
+
+        linked_includes[include_name] = include_schema
+
+    linked_includes.update(includes)
+
+    linked_schema = copy.copy(schema)
+    linked_schema.includes = linked_includes
+
+    return linked_schema
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+
+"""
+==========
+tracing.py
+==========
+
+Lightweight hierarchical tracing of the stages of a PGE.
+
+Spans are timed sections of execution, which nest within one another on a
+per-thread basis. Completed spans may be exported in the Chrome trace event
+format (loadable in Perfetto or chrome://tracing), or summarized per span name
+as the total and self (exclusive of child spans) time spent within them.
+
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+DEFAULT_SPAN_CATEGORY = 'pge'
+"""Category assigned to spans when none is provided"""
+
+
+class Span:
+    """A single timed section of execution."""
+
+    __slots__ = ('name', 'category', 'args', 'start_ns', 'end_ns', 'child_ns',
+                 'depth', 'thread_id', 'thread_name')
+
+    def __init__(self, name, category, args, depth):
+        """
+        Creates a new Span, starting its clock.
+
+        Parameters
+        ----------
+        name : str
+            Name of the span.
+        category : str
+            Category of the span, used to group spans in trace viewers.
+        args : dict
+            Additional details recorded with the span.
+        depth : int
+            Nesting depth of the span within the spans open on its thread.
+
+        """
+        self.name = name
+        self.category = category
+        self.args = args
+        self.depth = depth
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = None
+        self.child_ns = 0
+
+        current_thread = threading.current_thread()
+        self.thread_id = current_thread.ident
+        self.thread_name = current_thread.name
+
+    @property
+    def duration_ns(self):
+        """Returns the duration of the span in nanoseconds, or None if the span is still open."""
+        return None if self.end_ns is None else self.end_ns - self.start_ns
+
+    @property
+    def self_ns(self):
+        """Returns the duration of the span exclusive of any child spans, in nanoseconds."""
+        return None if self.end_ns is None else self.duration_ns - self.child_ns
+
+
+class Tracer:
+    """Records nested spans of execution across any number of threads."""
+
+    def __init__(self):
+        """Creates a new Tracer, with no spans recorded."""
+        self.origin_ns = time.perf_counter_ns()
+        self.spans = []
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        """Returns the stack of open spans for the current thread."""
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    @contextmanager
+    def span(self, name, category=DEFAULT_SPAN_CATEGORY, **args):
+        """
+        Context manager which records its body as a span, nested within any
+        span currently open on the calling thread.
+
+        Parameters
+        ----------
+        name : str
+            Name of the span.
+        category : str, optional
+            Category of the span, used to filter spans in trace viewers.
+        **args : dict
+            Any additional (JSON-serializable) details to attach to the span.
+
+        Yields
+        ------
+        span : Span
+            The open span.
+
+        """
+        stack = self._stack()
+        span = Span(name, category, args, depth=len(stack))
+        stack.append(span)
+
+        try:
+            yield span
+        except BaseException as err:
+            span.args['error'] = type(err).__name__
+            raise
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            stack.pop()
+
+            if stack:
+                stack[-1].child_ns += span.duration_ns
+
+            with self._lock:
+                self.spans.append(span)
+
+    def summary(self):
+        """
+        Returns a flat summary of the completed spans, grouped by span name.
+
+        Returns
+        -------
+        summary : collections.OrderedDict
+            Mapping of span name to a dictionary with the number of calls, and
+            the total, self (exclusive of child spans) and maximum seconds
+            spent within spans of that name, in order of decreasing total time.
+
+        """
+        with self._lock:
+            spans = list(self.spans)
+
+        summary = {}
+
+        for span in spans:
+            span_summary = summary.setdefault(
+                span.name, {'calls': 0, 'total_seconds': 0.0, 'self_seconds': 0.0, 'max_seconds': 0.0}
+            )
+            span_summary['calls'] += 1
+            span_summary['total_seconds'] += span.duration_ns / 1e9
+            span_summary['self_seconds'] += span.self_ns / 1e9
+            span_summary['max_seconds'] = max(span_summary['max_seconds'], span.duration_ns / 1e9)
+
+        return OrderedDict(sorted(summary.items(), key=lambda item: item[1]['total_seconds'], reverse=True))
+
+    def chrome_trace_events(self):
+        """
+        Returns the completed spans as a list of Chrome trace "complete"
+        events, preceded by metadata events naming each thread.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: (span.start_ns, span.depth))
+
+        pid = os.getpid()
+        events = []
+        thread_names = OrderedDict()
+
+        for span in spans:
+            thread_names.setdefault(span.thread_id, span.thread_name)
+
+        for thread_id, thread_name in thread_names.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id,
+                           'args': {'name': thread_name}})
+
+        for span in spans:
+            events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': (span.start_ns - self.origin_ns) / 1e3,
+                'dur': span.duration_ns / 1e3,
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': span.args
+            })
+
+        return events
+
+    def write_chrome_trace(self, filename):
+        """
+        Writes the completed spans to a Chrome trace event format JSON file.
+
+        Parameters
+        ----------
+        filename : str
+            Path to write the trace to.
+
+        """
+        trace = {'traceEvents': self.chrome_trace_events(), 'displayTimeUnit': 'ms'}
+
+        with open(filename, 'w', encoding='utf-8') as outfile:
+            json.dump(trace, outfile)
+
+
+def _resolve_method(instance, method_name):
+    """
+    Looks up a method on the class of an instance (bypassing any instance
+    attribute of the same name), bound to the instance.
+    """
+    for klass in type(instance).__mro__:
+        if method_name in vars(klass):
+            attribute = vars(klass)[method_name]
+            return attribute.__get__(instance, type(instance)) if hasattr(attribute, '__get__') else attribute
+
+    raise AttributeError(f'{type(instance).__name__} has no method {method_name}')
+
+
+def trace_methods(instance, tracer, method_names, category=DEFAULT_SPAN_CATEGORY):
+    """
+    Wraps the named methods of an instance so each call is recorded as a span.
+
+    Wrappers are installed as instance attributes, and resolve the method
+    through the class on each call, so overrides by subclasses (and any
+    patching of the class) continue to take effect. Methods not defined by
+    the instance's class are skipped.
+
+    Parameters
+    ----------
+    instance : object
+        The object whose methods should be traced.
+    tracer : Tracer
+        The tracer to record spans with.
+    method_names : Iterable[str]
+        Names of the methods to trace.
+    category : str, optional
+        Category assigned to the recorded spans.
+
+    """
+    for method_name in method_names:
+        if not callable(getattr(type(instance), method_name, None)):
+            continue
+
+        def _make_wrapper(name):
+            @wraps(getattr(type(instance), name))
+            def _traced(*args, **kwargs):
+                with tracer.span(name, category):
+                    return _resolve_method(instance, name)(*args, **kwargs)
+
+            return _traced
+
+        setattr(instance, method_name, _make_wrapper(method_name))
@@ -13,10 +13,21 @@ Adapted By: Scott Collins
 
 """
 
+import csv
+import json
+import math
 import os
 import resource
+import threading
+import time
 from sys import platform
 
+PROC_ROOT = os.path.join(os.sep, 'proc')
+"""Location of the Linux proc filesystem"""
+
+DEFAULT_SAMPLING_INTERVAL = 1.0
+"""Default number of seconds between samples taken by a ProcessTreeSampler"""
+
 
 def get_os_metrics():
     """
@@ -103,3 +114,308 @@ def get_self_peak_vmm_kb():  # pylint: disable=missing-raises-doc
         vm_peak_kb = -1
 
     return vm_peak_kb
+
+
+def get_percentile(values, percentile):
+    """
+    Returns the requested percentile of the provided values, using the
+    nearest-rank method.
+
+    Parameters
+    ----------
+    values : Iterable[float]
+        The values to compute the percentile of.
+    percentile : float
+        The percentile to compute, in the range [0, 100].
+
+    Returns
+    -------
+    value : float
+        The value at the requested percentile, or None if no values were
+        provided.
+
+    """
+    sorted_values = sorted(values)
+
+    if not sorted_values:
+        return None
+
+    rank = max(math.ceil(percentile / 100 * len(sorted_values)), 1)
+
+    return sorted_values[rank - 1]
+
+
+class ProcessTreeSampler:
+    """
+    Background sampler of the resource usage of a process and all of its
+    descendants.
+
+    While running, the sampler periodically reads /proc/<pid>/{stat,io}
+    for every process in the tree rooted at the monitored process, and records
+    a timeline of the aggregate CPU utilization, resident set size, I/O and
+    thread count of the tree. This allows the footprint of programs which fan
+    out into several processes (for example, "conda run" launching a Python
+    interpreter with its own workers) to be captured, which is not possible
+    with the rusage values reported by get_os_metrics().
+
+    On platforms without a proc filesystem, no samples are recorded.
+
+    """
+
+    TIMELINE_FIELDS = ('elapsed_seconds', 'num_processes', 'cpu_percent', 'rss_kb',
+                       'read_bytes', 'write_bytes', 'num_threads')
+    """Names of the fields recorded for each sample in the timeline"""
+
+    SUMMARY_FIELDS = ('cpu_percent', 'rss_kb', 'read_bytes_per_second',
+                      'write_bytes_per_second', 'num_threads')
+    """Names of the fields summarized by get_summary_metrics()"""
+
+    def __init__(self, interval=DEFAULT_SAMPLING_INTERVAL):
+        """
+        Creates a new (stopped) ProcessTreeSampler.
+
+        Parameters
+        ----------
+        interval : float, optional
+            Number of seconds between samples.
+
+        """
+        self.interval = interval
+        self.samples = []
+
+        self._root_pid = None
+        self._start_time = None
+        self._clock_ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self._page_kb = (os.sysconf('SC_PAGE_SIZE') // 1024) if hasattr(os, 'sysconf') else 4
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # Per-process bookkeeping used to derive rates and totals that remain
+        # valid after a process in the tree has exited
+        self._cpu_ticks_by_pid = {}
+        self._io_by_pid = {}
+
+    def start(self, pid):
+        """
+        Begins sampling the process tree rooted at the provided process ID on
+        a background thread.
+
+        Parameters
+        ----------
+        pid : int
+            ID of the root process of the tree to monitor.
+
+        """
+        self._root_pid = pid
+        self._start_time = time.monotonic()
+        self._stop_event.clear()
+
+        if not os.path.isdir(PROC_ROOT):  # pragma no cover
+            return
+
+        self._thread = threading.Thread(target=self._run, name='process_tree_sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops sampling, waiting for the background thread to finish."""
+        self._stop_event.set()
+
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        """Sampling loop executed by the background thread."""
+        self.sample()
+
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def _get_process_tree(self):
+        """Returns the set of process IDs of the root process and its descendants."""
+        children_by_pid = {}
+
+        for entry in os.scandir(PROC_ROOT):
+            if not entry.name.isdigit():
+                continue
+
+            stat_fields = self._read_stat(entry.name)
+
+            if stat_fields:
+                children_by_pid.setdefault(int(stat_fields[1]), []).append(int(entry.name))
+
+        process_tree = set()
+        pending = [self._root_pid]
+
+        while pending:
+            pid = pending.pop()
+            process_tree.add(pid)
+            pending.extend(children_by_pid.get(pid, []))
+
+        return process_tree
+
+    @staticmethod
+    def _read_stat(pid):
+        """
+        Returns the fields of /proc/<pid>/stat following the command name, or
+        None if the process no longer exists.
+        """
+        try:
+            with open(os.path.join(PROC_ROOT, str(pid), 'stat'), 'r', encoding='utf-8') as infile:
+                contents = infile.read()
+        except OSError:
+            return None
+
+        # The command name is wrapped in parentheses and may itself contain
+        # spaces, so split on the final closing parenthesis
+        return contents.rpartition(')')[-1].split()
+
+    @staticmethod
+    def _read_io(pid):
+        """Returns the (read_bytes, write_bytes) of a process, or None if not available."""
+        io_counters = {}
+
+        try:
+            with open(os.path.join(PROC_ROOT, str(pid), 'io'), 'r', encoding='utf-8') as infile:
+                for line in infile:
+                    key, _, value = line.partition(':')
+                    io_counters[key] = int(value)
+        except (OSError, ValueError):
+            return None
+
+        return io_counters.get('read_bytes', 0), io_counters.get('write_bytes', 0)
+
+    def sample(self):
+        """
+        Takes a single sample of the monitored process tree, appending it to
+        the recorded timeline.
+        """
+        elapsed_seconds = time.monotonic() - self._start_time
+        process_tree = self._get_process_tree()
+
+        cpu_ticks_delta = 0
+        rss_kb = 0
+        num_threads = 0
+        num_processes = 0
+
+        for pid in process_tree:
+            # Field offsets are relative to the first field after the command name,
+            # see the Linux man page for proc(5)
+            stat_fields = self._read_stat(pid)
+
+            if not stat_fields:
+                continue
+
+            num_processes += 1
+
+            cpu_ticks = int(stat_fields[11]) + int(stat_fields[12])
+            cpu_ticks_delta += max(cpu_ticks - self._cpu_ticks_by_pid.get(pid, 0), 0)
+            self._cpu_ticks_by_pid[pid] = cpu_ticks
+
+            num_threads += int(stat_fields[17])
+            rss_kb += int(stat_fields[21]) * self._page_kb
+
+            io_counters = self._read_io(pid)
+
+            if io_counters:
+                self._io_by_pid[pid] = io_counters
+
+        if self.samples:
+            wall_delta = elapsed_seconds - self.samples[-1]['elapsed_seconds']
+        else:
+            wall_delta = elapsed_seconds
+
+        cpu_percent = (100.0 * cpu_ticks_delta / self._clock_ticks / wall_delta
+                       if wall_delta > 0 else 0.0)
+
+        self.samples.append(
+            {
+                'elapsed_seconds': elapsed_seconds,
+                'num_processes': num_processes,
+                'cpu_percent': cpu_percent,
+                'rss_kb': rss_kb,
+                # I/O totals include processes in the tree which have since exited
+                'read_bytes': sum(io[0] for io in self._io_by_pid.values()),
+                'write_bytes': sum(io[1] for io in self._io_by_pid.values()),
+                'num_threads': num_threads
+            }
+        )
+
+    def get_summary_metrics(self):
+        """
+        Summarizes the recorded timeline.
+
+        Returns
+        -------
+        metrics : dict
+            Dictionary containing the peak, 95th percentile and mean of the
+            CPU utilization (percent of one core), summed resident set size
+            (kilobytes), read/write rates (bytes per second) and thread count
+            of the process tree, keyed as <field>.<statistic>. The total bytes
+            read/written and the number of samples taken are also included.
+            If no samples were recorded, an empty dictionary is returned.
+
+        """
+        if not self.samples:
+            return {}
+
+        series = {field: [sample[field] for sample in self.samples]
+                  for field in ('cpu_percent', 'rss_kb', 'num_threads')}
+
+        for field in ('read_bytes', 'write_bytes'):
+            rates = []
+            previous_time = previous_value = 0
+
+            for sample in self.samples:
+                wall_delta = sample['elapsed_seconds'] - previous_time
+
+                if wall_delta > 0:
+                    rates.append((sample[field] - previous_value) / wall_delta)
+
+                previous_time, previous_value = sample['elapsed_seconds'], sample[field]
+
+            series[f'{field}_per_second'] = rates
+
+        metrics = {}
+
+        for field in self.SUMMARY_FIELDS:
+            values = series[field]
+
+            if values:
+                metrics[f'{field}.peak'] = max(values)
+                metrics[f'{field}.p95'] = get_percentile(values, 95)
+                metrics[f'{field}.mean'] = sum(values) / len(values)
+
+        metrics['read_bytes.total'] = self.samples[-1]['read_bytes']
+        metrics['write_bytes.total'] = self.samples[-1]['write_bytes']
+        metrics['num_samples'] = len(self.samples)
+
+        return metrics
+
+    def write_timeline(self, output_path, timeline_format='csv'):
+        """
+        Writes the recorded timeline to disk.
+
+        Parameters
+        ----------
+        output_path : str
+            Path to the file to write.
+        timeline_format : str, optional
+            Format of the written file, either "csv" or "json".
+
+        Raises
+        ------
+        ValueError
+            If an unsupported format is requested.
+
+        """
+        if timeline_format == 'csv':
+            with open(output_path, 'w', encoding='utf-8', newline='') as outfile:
+                writer = csv.DictWriter(outfile, fieldnames=self.TIMELINE_FIELDS)
+                writer.writeheader()
+                writer.writerows(self.samples)
+        elif timeline_format == 'json':
+            with open(output_path, 'w', encoding='utf-8') as outfile:
+                json.dump({'interval': self.interval, 'samples': self.samples}, outfile, indent=2)
+        else:
+            raise ValueError(f'Unsupported timeline format "{timeline_format}"')